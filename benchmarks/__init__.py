@@ -0,0 +1,4 @@
+"""Module that contains the benchmarks of the server's hot paths.
+
+Each benchmark is run from the root of the project, e.g.
+``python -m benchmarks.pathfinding``."""
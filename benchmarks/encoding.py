@@ -0,0 +1,116 @@
+"""Benchmark of the encodings of the game states.
+
+Plays the enemies of a game on every map and records the snapshot and the
+deltas sent to a client, then compares their JSON and binary encodings: the
+size of the payloads, the time to encode them (server) and to decode them
+(client). The decoded messages must be the same in both encodings.
+
+Usage: ``python -m benchmarks.encoding [-t TURNS] [-n REPEAT]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable
+
+from game_server import GameServer
+from network import DeltaEncoder
+from network.binary import NameTable, StateDecoder, encode_state
+
+MAPS = ["map1", "map2", "map3", "map4", "map5", "map_courte"]
+
+
+def record_messages(map_file: str, turns: int) -> list[dict]:
+    """Records the messages sent to a client while the enemies move.
+
+    Args:
+        map_file (str): map of the game, without the extension
+        turns (int): number of turns of the enemies
+
+    Returns:
+        list[dict]: the snapshot, then a delta per turn where something changed
+    """
+    game = GameServer([None, None], f"{map_file}.tmx")
+    game.data["current_player"] = 0
+    encoder = DeltaEncoder()
+    messages = []
+    for turn in range(turns):
+        for enemy in game.list_enemies:
+            if enemy.health > 0 and game.board.get_coordinates_object(enemy):
+                game.board.move_enemy(enemy, 1)
+        if turn % 4 == 0:
+            # a player selects a card: cells next to an element are highlighted
+            elements = game.board.get_all_elements()
+            _, _, y, x = elements[turn // 4 % len(elements)]
+            game.data["possible_moves"] = [(y + 1, x), (y + 2, x), (y, x + 1)]
+        data, players = game.get_states()
+        message = encoder.encode({**data, **players[0]})
+        if message is not None:
+            # the messages as the client decodes them
+            messages.append(json.loads(json.dumps(message)))
+    return messages
+
+
+def measure(function: Callable, messages: list, repeat: int) -> float:
+    """Returns the best time to apply a function to every message.
+
+    Args:
+        function (Callable): function taking a message
+        messages (list): the messages
+        repeat (int): number of runs
+
+    Returns:
+        float: seconds of the fastest run
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            function(message)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-t", "--turns", type=int, default=200)
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'map':<12}{'messages':>9}{'json B':>10}{'binary B':>10}"
+        f"{'enc json':>10}{'enc bin':>9}{'dec json':>10}{'dec bin':>9}  (ms)"
+    )
+    for map_file in MAPS:
+        messages = record_messages(map_file, args.turns)
+
+        names = NameTable()
+
+        def encode_binary(message: dict) -> bytes:
+            payload = encode_state(message, names)
+            names.delivered = len(names.names)
+            return payload
+
+        json_payloads = [json.dumps(message).encode() for message in messages]
+        binary_payloads = [encode_binary(message) for message in messages]
+        decoder = StateDecoder()
+        for message, payload in zip(messages, binary_payloads):
+            decoded = json.loads(json.dumps(decoder.decode(payload)))
+            assert decoded == message, f"{map_file} : {decoded} != {message}"
+
+        encode_json = measure(lambda m: json.dumps(m).encode(), messages, args.repeat)
+        encode_bin = measure(lambda m: encode_state(m, names), messages, args.repeat)
+        decode_json = measure(json.loads, json_payloads, args.repeat)
+        decode_bin = measure(StateDecoder().decode, binary_payloads, args.repeat)
+        print(
+            f"{map_file:<12}{len(messages):>9}"
+            f"{sum(map(len, json_payloads)):>10}{sum(map(len, binary_payloads)):>10}"
+            f"{encode_json * 1000:>10.2f}{encode_bin * 1000:>9.2f}"
+            f"{decode_json * 1000:>10.2f}{decode_bin * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark of the enemy brain against the random AI.
+
+Plays the enemies of a game for a number of turns (the pawns stay still, the
+pawns on healing tiles heal at the end of the turns), with the random AI of the
+board then with the search of the enemy brain under several budgets per turn.
+Reports the nodes explored per second, the mean depth of the searches, the
+slowest turn of the enemies (the searches only with the brain: the random AI
+playing after a timeout is the cost of the random AI) and the health the pawns
+lost, to tune the difficulty against the CPU cost. Exits with an error if the
+searches of a turn of the enemies took longer than its budget (plus the grace).
+
+Usage: ``python -m benchmarks.enemy_brain [-t TURNS] [-m MAP] [-s SEED]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+
+from game_server import GameServer
+from server_classes.enemy_brain import GRACE_MS
+
+BUDGETS_MS = [None, 2, 10, 50]
+"""Budgets of a turn of the enemies, None for the random AI"""
+SLACK_MS = 5
+"""Milliseconds allowed over the budget for the snapshot and the thread switch"""
+
+
+def play(map_file: str, turns: int, budget_ms: int | None) -> tuple:
+    """Plays the enemies of a game.
+
+    Args:
+        map_file (str): map of the game, without the extension
+        turns (int): number of turns
+        budget_ms (int | None): budget of a turn, None for the random AI
+
+    Returns:
+        tuple: the brain (None for the random AI), the slowest turn of the
+        enemies (seconds, the searches only with the brain) and the health
+        lost by the pawns
+    """
+    game = GameServer([None, None], f"{map_file}.tmx", brain_budget_ms=budget_ms)
+    game.data["current_player"] = 0
+    health = sum(pawn.health for pawn in game.list_pawns)
+    slowest = 0.0
+    for _ in range(turns):
+        enemies = [
+            enemy
+            for enemy in game.list_enemies
+            if enemy.health > 0 and game.board.get_coordinates_object(enemy)
+        ]
+        brain = game.enemy_brain
+        elapsed = 0.0
+        if brain is not None:
+            brain.start_turn(len(enemies))
+        for enemy in enemies:
+            begin = time.perf_counter()
+            if brain is None:
+                game.board.move_enemy(enemy, game.player_count)
+                elapsed += time.perf_counter() - begin
+                continue
+            result = brain.choose_step(game.board, enemy)
+            elapsed += time.perf_counter() - begin
+            if result is None:
+                game.board.move_enemy(enemy, game.player_count)
+            else:
+                game.board.move_enemy_step(enemy, result.step)
+        slowest = max(slowest, elapsed)
+        game.heal_pawns()
+    lost = health - sum(max(pawn.health, 0) for pawn in game.list_pawns)
+    return game.enemy_brain, slowest, lost
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-t", "--turns", type=int, default=30)
+    parser.add_argument("-m", "--map", type=str, default="map_courte")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'budget':<8}{'nodes/s':>10}{'depth':>7}{'timeouts':>10}"
+        f"{'slowest':>10}{'health lost':>13}"
+    )
+    errors = []
+    for budget_ms in BUDGETS_MS:
+        random.seed(args.seed)
+        brain, slowest, lost = play(args.map, args.turns, budget_ms)
+        if brain is None:
+            print(f"{'random':<8}{'':>10}{'':>7}{'':>10}", end="")
+        else:
+            depth = brain.depths / brain.searches if brain.searches else 0.0
+            print(
+                f"{f'{budget_ms} ms':<8}{brain.nodes_per_second:>10.0f}"
+                f"{depth:>7.1f}{brain.timeouts:>10}",
+                end="",
+            )
+            if slowest * 1000 > budget_ms + GRACE_MS + SLACK_MS:
+                errors.append(f"a turn took {slowest * 1000:.1f} ms for {budget_ms} ms")
+        print(f"{slowest * 1000:>8.1f}ms{lost:>13}")
+    if errors:
+        sys.exit("Over budget: " + ", ".join(errors))
+
+
+if __name__ == "__main__":
+    main()
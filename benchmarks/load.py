@@ -0,0 +1,162 @@
+"""Load test of the game server with bot clients.
+
+Starts ``games * players`` bots (``bot.py``) at the same time against a local
+server, each in its own thread, and reports the number of turns played per
+second, the latency of the turns (time between the move or the skip of a bot
+and the state it produced, enemies' turns included) and the bytes received per
+turn. Several games at the same time need a server started with ``--rooms``,
+``--spawn`` starts one for the duration of the test.
+
+Usage: ``python -m benchmarks.load [-g GAMES] [-p PLAYERS] [-t TURNS] [--spawn]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import threading
+import time
+
+from bot import Bot
+from game_constants.consts import PORT, STATE_ENCODINGS
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Returns a percentile of values (nearest rank).
+
+    Args:
+        values (list[float]): the values, not empty
+        percent (float): the percentile, between 0 and 100
+
+    Returns:
+        float: the smallest value greater than or equal to ``percent`` % of the values
+    """
+    ordered = sorted(values)
+    rank = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(rank)]
+
+
+def run_bots(bots: list[Bot]) -> float:
+    """Runs bots in threads until they all stopped.
+
+    Args:
+        bots (list[Bot]): the bots
+
+    Returns:
+        float: seconds elapsed
+    """
+    errors = []
+    # set once a bot stopped: the server then ends its game, and the other bots
+    # of the game can lose their connection while they play
+    finished = threading.Event()
+
+    def run(bot: Bot) -> None:
+        try:
+            bot.run()
+        except (ConnectionError, EOFError) as e:
+            # the normal end of a game, unless no bot stopped yet
+            if not finished.is_set():
+                errors.append(e)
+        except OSError as e:
+            errors.append(e)
+        finally:
+            finished.set()
+
+    threads = [threading.Thread(target=run, args=(bot,), daemon=True) for bot in bots]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        print(f"{len(errors)} bots failed, first error : {errors[0]!r}")
+    return elapsed
+
+
+def report(bots: list[Bot], elapsed: float) -> None:
+    """Prints the results of a load test.
+
+    Args:
+        bots (list[Bot]): the bots that played
+        elapsed (float): seconds elapsed
+    """
+    turns = sum(bot.turns for bot in bots)
+    latencies = [latency for bot in bots for latency in bot.turn_latencies]
+    received = sum(bot.bytes_received for bot in bots)
+    skips = sum(bot.skips for bot in bots)
+    print(f"{len(bots)} bots, {turns} turns ({skips} skipped) in {elapsed:.2f}s")
+    if not turns:
+        return
+    print(f"turns/s        {turns / elapsed:10.1f}")
+    print(f"p50 latency    {percentile(latencies, 50) * 1000:10.2f} ms")
+    print(f"p99 latency    {percentile(latencies, 99) * 1000:10.2f} ms")
+    print(f"bytes/turn     {received / turns:10.0f}")
+    print(f"messages/turn  {sum(bot.messages_received for bot in bots) / turns:10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-g", "--games", type=int, default=1, help="games at once")
+    parser.add_argument("-p", "--players", type=int, default=2, help="per game")
+    parser.add_argument(
+        "-t", "--turns", type=int, default=50, help="turns played by each bot"
+    )
+    parser.add_argument("-m", "--map", type=str, default="map_courte")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "-e",
+        "--encoding",
+        choices=["binary", "json"],
+        default=STATE_ENCODINGS[0],
+        help="encoding of the game states",
+    )
+    parser.add_argument(
+        "--spawn",
+        action="store_true",
+        help="start a room server (server.py --rooms) for the test",
+    )
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "server.py",
+                str(args.players),
+                "--map",
+                args.map,
+                "--rooms",
+                "--port",
+                str(args.port),
+                "--log-level",
+                "WARNING",
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+
+    bots = [
+        Bot(
+            args.host,
+            args.port,
+            args.turns,
+            seed=args.seed + index,
+            encodings=(args.encoding,),
+        )
+        for index in range(args.games * args.players)
+    ]
+    try:
+        elapsed = run_bots(bots)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    report(bots, elapsed)
+
+
+if __name__ == "__main__":
+    main()
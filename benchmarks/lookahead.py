@@ -0,0 +1,152 @@
+"""Benchmark of the board snapshots used to simulate turns.
+
+Plays random actions (moves and attacks of the pawns, turns of the enemies,
+heal) on the board of a game and on a snapshot taken at the start: the
+snapshot must give the same elements as the board after every action, and the
+elements of the start once every action is undone. Then reports the states a
+search can explore per second on a snapshot (apply then undo an action), and
+the time of a snapshot against a deep copy of the board.
+
+Usage: ``python -m benchmarks.lookahead [-a ACTIONS] [-s SEED]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import random
+import time
+
+from game_server import GameServer
+from server_classes import BoardSnapshot, Enemy, Pawn
+from server_classes.card import list_of_cards
+
+MAPS = ["map1", "map2", "map3", "map4", "map5", "map_courte"]
+
+
+def play_enemy(game: GameServer, snapshot: BoardSnapshot, enemy: Enemy) -> None:
+    """Plays the turn of an enemy on the board and on the snapshot, with the
+    same random step.
+
+    Args:
+        game (GameServer): the game
+        snapshot (BoardSnapshot): the snapshot
+        enemy (Enemy): the enemy
+    """
+    step = random.choice(snapshot.enemy_steps(enemy) + [None])
+    assert snapshot.move_enemy(enemy, step) == game.board.move_enemy_step(enemy, step)
+
+
+def check_map(map_name: str, actions: int) -> None:
+    """Plays the same random actions on the board of a game and on a snapshot.
+
+    Args:
+        map_name (str): the map, without the extension
+        actions (int): number of actions
+
+    Raises:
+        AssertionError: if the snapshot and the board differ
+    """
+    game = GameServer([None, None], f"{map_name}.tmx")
+    board = game.board
+    snapshot = board.snapshot()
+    start = snapshot.get_all_elements()
+    assert start == board.get_all_elements(), map_name
+    branch = snapshot.copy()
+    for number in range(actions):
+        on_board = [
+            element
+            for element in game.list_pawns + game.list_enemies
+            if board.get_coordinates_object(element)
+        ]
+        element = random.choice(on_board) if on_board else None
+        if isinstance(element, Pawn):
+            moves = random.choice(list_of_cards).moves
+            targets = element.get_possible_moves(moves, board)
+            assert element.get_possible_moves(moves, snapshot) == targets, map_name
+            if not targets:
+                continue
+            new_y, new_x = random.choice(targets)
+            old_coordinates = board.get_coordinates_object(element)
+            moved = board.move_or_attack(element, new_y, new_x, old_coordinates)
+            assert snapshot.move_or_attack(element, new_y, new_x) == bool(moved)
+        elif isinstance(element, Enemy):
+            play_enemy(game, snapshot, element)
+        else:
+            game.heal_pawns()
+            snapshot.heal()
+        assert snapshot.get_all_elements() == board.get_all_elements(), (
+            map_name,
+            number,
+        )
+    while snapshot.depth:
+        snapshot.undo()
+    assert snapshot.get_all_elements() == start, map_name
+    assert branch.get_all_elements() == start, map_name
+
+
+def search(snapshot: BoardSnapshot, pawns: list, enemies: list, depth: int) -> int:
+    """Explores every move of the pawns (with the Croix card), each followed
+    by a turn of the enemies toward every step and the heal, down to a depth.
+
+    Args:
+        snapshot (BoardSnapshot): the snapshot, restored at the end
+        pawns (list): the pawns
+        enemies (list): the enemies
+        depth (int): number of moves of the pawns
+
+    Returns:
+        int: number of states reached
+    """
+    if depth == 0:
+        return 0
+    states = 0
+    for pawn in pawns:
+        for new_y, new_x in pawn.get_possible_moves(list_of_cards[0].moves, snapshot):
+            snapshot.move_or_attack(pawn, new_y, new_x)
+            for enemy in enemies:
+                for step in snapshot.enemy_steps(enemy):
+                    snapshot.move_enemy(enemy, step)
+                    snapshot.undo()
+                    states += 1
+            snapshot.heal()
+            states += 2 + search(snapshot, pawns, enemies, depth - 1)
+            snapshot.undo()
+            snapshot.undo()
+    return states
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-a", "--actions", type=int, default=2000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'map':<12}{'states/s':>10}{'snapshot':>12}{'deepcopy':>12}")
+    for map_name in MAPS:
+        random.seed(args.seed)
+        check_map(map_name, args.actions)
+
+        game = GameServer([None, None], f"{map_name}.tmx")
+        snapshot = game.board.snapshot()
+        before = snapshot.get_all_elements()
+        begin = time.perf_counter()
+        states = search(snapshot, game.list_pawns, game.list_enemies, 2)
+        elapsed = time.perf_counter() - begin
+        assert snapshot.get_all_elements() == before, map_name
+
+        begin = time.perf_counter()
+        for _ in range(1000):
+            game.board.snapshot()
+        snapshot_time = (time.perf_counter() - begin) / 1000
+        begin = time.perf_counter()
+        copy.deepcopy(game.board)
+        deepcopy_time = time.perf_counter() - begin
+        print(
+            f"{map_name:<12}{states / elapsed:>10.0f}"
+            f"{snapshot_time * 1e6:>10.1f}us{deepcopy_time * 1e3:>10.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
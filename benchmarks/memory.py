@@ -0,0 +1,165 @@
+"""Memory regression check of the games played in a row.
+
+Plays games one after the other in the same process, like the loop of
+``server.py``: the enemies move, the turns end and the states are encoded for
+two clients. After a few warm up games (caches of the maps, imports), the
+games must not leave anything behind: the game, its board and its pawns and
+enemies must be freed as soon as the game ends (a class level registry of the
+cells kept the last board reachable), and the objects tracked by the garbage
+collector and the resident memory of the process (Linux) must stay flat. Each
+game also loads and draws the board of a client (without a window), whose
+cells must be freed with it. Exits with an error otherwise.
+
+Usage: ``python -m benchmarks.memory [-g GAMES] [-t TURNS] [-m MAP]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import sys
+import weakref
+
+# the boards of the clients are drawn without a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame  # pylint: disable=wrong-import-position
+
+from classes.board import Board  # pylint: disable=wrong-import-position
+from classes.camera import Camera  # pylint: disable=wrong-import-position
+from game_constants.consts import (  # pylint: disable=wrong-import-position
+    GRAPHICAL_TILE_SIZE,
+)
+from game_server import GameServer  # pylint: disable=wrong-import-position
+
+WARM_UP_GAMES = 3
+
+MAX_OBJECTS_GROWTH = 1000
+"""Objects that can appear during the games (interned strings, caches...)"""
+MAX_RSS_GROWTH = 4 * 1024 * 1024
+"""Bytes the resident memory can grow (allocator fragmentation)"""
+
+
+def rss() -> int | None:
+    """Returns the resident memory of the process.
+
+    Returns:
+        int | None: bytes in memory, None if unknown (not Linux)
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def play_game(map_file: str, turns: int) -> list[weakref.ref]:
+    """Plays a game without clients.
+
+    Args:
+        map_file (str): map of the game, without the extension
+        turns (int): number of turns
+
+    Returns:
+        list[weakref.ref]: references to the game, its board and its elements,
+        dead once freed
+    """
+    game = GameServer([None, None], f"{map_file}.tmx")
+    game.data["current_player"] = 0
+    for _ in range(turns):
+        for enemy in game.list_enemies:
+            if enemy.health > 0 and game.board.get_coordinates_object(enemy):
+                game.board.move_enemy(enemy, game.player_count)
+        game.heal_pawns()
+        game.encoder.encode(*game.get_states())
+    kept = [game, game.board, *game.list_pawns, *game.list_enemies]
+    return [weakref.ref(game_object) for game_object in kept]
+
+
+def load_client_board(map_file: str) -> list[weakref.ref]:
+    """Loads and draws the board of a client, like ``client.py``.
+
+    Args:
+        map_file (str): map of the game, without the extension
+
+    Returns:
+        list[weakref.ref]: references to the board and its cells, dead once freed
+    """
+    board = Board.from_tmx(
+        tmx_file=f"maps/{map_file}.tmx",
+        camera=Camera(),
+        rect=False,
+        card_map_list=[],
+        key_map_list=[],
+    )
+    board.resize_tiles(GRAPHICAL_TILE_SIZE, GRAPHICAL_TILE_SIZE)
+    board.draw(pygame.display.get_surface())
+    board.tick(1)
+    kept = [board, *(cell for row in board.cells for cell in row)]
+    return [weakref.ref(board_object) for board_object in kept]
+
+
+def measure() -> tuple[int, int | None]:
+    """Collects the garbage and measures the memory.
+
+    Returns:
+        tuple[int, int | None]: objects tracked by the garbage collector and
+        resident memory (bytes, None if unknown)
+    """
+    gc.collect()
+    return len(gc.get_objects()), rss()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-g", "--games", type=int, default=30)
+    parser.add_argument("-t", "--turns", type=int, default=20)
+    parser.add_argument("-m", "--map", type=str, default="map1")
+    args = parser.parse_args()
+
+    pygame.init()  # pylint: disable=no-member
+    pygame.display.set_mode((1600, 900))
+    for _ in range(WARM_UP_GAMES):
+        play_game(args.map, args.turns)
+        load_client_board(args.map)
+    objects_start, rss_start = measure()
+
+    print(f"{'game':>5}{'objects':>10}{'rss MiB':>10}")
+    alive_games = alive_boards = 0
+    for number in range(1, args.games + 1):
+        references = play_game(args.map, args.turns)
+        board_references = load_client_board(args.map)
+        gc.collect()
+        alive_games += any(reference() is not None for reference in references)
+        alive_boards += any(reference() is not None for reference in board_references)
+        # a weak reference by cell: not counted with the objects of the games
+        del references, board_references
+        objects, resident = measure()
+        if number % 5 == 0 or number == args.games:
+            rss_text = f"{resident / 2**20:>10.1f}" if resident else f"{'?':>10}"
+            print(f"{number:>5}{objects:>10}{rss_text}")
+
+    errors = []
+    if alive_games:
+        errors.append(f"{alive_games} games still reachable after their end")
+    if alive_boards:
+        errors.append(f"{alive_boards} client boards still reachable after their end")
+    if objects - objects_start > MAX_OBJECTS_GROWTH:
+        errors.append(f"{objects - objects_start} more objects than after the warm up")
+    if resident and rss_start and resident - rss_start > MAX_RSS_GROWTH:
+        errors.append(f"RSS grew by {(resident - rss_start) / 2**20:.1f} MiB")
+    if errors:
+        sys.exit("Memory regression: " + ", ".join(errors))
+    print(
+        f"ok: {objects - objects_start:+d} objects, "
+        + (
+            f"{(resident - rss_start) / 2**20:+.1f} MiB"
+            if resident and rss_start
+            else "RSS unknown"
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
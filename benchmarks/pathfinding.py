@@ -0,0 +1,146 @@
+"""Benchmark of the enemies' path finding.
+
+Compares the heap based ``PathFinder`` used by ``Board.a_star`` with the
+previous list based implementation, on every map: the paths must be the same
+and the new version must be faster. The searches go from every enemy to every
+pawn (reachable targets) and to every card (the cards block the cells, so the
+search explores the whole reachable area before giving up).
+
+Usage: ``python -m benchmarks.pathfinding [-n REPEAT]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from game_server import GameServer
+from server_classes import Board
+
+MAPS = ["map1", "map2", "map3", "map4", "map5", "map_courte"]
+
+
+def legacy_a_star(
+    board: Board, start: tuple[int, int], end: tuple[int, int]
+) -> list[tuple[int, int]]:
+    """The list based A* used before ``PathFinder``, kept as the reference.
+
+    Args:
+        board (Board): board to search
+        start (tuple): represents the start point (y, x)
+        end (tuple): represents the end point (y, x)
+
+    Returns:
+        list[tuple]: represents the shortest path between the two points
+    """
+    rows, cols = len(board.cells), len(board.cells[0])
+    open_list = [start]
+    closed_list = set()
+
+    g = {}
+    f = {}
+
+    g[start] = 0
+    f[start] = board.heuristic(start, end)
+
+    prev = {}
+    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+    while open_list:
+        # Sort nodes in open list by lowest f score
+        current = min(open_list, key=lambda node: f[node])
+        open_list.remove(current)
+        closed_list.add(current)
+
+        if current == end:
+            # Path found, reconstructing
+            path = []
+            while current in prev:
+                path.append(current)
+                current = prev[current]
+            path.append(start)
+            # Remove the last node, which is the player's position
+            path.pop()
+            # Remove the first node, which is the enemy's current position
+            path.pop(0)
+            return path[::-1]
+
+        for dy, dx in directions:
+            ny, nx = current[0] + dy, current[1] + dx
+            neighbor = (ny, nx)
+
+            if (
+                0 <= ny < rows
+                and 0 <= nx < cols
+                and board.cells[ny][nx].walkable
+                and not board.is_empty_or_pawn(ny, nx)
+                and neighbor not in closed_list
+            ):
+                tentative_g_score = g[current] + 1
+
+                if neighbor not in open_list:
+                    open_list.append(neighbor)
+                elif tentative_g_score >= g[neighbor]:
+                    continue
+
+                # Best path until now, record it
+                prev[neighbor] = current
+                g[neighbor] = tentative_g_score
+                f[neighbor] = g[neighbor] + board.heuristic(neighbor, end)
+
+    # If we reached here, no path was found
+    return []
+
+
+def searches(game: GameServer) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """Lists the (start, end) searches run on a map.
+
+    Args:
+        game (GameServer): game with its elements placed
+
+    Returns:
+        list[tuple]: the searches, from every enemy to every pawn and every card
+    """
+    board = game.board
+    starts = [board.get_coordinates_object(enemy) for enemy in game.list_enemies]
+    ends = [board.get_coordinates_object(pawn) for pawn in game.list_pawns]
+    ends += [(y, x) for _, y, x, _ in board.get_item_spawn()["card_map_list"]]
+    return [(start, end) for start in starts for end in ends]
+
+
+def timed(function, board: Board, pairs: list, repeat: int) -> tuple[float, list]:
+    """Runs every search ``repeat`` times.
+
+    Returns:
+        tuple[float, list]: the best time of a run (s) and the paths found
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        paths = [function(board, start, end) for start, end in pairs]
+        best = min(best, time.perf_counter() - begin)
+    return best, paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'map':<12}{'searches':>9}{'no path':>9}{'legacy':>12}{'heap':>12}{'x':>8}")
+    for map_name in MAPS:
+        game = GameServer([None], f"{map_name}.tmx")
+        pairs = searches(game)
+        legacy_time, legacy_paths = timed(legacy_a_star, game.board, pairs, args.repeat)
+        heap_time, heap_paths = timed(Board.a_star, game.board, pairs, args.repeat)
+        for pair, expected, path in zip(pairs, legacy_paths, heap_paths):
+            assert path == expected, f"{map_name} {pair}: different paths"
+        print(
+            f"{map_name:<12}{len(pairs):>9}{legacy_paths.count([]):>9}"
+            f"{legacy_time * 1000:>10.1f}ms{heap_time * 1000:>10.1f}ms"
+            f"{legacy_time / heap_time:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark of the turns of the server without clients.
+
+Plays the enemies and the end of the turns (heal) of a game on every map, with
+the pawns standing on healing tiles, and compares the heal from the effect
+tiles (``Board.pawns_on_effect``) with the previous scan of every cell: the
+healed pawns must be the same. Reports the time of an end of turn and the
+number of turns (enemies, then end of turn) played per second.
+
+Usage: ``python -m benchmarks.turns [-t TURNS] [-s SEED]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from game_server import GameServer
+from server_classes import Board, Pawn
+
+MAPS = ["map1", "map2", "map3", "map4", "map5", "map_courte"]
+
+
+def legacy_pawns_on_heal(board: Board) -> list[tuple[Pawn, int]]:
+    """The scan of every cell done by the end of turn before the effect tiles,
+    kept as the reference.
+
+    Args:
+        board (Board): board of the game
+
+    Returns:
+        list[tuple[Pawn, int]]: the pawns on a healing tile with its heal value
+    """
+    pawns = []
+    for row in board.cells:
+        for cell in row:
+            if cell.game_object and isinstance(cell.game_object, Pawn):
+                if cell.is_heal_cell:
+                    pawns.append((cell.game_object, cell.heal_value))
+    return pawns
+
+
+def put_pawns_on_heal(game: GameServer) -> None:
+    """Moves the pawns of a game to free healing tiles and wounds them.
+
+    Args:
+        game (GameServer): the game
+    """
+    board = game.board
+    free_tiles = [
+        (y, x) for y, x in board.effect_tiles["heal"] if board.cells[y][x].is_empty
+    ]
+    for pawn, (y, x) in zip(game.list_pawns, free_tiles):
+        old_y, old_x = board.get_coordinates_object(pawn)
+        board.cells[old_y][old_x].remove_object()
+        board.cells[y][x].add_pawn(pawn)
+        pawn.health = 10
+
+
+def play(game: GameServer, turns: int, pawns_on_heal) -> tuple[float, float]:
+    """Plays turns: every enemy moves, then the pawns on healing tiles heal.
+
+    Args:
+        game (GameServer): the game
+        turns (int): number of turns
+        pawns_on_heal (Callable): finds the pawns to heal on the board
+
+    Returns:
+        tuple[float, float]: seconds of all the turns and of the ends of turn
+    """
+    end_turns = 0.0
+    start = time.perf_counter()
+    for _ in range(turns):
+        for enemy in game.list_enemies:
+            if enemy.health > 0 and game.board.get_coordinates_object(enemy):
+                game.board.move_enemy(enemy, game.player_count)
+        begin = time.perf_counter()
+        for pawn, heal_value in pawns_on_heal(game.board):
+            pawn.health = min(pawn.health + heal_value, 100)
+        end_turns += time.perf_counter() - begin
+    return time.perf_counter() - start, end_turns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-t", "--turns", type=int, default=200)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'map':<12}{'healed':>7}{'end turn scan':>15}{'tiles':>10}"
+        f"{'turns/s scan':>14}{'tiles':>10}"
+    )
+    for map_name in MAPS:
+        results = []
+        for pawns_on_heal in (
+            legacy_pawns_on_heal,
+            lambda board: board.pawns_on_effect("heal"),
+        ):
+            # the same game for both
+            random.seed(args.seed)
+            game = GameServer([None, None], f"{map_name}.tmx")
+            put_pawns_on_heal(game)
+            healed = legacy_pawns_on_heal(game.board)
+            assert game.board.pawns_on_effect("heal") == healed, map_name
+            results.append(play(game, args.turns, pawns_on_heal))
+        (scan_total, scan_end), (tiles_total, tiles_end) = results
+        print(
+            f"{map_name:<12}{len(healed):>7}"
+            f"{scan_end / args.turns * 1e6:>13.1f}us{tiles_end / args.turns * 1e6:>8.1f}us"
+            f"{args.turns / scan_total:>14.0f}{args.turns / tiles_total:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""This module contains a headless bot client, used to put load on the server.
+
+The bot speaks the same protocol as ``client.py`` (framed JSON, snapshots and
+deltas) but has no display: on its turn it selects one of its cards and a pawn,
+plays one of the ``possible_moves`` sent back by the server, and skips its turn
+when no card can move any pawn.
+
+The server puts the fields of the last message of a player in the state it
+sends to this player, so every message of the bot carries an increasing
+``seq``: the first state where ``seq`` is back is the answer to the message.
+
+Usage: ``python bot.py [-t TURNS] [--host HOST] [--port PORT]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import socket
+import time
+from typing import Any
+
+from game_constants.consts import PORT, STATE_ENCODINGS
+from network import HELLO, DeltaDecoder, MessageDecoder, encode_message
+
+log = logging.getLogger(__name__)
+
+PAWN_NAMES = ("Gork", "Nano", "Sylphe", "Poticha")
+"""Names of the pawns created by GameServer.init_game_elements"""
+
+
+class Bot:
+    """A player that chooses its actions at random among the legal ones."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = PORT,
+        max_turns: int | None = None,
+        timeout: float = 30.0,
+        seed: int | None = None,
+        encodings: tuple[str, ...] = STATE_ENCODINGS,
+    ) -> None:
+        """Initializes the bot.
+
+        Args:
+            host (str, optional): address of the server.
+            port (int, optional): port of the server.
+            max_turns (int, optional): number of turns to play before leaving,
+                None to play until the end of the game.
+            timeout (float, optional): seconds to wait for the server before giving up.
+            seed (int, optional): seed of the choices of the bot.
+            encodings (tuple[str, ...], optional): encodings of the game states
+                the bot reads, by preference.
+        """
+        self.host = host
+        self.port = port
+        self.max_turns = max_turns
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.encodings = encodings
+
+        self.sock: socket.socket | None = None
+        self.decoder = MessageDecoder()
+        self.delta_decoder = DeltaDecoder()
+        self.state: dict = {}
+        """Game state, as rebuilt from the snapshots and the deltas"""
+        self.resync_pending: bool = False
+        """A snapshot was asked, the deltas failing until it arrives are ignored"""
+        self.seq: int = 0
+        """Number of the last message sent"""
+
+        self.turns: int = 0
+        """Number of turns played (moves and skips)"""
+        self.skips: int = 0
+        self.turn_latencies: list[float] = []
+        """Seconds between the action ending a turn and the state it produced"""
+        self.bytes_received: int = 0
+        self.messages_received: int = 0
+
+    def connect(self) -> None:
+        """Connects to the server, retrying until it accepts the connection, and
+        gives it the encodings the bot reads."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self.sock = socket.create_connection((self.host, self.port))
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        self.sock.settimeout(self.timeout)
+        self.sock.sendall(encode_message({HELLO: {"encodings": list(self.encodings)}}))
+
+    def close(self) -> None:
+        """Closes the connection."""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def send(self, message: dict) -> None:
+        """Sends a message, numbered with the next ``seq``.
+
+        Args:
+            message (dict): message to send
+        """
+        self.seq += 1
+        message["seq"] = self.seq
+        self.sock.sendall(encode_message(message))
+
+    def receive(self) -> list[Any] | None:
+        """Waits for the next messages of the server.
+
+        Returns:
+            list[Any] | None: the decoded messages, None if the server closed
+            the connection
+        """
+        messages: list[Any] = []
+        while not messages:
+            nbytes = self.sock.recv_into(self.decoder.buffer)
+            if not nbytes:
+                return None
+            self.bytes_received += nbytes
+            messages = self.decoder.feed_received(nbytes)
+        self.messages_received += len(messages)
+        return messages
+
+    def wait_start(self) -> bool:
+        """Waits in the lobby until the game starts.
+
+        Returns:
+            bool: False if the server closed the connection
+        """
+        while True:
+            messages = self.receive()
+            if messages is None:
+                return False
+            for message in messages:
+                if isinstance(message, dict) and message.get("start"):
+                    return True
+
+    def update_state(self) -> bool:
+        """Receives the next messages and applies them to the state.
+
+        Returns:
+            bool: False if the game ended (connection closed)
+        """
+        messages = self.receive()
+        if messages is None:
+            return False
+        for message in messages:
+            if not isinstance(message, dict):
+                # -1 : another player left the game
+                return False
+            if self.delta_decoder.apply(message) is None:
+                if not self.resync_pending:
+                    self.resync_pending = True
+                    self.send({"resync": True})
+            elif message["type"] == "snapshot":
+                self.resync_pending = False
+        self.state = self.delta_decoder.state
+        return True
+
+    def wait_answer(self) -> bool:
+        """Waits for the state answering the last message sent.
+
+        Returns:
+            bool: False if the game ended
+        """
+        while self.state.get("seq") != self.seq:
+            if not self.update_state():
+                return False
+        return True
+
+    def is_my_turn(self) -> bool:
+        """Returns whether the bot has to play."""
+        return (
+            self.delta_decoder.version > 0
+            and self.state["current_player"] == self.state["player_number"]
+        )
+
+    def play_turn(self) -> bool:
+        """Plays a move, or skips the turn if there is no legal move.
+
+        Returns:
+            bool: False if the game ended
+        """
+        pawns = [
+            (y, x) for name, _, y, x in self.state["elements"] if name in PAWN_NAMES
+        ]
+        choices = [(card, pawn) for card in self.state["cards"] for pawn in pawns]
+        self.random.shuffle(choices)
+
+        for card, (pawn_y, pawn_x) in choices:
+            self.send(
+                {
+                    "skip": False,
+                    "selected_card": card,
+                    "selected_cell": [pawn_y, pawn_x],
+                }
+            )
+            if not self.wait_answer():
+                return False
+            if self.state["possible_moves"]:
+                move_y, move_x = self.random.choice(self.state["possible_moves"])
+                return self.end_turn(
+                    {
+                        "skip": False,
+                        "selected_card": card,
+                        "selected_cell": [move_y, move_x],
+                    }
+                )
+
+        self.skips += 1
+        return self.end_turn(
+            {"skip": True, "selected_card": None, "selected_cell": [None, None]}
+        )
+
+    def end_turn(self, message: dict) -> bool:
+        """Sends the action ending the turn and measures the server's answer.
+
+        Args:
+            message (dict): the move or the skip
+
+        Returns:
+            bool: False if the game ended
+        """
+        start = time.perf_counter()
+        self.send(message)
+        if not self.wait_answer():
+            return False
+        self.turn_latencies.append(time.perf_counter() - start)
+        self.turns += 1
+        return True
+
+    def run(self) -> None:
+        """Joins a game and plays until the game ends or ``max_turns`` is reached."""
+        self.connect()
+        try:
+            if not self.wait_start():
+                return
+            while self.max_turns is None or self.turns < self.max_turns:
+                if self.is_my_turn():
+                    if not self.play_turn():
+                        break
+                elif not self.update_state():
+                    break
+        finally:
+            self.close()
+        log.info(
+            "Bot %s played %d turns (%d skipped)",
+            self.state.get("player_number"),
+            self.turns,
+            self.skips,
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument(
+        "-t",
+        "--turns",
+        type=int,
+        help="Turns to play before leaving. Default is until the end of the game",
+        default=None,
+    )
+    parser.add_argument(
+        "-e",
+        "--encoding",
+        choices=["binary", "json"],
+        help="Encoding of the game states. Default is the first of STATE_ENCODINGS",
+        default=STATE_ENCODINGS[0],
+    )
+    args = parser.parse_args()
+
+    Bot(args.host, args.port, args.turns, encodings=(args.encoding,)).run()
@@ -5,9 +5,16 @@ from __future__ import annotations
 import random
 import logging
 import math
-import pytmx
 import pygame
-from game_constants.consts import GRAPHICAL_TILE_SIZE
+from pytmx.util_pygame import pygame_image_loader
+from game_constants.consts import (
+    CHUNK_SIZE,
+    GRAPHICAL_TILE_SIZE,
+    HIGHLIGHT_ATTACK_COLOR,
+    HIGHLIGHT_MOVE_COLOR,
+)
+from highlights import HighlightSet
+from map_cache import load_map
 from .cell import Cell
 from .map_object import Tile, AnimatedTile, MapKey, Pawn, Enemy, MapCard
 from .camera import Camera
@@ -52,6 +59,18 @@ class Board(pygame.sprite.Sprite):
         self.camera = camera
         self.rect = rect
         self.healing_tiles = []
+        self.effect_tiles: dict[str, dict[tuple[int, int], int]] = {}
+        """Tiles with an effect at the end of the turns ("heal"): value of the
+        effect by cell (y, x), in the order of the cells"""
+        self.entities: dict[str, Pawn | Enemy] = {}
+        """Pawns and enemies of the game, by name"""
+        self.element_positions: dict[str, tuple[int, int]] = {}
+        """Position (y, x) of each pawn and enemy on the board, by name"""
+        self.highlights = HighlightSet()
+        """Highlighted cells, drawn over the cells"""
+        self.chunks: dict[tuple[int, int], pygame.Surface] | None = None
+        """Pre-rendered static layers, by chunk coordinates (x, y), None when
+        they need to be rendered again"""
 
     def get_coordinates_object(self, game_object: object) -> tuple[int, int]:
         """This function is used to get the coordinates of an object on the board.
@@ -99,12 +118,8 @@ class Board(pygame.sprite.Sprite):
             move for move in all_possible_actions if move not in possible_attacks
         ]
 
-        for move_y, move_x in possible_moves:
-            cell = self.cells[move_y][move_x]
-            cell.highlight()
-        for move_y, move_x in possible_attacks:
-            cell = self.cells[move_y][move_x]
-            cell.highlight((255, 0, 0))
+        self.highlights.highlight(possible_moves)
+        self.highlights.highlight(possible_attacks, attack=True)
 
         return all_possible_actions
 
@@ -358,16 +373,84 @@ class Board(pygame.sprite.Sprite):
                 # The player is dead, remove it from the board
                 closest_player.remove_object()
 
+    def bake_chunks(self) -> None:
+        """This function is used to pre-render the static layers in chunks.
+
+        For each cell, the layers under its first animated tile never change:
+        they are drawn once on the surface of the chunk containing the cell, and
+        the cell only draws its other layers.
+        """
+        chunk_pixels = CHUNK_SIZE * GRAPHICAL_TILE_SIZE
+        self.chunks = {}
+        for row in self.cells:
+            for cell in row:
+                cell.baked_layers = 0
+                for tile in cell.layers:
+                    if isinstance(tile, AnimatedTile):
+                        break
+                    cell.baked_layers += 1
+                if not cell.baked_layers:
+                    continue
+
+                chunk_coordinates = (cell.x // CHUNK_SIZE, cell.y // CHUNK_SIZE)
+                chunk = self.chunks.get(chunk_coordinates)
+                if chunk is None:
+                    # opaque: the screen is cleared in black before drawing
+                    chunk = pygame.Surface((chunk_pixels, chunk_pixels))
+                    if pygame.display.get_surface():
+                        chunk = chunk.convert()
+                    self.chunks[chunk_coordinates] = chunk
+                # the chunk is drawn like a screen with its camera on its corner
+                chunk_origin = (
+                    chunk_coordinates[0] * chunk_pixels,
+                    chunk_coordinates[1] * chunk_pixels,
+                )
+                for tile in cell.layers[: cell.baked_layers]:
+                    tile.draw(
+                        cell.x * GRAPHICAL_TILE_SIZE,
+                        cell.y * GRAPHICAL_TILE_SIZE,
+                        chunk,
+                        chunk_origin,
+                    )
+
     def draw(
         self, surface: pygame.surface.Surface  # pylint: disable=c-extension-no-member
     ) -> None:
         """This function is used to draw the board and the cells.
 
+        Only the chunks and the cells seen by the camera are drawn.
+
         Args:
             surface (pygame.surface.Surface): represents the surface
         """
-        for row in self.cells:
-            for cell in row:
+        if self.chunks is None:
+            self.bake_chunks()
+
+        camera_x, camera_y = int(self.camera.x), int(self.camera.y)
+        first_x = max(0, camera_x // GRAPHICAL_TILE_SIZE)
+        first_y = max(0, camera_y // GRAPHICAL_TILE_SIZE)
+        last_x = min(
+            self.width, (camera_x + surface.get_width()) // GRAPHICAL_TILE_SIZE + 1
+        )
+        last_y = min(
+            self.height, (camera_y + surface.get_height()) // GRAPHICAL_TILE_SIZE + 1
+        )
+
+        chunk_pixels = CHUNK_SIZE * GRAPHICAL_TILE_SIZE
+        for chunk_y in range(first_y // CHUNK_SIZE, (last_y - 1) // CHUNK_SIZE + 1):
+            for chunk_x in range(first_x // CHUNK_SIZE, (last_x - 1) // CHUNK_SIZE + 1):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk:
+                    surface.blit(
+                        chunk,
+                        (
+                            chunk_x * chunk_pixels - camera_x,
+                            chunk_y * chunk_pixels - camera_y,
+                        ),
+                    )
+
+        for row in self.cells[first_y:last_y]:
+            for cell in row[first_x:last_x]:
                 cell.draw(surface, self.camera)
                 if cell.rect:
                     pygame.draw.rect(
@@ -382,6 +465,26 @@ class Board(pygame.sprite.Sprite):
                         1,
                     )
 
+        # the highlights are drawn over the cells and the elements
+        for cells, color in (
+            (self.highlights.moves, HIGHLIGHT_MOVE_COLOR),
+            (self.highlights.attacks, HIGHLIGHT_ATTACK_COLOR),
+        ):
+            for y, x in cells:
+                if first_y <= y < last_y and first_x <= x < last_x:
+                    pygame.draw.rect(
+                        surface,
+                        color,
+                        (
+                            x * GRAPHICAL_TILE_SIZE - self.camera.x,
+                            y * GRAPHICAL_TILE_SIZE - self.camera.y,
+                            GRAPHICAL_TILE_SIZE,
+                            GRAPHICAL_TILE_SIZE,
+                        ),
+                        2,
+                        10,
+                    )
+
     def tick(self, frame_id: int) -> None:
         """Updates the boards depending on the frame id.
 
@@ -402,6 +505,7 @@ class Board(pygame.sprite.Sprite):
         for row in self.cells:
             for cell in row:
                 cell.resize(width, height)
+        self.chunks = None
 
     def _load_from_tmx(
         self,
@@ -416,7 +520,7 @@ class Board(pygame.sprite.Sprite):
             tmx_file (str): represents the tmx file
         """
 
-        tmx_data = pytmx.load_pygame(tmx_file)
+        tmx_data = load_map(tmx_file, pygame_image_loader)
         tmx_gids_to_og = tmx_data.tiledgidmap
         og_gids_to_tmx = {v: k for k, v in tmx_data.tiledgidmap.items()}
 
@@ -426,13 +530,6 @@ class Board(pygame.sprite.Sprite):
         self.tileheight = tmx_data.tileheight
         self.rect = rect
 
-        # catalogue animated tiles
-        props_catalogue = {}
-        for gid, props in tmx_data.tile_properties.items():
-            props_catalogue[gid] = props
-
-        # log.debug(sorted(props_catalogue.items()))
-
         # Create cells
         self.cells = [
             [
@@ -443,29 +540,23 @@ class Board(pygame.sprite.Sprite):
         ]
 
         # layers to draw under the game objects
-        layers = []
-        layers.append(tmx_data.get_layer_by_name("terrain"))
-        layers.append(tmx_data.get_layer_by_name("environment"))
-        layers.append(tmx_data.get_layer_by_name("Fake loot"))
-
-        # tmx_data.visible_layers
-
-        for layer in layers:
-            if not isinstance(layer, pytmx.TiledTileLayer):
-                log.error("Layer %s is not a tile layer", layer.name)
-                continue
-            for x, y, gid in layer:
-                if gid in props_catalogue and props_catalogue[gid]["frames"]:
+        for layer in ("terrain", "environment", "Fake loot"):
+            gids = tmx_data.gids(layer)
+            walkable = tmx_data.walkable(layer)
+            for index, gid in enumerate(gids):
+                y, x = divmod(index, self.width)
+                animation = tmx_data.get_tile_properties_by_gid(gid)["frames"]
+                if animation:
                     # animated tile
                     frames = []
                     frame_durations = []
-                    for frame in props_catalogue[gid]["frames"]:
+                    for frame in animation:
                         frames.append(tmx_data.get_tile_image_by_gid(frame.gid))
                         frame_durations.append(frame.duration)
 
                     self.cells[y][x].add_layer(
                         AnimatedTile(
-                            props_catalogue[gid].get("walkable", True),
+                            bool(walkable[index]),
                             frames,
                             frame_durations,
                         )
@@ -474,11 +565,7 @@ class Board(pygame.sprite.Sprite):
                     # normal tile
                     self.cells[y][x].add_layer(
                         Tile(
-                            (
-                                props_catalogue[gid].get("walkable", True)
-                                if gid in props_catalogue
-                                else True
-                            ),
+                            bool(walkable[index]),
                             tmx_data.get_tile_image_by_gid(gid),
                         )
                     )
@@ -621,60 +708,134 @@ class Board(pygame.sprite.Sprite):
                                 cell.game_object = new_map_key
 
         # get the tile props ("heal") for the layer "campfire"
-        layer = tmx_data.get_layer_by_name("campfire")
-        for x, y, tmx_gid in layer:
-            if tmx_gid != 0:
-                self.cells[y][x].heal_value = tmx_data.get_tile_properties_by_gid(
-                    tmx_gid
-                )["heal"]
-                self.healing_tiles.append((x, y))
+        heal_tiles = {}
+        for x, y, tmx_gid in tmx_data.objects("campfire"):
+            properties = tmx_data.get_tile_properties_by_gid(tmx_gid)
+            self.cells[y][x].heal_value = properties["heal"]
+            self.healing_tiles.append((x, y))
+            heal_tiles[(y, x)] = properties["heal"]
+        self.effect_tiles["heal"] = dict(sorted(heal_tiles.items()))
 
         # resize cells
         for row in self.cells:
             for cell in row:
                 cell.resize(GRAPHICAL_TILE_SIZE, GRAPHICAL_TILE_SIZE)
 
+    def pawns_on_effect(self, effect: str) -> list[tuple[Pawn, int]]:
+        """This function is used to find the pawns standing on the tiles of an
+        effect, only the cells of these tiles are visited.
+
+        Args:
+            effect (str): name of the effect ("heal")
+
+        Returns:
+            list[tuple[Pawn, int]]: the pawns with the value of the effect of
+            their tile, in the order of the cells
+        """
+        pawns = []
+        for (y, x), value in self.effect_tiles.get(effect, {}).items():
+            game_object = self.cells[y][x].game_object
+            if isinstance(game_object, Pawn):
+                pawns.append((game_object, value))
+        return pawns
+
+    def place_element(self, entity: Pawn | Enemy, y: int, x: int) -> None:
+        """This function is used to put a pawn or an enemy on the board, the
+        updates of the server then find it by its name.
+
+        Args:
+            entity (Pawn | Enemy): represents the pawn or the enemy
+            y (int): represents the row of the cell
+            x (int): represents the column of the cell
+        """
+        self.entities[entity.name] = entity
+        self.cells[y][x].add_pawn(entity)
+        self.element_positions[entity.name] = (y, x)
+
+    def _take_element(self, name: str) -> bool:
+        """Takes an element off its cell.
+
+        Args:
+            name (str): name of the element
+
+        Returns:
+            bool: False if the cell of the element holds something else
+        """
+        position = self.element_positions.pop(name, None)
+        if position is None:
+            return True
+        cell = self.cells[position[0]][position[1]]
+        if cell.game_object is not self.entities[name]:
+            log.warning("Element %s is not at %s", name, position)
+            return False
+        cell.remove_object()
+        return True
+
+    def _put_element(self, name: str, health: int, y: int, x: int) -> None:
+        entity = self.entities.get(name)
+        if entity is None:
+            # no sprite for it on this client
+            log.debug("Unknown element %s", name)
+            return
+        entity.health = health
+        if isinstance(entity, Enemy):
+            self.cells[y][x].add_enemy(entity)
+        else:
+            self.cells[y][x].add_pawn(entity)
+        self.element_positions[name] = (y, x)
+
     def update_elements(
         self, elements: list[list[str, int, int, int]], possible_moves: list[int, int]
     ) -> None:
-        """This function is used to update the elements of the board.
+        """This function is used to update the elements of the board from a
+        snapshot of the server.
+
+        Only the cells of the elements are updated. The elements missing from the snapshot are taken off the board.
 
         Args:
-            elements (list): represents the elements
+            elements (list): represents the elements [name, health, y, x]
+            possible_moves (list): represents the cells to highlight
         """
-        for row in self.cells:
-            for cell in row:
-                if cell.game_object:
-                    found: bool = False
-                    for element in elements:
-                        if isinstance(cell.game_object, Pawn):
-                            if cell.game_object.name == element[0]:
-                                pawn = cell.game_object
-                                cell.remove_object()
-                                pawn.health = element[1]
-                                self.cells[element[2]][element[3]].add_pawn(pawn)
-                                found = True
-                        elif isinstance(cell.game_object, Enemy):
-                            if cell.game_object.name == element[0]:
-                                enemy = cell.game_object
-                                cell.remove_object()
-                                enemy.health = element[1]
-                                self.cells[element[2]][element[3]].add_enemy(enemy)
-                                found = True
-                    if not found:
-                        if isinstance(cell.game_object, Pawn) or isinstance(
-                            cell.game_object, Enemy
-                        ):
-                            cell.remove_object()
+        for name in list(self.element_positions):
+            position = self.element_positions.pop(name)
+            cell = self.cells[position[0]][position[1]]
+            if cell.game_object is self.entities[name]:
+                cell.remove_object()
+        for name, health, y, x in elements:
+            self._put_element(name, health, y, x)
+        self.highlights.clear()
+        self.highlights.highlight(possible_moves or [])
 
-        for row in self.cells:
-            for cell in row:
-                cell.unhighlight()
+    def apply_delta(self, delta: dict) -> bool:
+        """This function is used to apply the changes received from the server.
+
+        Only the cells of the elements and highlights that changed are updated.
+
+        Args:
+            delta (dict): delta message (see network.delta)
 
-        if possible_moves:
-            for move_y, move_x in possible_moves:
-                cell = self.cells[move_y][move_x]
-                cell.highlight()
+        Returns:
+            bool: False if an element isn't where the board expects it (resync
+            needed)
+        """
+        elements = delta["sections"].get("elements")
+        if elements:
+            for name in elements["del"]:
+                if not self._take_element(name):
+                    return False
+
+            # take every changed element off the board before placing them,
+            # an element can move to the previous cell of another one
+            for name, *_ in elements["set"]:
+                if not self._take_element(name):
+                    return False
+            for name, health, new_y, new_x in elements["set"]:
+                self._put_element(name, health, new_y, new_x)
+
+        if delta["highlights"]:
+            self.highlights.unhighlight(delta["highlights"]["del"])
+            self.highlights.highlight(delta["highlights"]["add"])
+        return True
 
     # Classmethods
 
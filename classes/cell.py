@@ -15,8 +15,6 @@ class Cell:  # pylint: disable=too-many-instance-attributes
     It can contain a game object, which can be used to represent a player, an enemy, an item, etc.
     """
 
-    cell_mapping: dict[tuple[int, int], Cell] = {}
-
     def __init__(
         self, x: int, y: int, width: int, height: int, rect: bool = False
     ) -> None:
@@ -29,19 +27,17 @@ class Cell:  # pylint: disable=too-many-instance-attributes
             height (int): Height of the cell.
             rect (bool, optional): Whether the cell is a rectangle or not. Defaults to False.
         """
-        self.cell_mapping[(x, y)] = self
-
         self.x = x
         self.y = y
         self.rect = rect
-        self.highlighted = False
         self.layers: list[Tile | AnimatedTile] = []
         self.width = width
         self.height = height
         self.game_object = None
-        self.highlight_color = (0, 255, 0)
         self._heal_value = 0
         self.is_heal_cell = False
+        self.baked_layers = 0
+        """Number of layers drawn in the pre-rendered chunks of the board"""
 
     @property
     def heal_value(self) -> int:
@@ -78,7 +74,7 @@ class Cell:  # pylint: disable=too-many-instance-attributes
             surface (pygame.surface.Surface): The surface to draw the cell on.
             camera (Camera): The camera instance.
         """
-        for tile in self.layers:
+        for tile in self.layers[self.baked_layers :]:
             tile.draw(
                 self.x * GRAPHICAL_TILE_SIZE,
                 self.y * GRAPHICAL_TILE_SIZE,
@@ -93,16 +89,6 @@ class Cell:  # pylint: disable=too-many-instance-attributes
                 camera,
             )
 
-        if self.highlighted:
-            # Draw a green rectangle around the cell
-            highlight_rect = pygame.Rect(
-                self.x * GRAPHICAL_TILE_SIZE - camera.x,
-                self.y * GRAPHICAL_TILE_SIZE - camera.y,
-                GRAPHICAL_TILE_SIZE,
-                GRAPHICAL_TILE_SIZE,
-            )
-            pygame.draw.rect(surface, self.highlight_color, highlight_rect, 2, 10)
-
     def tick(self, frame_id: int) -> None:
         """Ticks the cell.
 
@@ -168,18 +154,6 @@ class Cell:  # pylint: disable=too-many-instance-attributes
         """
         return self.game_object is None
 
-    def highlight(
-        self,
-        color: tuple[int, int, int] = (0, 255, 0),
-    ) -> None:
-        """Highlights the cell."""
-        self.highlight_color = color
-        self.highlighted = True
-
-    def unhighlight(self) -> None:
-        """Unhighlights the cell."""
-        self.highlighted = False
-
     @property
     def walkable(self) -> bool:
         """Returns whether the cell is walkable or not.
@@ -2,6 +2,9 @@
 
 import pygame
 
+from event_log import EventLog
+from game_constants.consts import EVENT_LOG_SENT
+
 
 class LogEvent(pygame.sprite.Sprite):
     """This class is used to create the game info."""
@@ -17,71 +20,24 @@ class LogEvent(pygame.sprite.Sprite):
         super().__init__()
         self.font = pygame.font.Font(None, 36)
         self.color = (255, 255, 255)
-        self.list_log = [""]
         self.base_text_rect = (screen.get_width() - width - 40, space_from_top)
         self.base_y = screen.get_height()
         self.space_from_top = space_from_top
         self.width = width
         self.height = height
-        self.count_reset = 1
-        self.reset = False
-        self.reset_logfile("log_event.txt")
-
-    def read_logfile(self, log_file: str):
-        """Read the log file.
-
-        Args:
-            log_file (str): represents the path of the log file
-        """
-        with open(log_file, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-
-            if lines:
-                try:
-                    self.count_reset = int(lines[0].rstrip("\n"))
-                except ValueError:
-                    self.count_reset = 0
-
-            self.list_log = [line.rstrip("\n") for line in lines[1:]]
-
-    def write_logfile(self, log_file: str, text: str):
-        """Write the text in the log file.
-
-        Args:
-            log_file (str): represents the path of the log file
-            text (str): represents the text to write in the log file
-        """
-        with open(log_file, "r+", encoding="utf-8") as file:
-            lines = file.readlines()
-
-            if lines:
-                try:
-                    first_line_number = int(lines[0].strip()) + 1
-                    lines[0] = f"{first_line_number}\n"
-                except ValueError:
-                    pass
-
-            text_written = False
-            for i in range(1, len(lines)):
-                if not lines[i].strip():
-                    lines[i] = text + "\n"
-                    text_written = True
-                    break
-
-            if not text_written:
-                lines.append(text + "\n")
+        self.events = EventLog()
+        """Events received from the server (or pushed by the local game)"""
+        self._rendered: dict[int, pygame.Surface] = {}
+        """Rendered text of the shown events, by event id"""
 
-            file.seek(0)
-            file.writelines(lines)
-
-    def reset_logfile(self, log_file: str):
-        """This function is used to reset the log file.
+    def add_event(self, text: str, kind: str = "info") -> None:
+        """Adds an event to the log.
 
         Args:
-            log_file (str): represents the path of the log file
+            text (str): represents the text of the event
+            kind (str, optional): represents the type of the event
         """
-        with open(log_file, "w", encoding="utf-8") as file:
-            file.write("0")
+        self.events.push(text, kind)
 
     def draw_text(self, screen: pygame.surface):
         """This function is used to draw the game info.
@@ -89,22 +45,18 @@ class LogEvent(pygame.sprite.Sprite):
         Args:
             screen (pygame.surface): represents the screen
         """
-        self.list_log = [""]
-        self.read_logfile("log_event.txt")
-
-        while len(self.list_log) > 5:
-            self.list_log.pop(0)
-
-        # print(f"Liste a afficher : {self.list_log}")
-        for i, log in enumerate(self.list_log):
-            text = self.font.render(log, True, (self.color))
+        shown = self.events.last(EVENT_LOG_SENT)
+        # the texts are only rendered once
+        self._rendered = {
+            event[0]: self._rendered.get(event[0])
+            or self.font.render(event[2], True, (self.color))
+            for event in shown
+        }
+
+        for i, text in enumerate(self._rendered.values()):
             text_rect = text.get_rect()
             text_rect.topleft = (
                 self.base_text_rect[0],
                 self.base_text_rect[1] + i * text_rect.height,
             )
             screen.blit(text, text_rect)
-
-        # print(text_rect.y)
-        # if text_rect.y > self.space_from_top + self.height:
-        #     self.list_log.pop(0)
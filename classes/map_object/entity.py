@@ -5,6 +5,7 @@ import logging
 
 import pygame
 
+from event_log import EventLog
 from game_constants.consts import GRAPHICAL_TILE_SIZE, SOUND
 from .object_bases import ObjectBase
 
@@ -20,6 +21,8 @@ class Entity(ObjectBase):
         "Grass": {"Fire": -1, "Water": 1, "Grass": 0, "Neutral": 0},
         "Neutral": {"Fire": 0, "Water": 0, "Grass": 0, "Neutral": 0},
     }
+    event_log: EventLog | None = None
+    """Event log of the game the entity belongs to"""
 
     def __init__(
         self,
@@ -56,7 +59,7 @@ class Entity(ObjectBase):
             damage_sound.play()
         if self.health <= 0:
             log.info("%s has been defeated!", self.name)
-            self.write_logfile("log_event.txt", f"{self.name} nous a quitté :(")
+            self.log_event(f"{self.name} nous a quitté :(", "death")
             if SOUND:
                 death_sound = pygame.mixer.Sound("sounds/Death.mp3")
                 death_sound.play()
@@ -76,7 +79,7 @@ class Entity(ObjectBase):
         total_damage = max(
             self.ELEMENT_ADVANTAGES[self.element][target.element] + self.attack, 0
         )
-        self.write_logfile("log_event.txt", f"{self.name} a attaqué {target.name} !")
+        self.log_event(f"{self.name} a attaqué {target.name} !", "attack")
 
         return target.take_damage(total_damage)
 
@@ -101,26 +104,12 @@ class Entity(ObjectBase):
             )
             surface.blit(self.healthbar, (dest_x, dest_y - 10))
 
-    def write_logfile(self, log_file: str, text: str):
-        with open(log_file, "r+") as file:
-            lines = file.readlines()
-
-            if lines:
-                try:
-                    first_line_number = int(lines[0].strip()) + 1
-                    lines[0] = f"{first_line_number}\n"
-                except ValueError:
-                    pass
-
-            text_written = False
-            for i in range(1, len(lines)):
-                if not lines[i].strip():
-                    lines[i] = text + "\n"
-                    text_written = True
-                    break
-
-            if not text_written:
-                lines.append(text + "\n")
-
-            file.seek(0)
-            file.writelines(lines)
+    def log_event(self, text: str, kind: str) -> None:
+        """Adds an event to the event log of the game, if the entity has one.
+
+        Args:
+            text (str): text of the event
+            kind (str): type of the event
+        """
+        if self.event_log is not None:
+            self.event_log.push(text, kind)
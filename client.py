@@ -1,6 +1,5 @@
 """ File containing the main loop of the game """
 
-import json
 import logging
 import socket
 from time import sleep
@@ -11,7 +10,8 @@ from classes import Board, Camera, Card, Enemy, Key, Pawn, Tab
 from classes.card import *  # pylint: disable=unused-wildcard-import,wildcard-import
 from classes.key import *  # pylint: disable=unused-wildcard-import,wildcard-import
 from classes.map_object import MapCard, MapKey
-from game_constants.consts import GRAPHICAL_TILE_SIZE, TICK_RATE, PAYLOAD_SIZE
+from game_constants.consts import GRAPHICAL_TILE_SIZE, TICK_RATE
+from network import Connection, DeltaDecoder, NetworkReader
 from moves import *  # Import all the moves # pylint: disable=unused-wildcard-import,wildcard-import
 
 log = logging.getLogger(__name__)
@@ -26,9 +26,8 @@ class Client:
     This class is used to create the main loop of the game.
     """
 
-    def __init__(self, sock: socket.socket, fog=False):
-        self.sock: socket.socket = sock
-        self.sock.setblocking(False)
+    def __init__(self, connection: Connection, fog=False):
+        self.connection: Connection = connection
         self.data_out: dict = {
             "skip": False,
             "selected_card": None,  # assigned with the card_selected variable in the main loop
@@ -36,6 +35,14 @@ class Client:
         }
         self.data_in: dict = {}
         """Data received from the server"""
+        self.delta_decoder = DeltaDecoder()
+        self.updates: list[dict] = []
+        """Messages applied to data_in but not to the board yet"""
+        self.resync_pending: bool = False
+        """A snapshot was asked, the deltas failing until it arrives are ignored"""
+        self.reader = NetworkReader(connection)
+        """Receives and decodes the messages of the server in a thread"""
+        self.reader.start()
 
         pygame.init()  # pylint: disable=no-member
 
@@ -78,39 +85,76 @@ class Client:
             bool: False if the send fail
         """
         try:
-            data: str = json.dumps(self.data_out)
-            self.sock.sendall(data.encode())
-            log.debug("Sent: %s", data)
+            self.connection.send_message(self.data_out)
+            log.debug("Sent: %s", self.data_out)
             return True
-        except BlockingIOError:
+        except OSError:
             return False
 
     def recv_data(self, blocking=False) -> bool:
-        """This method receive data from the server and store it in the self.data_in attribute
+        """This method applies the messages received by the network thread to the
+        self.data_in attribute, the board is updated by apply_updates
 
         params:
-            blocking (bool): if the receive should be blocking or not
+            blocking (bool): if it should wait for a game state or not
 
         Returns:
-            bool: False if the receive fail
+            bool: False if no new game state arrived
         """
-        self.sock.setblocking(blocking)
-        try:
-            data: bytes = self.sock.recv(PAYLOAD_SIZE)
-            if not data:
-                return False
-            self.data_in = json.loads(data.decode())
-            log.debug("Received: %s", self.data_in)
-            self.sock.setblocking(False)
-            return True
-        except BlockingIOError:
-            return False
+        received: bool = False
+        while not received:
+            messages = self.reader.get_messages(block=blocking)
+            if not messages:
+                break
+            # snapshots and deltas must be applied in order
+            for message in messages:
+                log.debug("Received: %s", message)
+                if self.delta_decoder.apply(message) is None:
+                    self.request_resync()
+                    continue
+                if message["type"] == "snapshot":
+                    self.resync_pending = False
+                self.updates.append(message)
+                received = True
+        self.data_in = self.delta_decoder.state
+        return received
+
+    def request_resync(self):
+        """Asks the server for a full snapshot of the game state, once until the
+        snapshot arrives."""
+        self.updates.clear()
+        if self.resync_pending:
+            return
+        self.resync_pending = True
+        self.connection.send_message({"resync": True})
+
+    def apply_updates(self):
+        """Applies the received messages to the board."""
+        if not self.updates:
+            return
+        if any(message["type"] == "snapshot" for message in self.updates):
+            # data_in already holds the latest state, including the next deltas
+            self.board.update_elements(
+                self.data_in["elements"], self.data_in["possible_moves"]
+            )
+        else:
+            for message in self.updates:
+                if not self.board.apply_delta(message):
+                    self.request_resync()
+                    break
+        # the HUD keeps the events, the server only sends the last ones
+        self.tab.log_event.events.extend(self.data_in.get("events", []))
+        self.updates.clear()
+
+    def close(self):
+        """This function is used to stop the network thread and close the connection."""
+        self.reader.close()
 
     def end_game(self):
         """
         This function is used to end the game.
         """
-        self.sock.close()
+        self.close()
         font = pygame.font.SysFont("arial", 100)
         text = font.render("You Win", True, (0, 255, 0))
         text_rect = text.get_rect()
@@ -299,11 +343,11 @@ class Client:
 
         for i, pawn in enumerate(self.list_pawns):
             y, x = pawn_positions[mapchoose][i]
-            self.board.cells[y][x].add_pawn(pawn)
+            self.board.place_element(pawn, y, x)
 
         for i, enemy in enumerate(self.list_enemies):
             y, x = enemy_positions[mapchoose][i]
-            self.board.cells[y][x].add_pawn(enemy)
+            self.board.place_element(enemy, y, x)
 
         self.init_cards_slots()
         self.init_key_slots()
@@ -350,39 +394,36 @@ class Client:
             card_right_2,
             card_supreme,
         ]
-
-        for i, card in enumerate(self.data_in["cards"]):
-            for c in self.card_list:
-                if c.get_name == card:
-                    self.group_slots_card[i].add_item(c)
-                    break
+        self.cards_by_name: dict[str, Card] = {
+            card.get_name: card for card in self.card_list
+        }
+        self.shown_cards: list[str] | None = None
+        """Names of the cards in the slots"""
 
         # pylint: enable=attribute-defined-outside-init
+        self.update_cards()
 
     def update_cards(self):
-        """This function is used to update the cards."""
-        for i in range(4):
-            self.group_slots_card[i].reset_item()
-        for i, card in enumerate(self.data_in["cards"]):
-            for c in self.card_list:
-                if c.get_name == card:
-                    self.group_slots_card[i].add_item(c)
-                    break
+        """This function is used to update the card slots when the cards changed."""
+        cards = self.data_in["cards"]
+        if cards == self.shown_cards:
+            return
+        self.shown_cards = list(cards)
+        for i, slot in enumerate(self.group_slots_card):
+            slot.reset_item()
+            if i < len(cards) and cards[i] in self.cards_by_name:
+                slot.add_item(self.cards_by_name[cards[i]])
 
     def update_keys(self):
-        """This function is used to update the keys."""
-        for i in range(4):
-            self.group_slots_key[i].reset_item()
-        for i, key in enumerate(self.data_in["keys"]):
-            match key:
-                case "red key":
-                    self.group_slots_key[i].add_item(self.red_key)
-                case "blue key":
-                    self.group_slots_key[i].add_item(self.blue_key)
-                case "green key":
-                    self.group_slots_key[i].add_item(self.green_key)
-                case "yellow key":
-                    self.group_slots_key[i].add_item(self.yellow_key)
+        """This function is used to update the key slots when the keys changed."""
+        keys = self.data_in["keys"]
+        if keys == self.shown_keys:
+            return
+        self.shown_keys = list(keys)
+        for i, slot in enumerate(self.group_slots_key):
+            slot.reset_item()
+            if i < len(keys) and keys[i] in self.keys_by_name:
+                slot.add_item(self.keys_by_name[keys[i]])
 
     def init_key_slots(self):
         """This function is used to initialize the key slots."""
@@ -409,6 +450,16 @@ class Client:
         self.yellow_key = Key(
             "images/yellow key.png", key_slot_width, key_slot_height, "yellow key"
         )
+        # pylint: disable=attribute-defined-outside-init
+        self.keys_by_name: dict[str, Key] = {
+            "red key": self.red_key,
+            "blue key": self.blue_key,
+            "green key": self.green_key,
+            "yellow key": self.yellow_key,
+        }
+        self.shown_keys: list[str] | None = None
+        """Names of the keys in the slots"""
+        # pylint: enable=attribute-defined-outside-init
 
     def add_key_slot(self, key: Key):
         """This function is used to add a key slot.
@@ -535,9 +586,7 @@ class Client:
 
     def unhilight(self):
         """This function is used to unhighlight the cells."""
-        for row in self.board.cells:
-            for cell in row:
-                cell.unhighlight()
+        self.board.highlights.clear()
 
     def get_coord_pawn(self, pawn: Pawn):
         """This function is used to get the coordinates of the pawn.
@@ -577,6 +626,16 @@ class Client:
 
         return card_selected
 
+    def update_current_player(self):
+        """This function is used to show whose turn it is in the tab."""
+        if self.data_in["current_player"] == self.player_number:
+            self.tab.game_info.current_player = "C'est votre tour"
+
+        else:
+            self.tab.game_info.current_player = (
+                f" Tour du joueur {self.data_in['current_player'] + 1} "
+            )
+
     def run(self):
         """This function is used to run the game."""
 
@@ -590,14 +649,15 @@ class Client:
         while True:
             self.recv_data()
 
-            # Update the map
-            self.board.update_elements(
-                self.data_in["elements"], self.data_in["possible_moves"]
-            )
+            # Only the frames where a game state arrived update the game
+            if self.updates:
+                # Update the map with what changed
+                self.apply_updates()
 
-            # Update cards
-            self.update_cards()
-            self.update_keys()
+                # Update cards
+                self.update_cards()
+                self.update_keys()
+                self.update_current_player()
 
             # Managements of the frames
             self.clock.tick(TICK_RATE)
@@ -623,14 +683,6 @@ class Client:
                 self.end_game()
                 break
 
-            if self.data_in["current_player"] == self.player_number:
-                self.tab.game_info.current_player = "C'est votre tour"
-
-            else:
-                self.tab.game_info.current_player = (
-                    f" Tour du joueur {self.data_in['current_player'] + 1} "
-                )
-
             for event in pygame.event.get():
                 # TODO: client side event management
                 if event.type == pygame.QUIT:  # pylint: disable=no-member
@@ -736,8 +788,11 @@ if __name__ == "__main__":
 
     sock: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     sock.connect_ex(("127.0.0.1", 44440))
-    log.debug(sock.recv(PAYLOAD_SIZE).decode())
+    connection = Connection(sock)
+    connection.send_hello()
+    log.debug(connection.wait_message())
 
-    game = Client(sock)
+    game = Client(connection)
     game.run()
+    game.close()
     pygame.quit()
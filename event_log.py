@@ -0,0 +1,151 @@
+"""This file contains the event log of a game (attacks, deaths, pickups).
+
+The events are kept in memory in a bounded ring buffer: the server sends the
+last ones to the clients with the game state, and the clients keep them for
+the HUD. The events can also be appended to a file by a background thread, so
+the game never waits for the disk.
+
+An event is a list ``[id, kind, text]``, the ids of a log are increasing.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Iterator
+
+from game_constants.consts import EVENT_LOG_SIZE
+
+log = logging.getLogger(__name__)
+
+
+class FileSink:
+    """Appends the events to a file from a background thread."""
+
+    def __init__(self, path: str) -> None:
+        """Initializes the sink and starts its thread.
+
+        Args:
+            path (str): file to append the events to
+        """
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="event-log-sink", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, event: list) -> None:
+        """Queues an event to be written.
+
+        Args:
+            event (list): the event
+        """
+        self._queue.put(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {event[1]} {event[2]}")
+
+    def close(self) -> None:
+        """Writes the queued events and stops the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    return
+                file.write(line + "\n")
+                # write everything already queued before flushing
+                while not self._queue.empty():
+                    line = self._queue.get()
+                    if line is None:
+                        return
+                    file.write(line + "\n")
+                file.flush()
+
+
+_sinks: dict[str, FileSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_file_sink(path: str) -> FileSink:
+    """Returns the sink of a file, shared by all the games of the process.
+
+    Args:
+        path (str): file to append the events to
+
+    Returns:
+        FileSink: the sink of this file
+    """
+    with _sinks_lock:
+        if path not in _sinks:
+            _sinks[path] = FileSink(path)
+        return _sinks[path]
+
+
+class EventLog:
+    """Bounded ring buffer of the events of a game."""
+
+    def __init__(
+        self, capacity: int = EVENT_LOG_SIZE, sink: FileSink | None = None
+    ) -> None:
+        """Initializes the log.
+
+        Args:
+            capacity (int, optional): number of events kept, the oldest are dropped.
+            sink (FileSink, optional): where to also write the events.
+        """
+        self.events: deque[list] = deque(maxlen=capacity)
+        self.sink = sink
+        self.last_id: int = 0
+        """Id of the last event added"""
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[list]:
+        return iter(self.events)
+
+    def push(self, text: str, kind: str = "info") -> list:
+        """Adds a new event.
+
+        Args:
+            text (str): text shown to the players
+            kind (str, optional): type of the event ("attack", "death"...).
+
+        Returns:
+            list: the event
+        """
+        self.last_id += 1
+        event = [self.last_id, kind, text]
+        self.events.append(event)
+        log.debug("Event %s", event)
+        if self.sink:
+            self.sink.write(event)
+        return event
+
+    def extend(self, events: list[list]) -> None:
+        """Adds events received from the server, skipping the known ones.
+
+        Args:
+            events (list[list]): events, in the order of their ids
+        """
+        for event in events:
+            if event[0] > self.last_id:
+                self.last_id = event[0]
+                self.events.append(list(event))
+
+    def last(self, count: int) -> list[list]:
+        """Returns the most recent events.
+
+        Args:
+            count (int): maximum number of events
+
+        Returns:
+            list[list]: the events, from the oldest to the newest
+        """
+        start = max(0, len(self.events) - count)
+        return [self.events[index] for index in range(start, len(self.events))]
@@ -257,6 +257,9 @@ class Game:
         if not mapchoose == "map_courte.tmx":
             self.list_enemies.append(self.enemy4)
 
+        for entity in self.list_pawns + self.list_enemies:
+            entity.event_log = self.tab.log_event.events
+
         for i, pawn in enumerate(self.list_pawns):
             y, x = pawn_positions[mapchoose][i]
             self.board.cells[y][x].add_pawn(pawn)
@@ -412,14 +415,12 @@ class Game:
                     self.board.cells[new_y][new_x].game_object.card
                 )
                 # ex : Le joueur 1 a récupéré la carte croix
-                self.tab.log_event.write_logfile(
-                    "log_event.txt",
+                self.tab.log_event.add_event(
                     f"Le joueur {self.queue.queue[0].number} a récupéré la carte\
                         {self.board.cells[new_y][new_x].game_object.card.name}",
                 )
             else:
-                self.tab.log_event.write_logfile(
-                    "log_event.txt",
+                self.tab.log_event.add_event(
                     f"Le joueur {self.queue.queue[0].number} a déchiré la carte\
                         {self.board.cells[new_y][new_x].game_object.card.name} ",
                 )
@@ -428,8 +429,7 @@ class Game:
         if isinstance(self.board.cells[new_y][new_x].game_object, MapKey or Key):
             self.add_key_slot(self.board.cells[new_y][new_x].game_object.key)
             # ex : Le joueur 1 a récupéré la clé rouge
-            self.tab.log_event.write_logfile(
-                "log_event.txt",
+            self.tab.log_event.add_event(
                 f"Le joueur {self.queue.queue[0].number} a récupéré\
                     la clé {self.board.cells[new_y][new_x].game_object.key.name} ",
             )
@@ -474,9 +474,7 @@ class Game:
 
     def unhilight(self):
         """This function is used to unhighlight the cells."""
-        for row in self.board.cells:
-            for cell in row:
-                cell.unhighlight()
+        self.board.highlights.clear()
 
     def get_coord_pawn(self, pawn: Pawn):
         """This function is used to get the coordinates of the pawn.
@@ -567,31 +565,23 @@ class Game:
                 self.swap_player(self.queue)
 
                 # heal all the pawns that are on healing tiles
-                for row in self.board.cells:
-                    for cell in row:
-                        if cell.game_object and isinstance(cell.game_object, Pawn):
-                            if cell.is_heal_cell:
-                                old_health = cell.game_object.health
-                                cell.game_object.health = min(
-                                    cell.game_object.health + cell.heal_value, 100
-                                )  # maximum 100 HP
-                                if cell.game_object.health != old_health:
-                                    self.tab.log_event.write_logfile(
-                                        "log_event.txt",
-                                        f"{cell.game_object.name} a été \
-                                            soigné de {cell.heal_value} HP",
-                                    )
-                                if SOUND:
-                                    if cell.game_object.health != old_health:
-                                        heal_sound = pygame.mixer.Sound(
-                                            "sounds/heal.mp3"
-                                        )
-                                        if cell.heal_value >= 10:
-                                            heal_sound.play()
-                                        else:
-                                            heal_sound.set_volume(0.3)
-                                            heal_sound.play()
-                                    # TODO - spawn heart particles
+                for pawn, heal_value in self.board.pawns_on_effect("heal"):
+                    old_health = pawn.health
+                    pawn.health = min(pawn.health + heal_value, 100)  # maximum 100 HP
+                    if pawn.health != old_health:
+                        self.tab.log_event.add_event(
+                            f"{pawn.name} a été \
+                                            soigné de {heal_value} HP",
+                        )
+                    if SOUND:
+                        if pawn.health != old_health:
+                            heal_sound = pygame.mixer.Sound("sounds/heal.mp3")
+                            if heal_value >= 10:
+                                heal_sound.play()
+                            else:
+                                heal_sound.set_volume(0.3)
+                                heal_sound.play()
+                        # TODO - spawn heart particles
                 continue
 
             for event in pygame.event.get():
@@ -10,11 +10,78 @@ SOUND = False
 
 # Network constants (used by server and client)
 PAYLOAD_SIZE = 123456
+RECV_BUFFER_SIZE = 65536
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+SEND_COALESCE_SIZE = 256 * 1024
+"""Bytes waiting to be sent to a client above which the queued game states are
+replaced by a snapshot of the current one"""
+SEND_QUEUE_LIMIT = 4 * 1024 * 1024
+"""Bytes waiting to be sent to a client above which the client is evicted"""
+SLOW_CLIENT_TIMEOUT = 30.0
+"""Seconds a client can stay without reading what is sent to it before being evicted"""
+SEND_MAX_BUFFERS = 64
+"""Buffers given at most to one scatter-gather send (sendmsg)"""
+STATE_ENCODINGS = ("binary", "json")
+"""Encodings of the game states the clients ask for, by preference (see
+network/binary.py), ("json",) keeps the game states readable in the logs"""
 
 # Server constants (server.py)
 HOST: str = "0.0.0.0"
 PORT: int = 44440
 
+# Event log constants (event_log.py)
+EVENT_LOG_SIZE = 100
+"""Number of events kept in memory"""
+EVENT_LOG_SENT = 5
+"""Number of events sent to the clients and shown in the HUD"""
+EVENT_LOG_FILE: str | None = None
+"""File the server appends the events to, None to only keep them in memory"""
+
+# Turn timing constants (turn_timing.py)
+TURN_TIMING = False
+"""Time the phases of the turns of the server (enemies, heal, encoding, sends...)"""
+TIMING_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+"""Upper bounds (in seconds) of the buckets of the timing histograms"""
+
+# Board constants (server_classes/board.py)
+DEBUG_POSITIONS = False
+"""Check the position index of the board against the cells on each lookup of a
+position (get_coordinates_object, pawns_on_effect, get_all_elements, snapshots)"""
+
+# Enemy brain constants (server_classes/enemy_brain.py)
+ENEMY_BRAIN_BUDGET_MS: int | None = None
+"""Milliseconds the enemies search their moves for in each turn (shared by the
+enemies), None to keep the random AI"""
+ENEMY_BRAIN_MAX_DEPTH = 5
+"""Maximum depth (moves of the enemy and of the pawns, odd) of the search"""
+ENEMY_BRAIN_WORKERS = 4
+"""Threads running the searches of the enemies, shared by the games"""
+
+# Client board constants (classes/board.py)
+CHUNK_SIZE = 16
+"""Width and height (in tiles) of the pre-rendered chunks of the static layers"""
+HIGHLIGHT_MOVE_COLOR = (0, 255, 0)
+"""Color of the outline of the cells where the selected pawn can move"""
+HIGHLIGHT_ATTACK_COLOR = (255, 0, 0)
+"""Color of the outline of the cells where the selected pawn can attack"""
+
 # Card constants (card.py)
 CARD_SLOT_WIDTH = 150
 CARD_SLOT_HEIGHT = 220
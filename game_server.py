@@ -1,17 +1,25 @@
 """ File containing the main loop of the game """
 
-import json
 from queue import Queue
+import itertools
 import logging
 import socket
 import select
 
-import pygame  # pylint: disable=import-error
-
-from discord_handler import DiscordHandler
-from game_constants.consts import GRAPHICAL_TILE_SIZE, PAYLOAD_SIZE
+from event_log import EventLog, get_file_sink
+from metrics import count
+from game_constants.consts import (
+    ENEMY_BRAIN_BUDGET_MS,
+    EVENT_LOG_FILE,
+    EVENT_LOG_SENT,
+    SEND_COALESCE_SIZE,
+    TURN_TIMING,
+)
+from network import BroadcastEncoder, Connection, SlowClientError, frame_parts
 from server_classes import Board, Player, Card, Key, Pawn, Enemy, EndTurn
+from server_classes.enemy_brain import EnemyBrain
 from server_classes.map_object import MapCard, MapKey
+from turn_timing import PhaseTimer, get_map_timer
 
 from server_classes.card import (
     card_right_1,
@@ -32,8 +40,6 @@ from server_classes.card import (
 
 
 log = logging.getLogger(__name__)
-discord_handler = DiscordHandler()
-# log.addHandler(discord_handler)
 
 
 class GameServer:
@@ -42,11 +48,21 @@ class GameServer:
     """
 
     def __init__(
-        self, read_list: list[socket.socket], mapchoose="map_courte.tmx", fog=False
+        self,
+        read_list: list[socket.socket | Connection],
+        mapchoose="map_courte.tmx",
+        fog=False,
+        timing: bool = TURN_TIMING,
+        brain_budget_ms: int | None = ENEMY_BRAIN_BUDGET_MS,
     ):
-        """Sockets list -> first socket is the server socket, the others are client sockets"""
-        self.read_list: list[socket.socket] = read_list
-        self.read_list[0].setblocking(True)
+        """Sockets list -> first socket is the server socket (None when the game
+        runs in a room of the RoomServer), the others are client connections.
+        timing -> time the phases of the turns (see turn_timing.py)
+        brain_budget_ms -> milliseconds the enemies search their moves for in each
+        turn (see server_classes/enemy_brain.py), None for the random AI"""
+        self.read_list: list[socket.socket | Connection] = read_list
+        if self.read_list[0] is not None:
+            self.read_list[0].setblocking(True)
         self.data: dict = {
             "player_count": len(self.read_list[1:]),
             "current_player": -1,
@@ -67,9 +83,22 @@ class GameServer:
 
         # Players[0] = read_list[1], etc...
 
+        self.encoder = BroadcastEncoder(len(self.read_list[1:]))
+        """Last state sent to the clients, to only send what changed"""
+
+        self.event_log = EventLog(
+            sink=get_file_sink(EVENT_LOG_FILE) if EVENT_LOG_FILE else None
+        )
+        """Events of the game, the last ones are sent to the clients"""
+
+        self.timer = PhaseTimer(timing, get_map_timer(mapchoose) if timing else None)
+        """Durations of the phases of the turns, also added to the map's timer"""
+
+        self.enemy_brain = EnemyBrain(brain_budget_ms) if brain_budget_ms else None
+        """Search of the moves of the enemies, None for the random AI"""
+
         # pygame.init()  # pylint: disable=no-member
         self.player_count = len(self.read_list[1:])
-        self.clock = pygame.time.Clock()
         # self.camera.set_bounds(self.screen.get_width(), self.screen.get_height())
         self.map_chosen = mapchoose
         self.board = Board.from_tmx("maps/" + self.map_chosen, False)
@@ -81,7 +110,6 @@ class GameServer:
         # self.board.resize_tiles(GRAPHICAL_TILE_SIZE, GRAPHICAL_TILE_SIZE)
         self.init_game_elements(mapchoose)
         self.fog = fog
-        self.load_fog_image()
         self.init_fog_cells()
 
         self.highlighted_cells: list = []
@@ -93,20 +121,39 @@ class GameServer:
         # FIXME: add a broadcast to the client
         log.info("Game ended")
 
-    def load_fog_image(self):
-        """
-        This function is used to load the fog image.
+    def timing_stats(self) -> dict:
+        """This function is used to get the durations of the phases of the turns.
+
+        Returns:
+            dict: summary of each phase for this game ("game") and for all the
+            games played on its map in this process ("map")
         """
-        self.fog_image = pygame.image.load("images/fog.jpeg")
-        self.fog_image = pygame.transform.scale(
-            self.fog_image, (GRAPHICAL_TILE_SIZE, GRAPHICAL_TILE_SIZE)
-        )
+        return {
+            "game": self.timer.stats(),
+            "map": self.timer.parent.stats() if self.timer.parent else {},
+        }
+
+    def log_timing_stats(self):
+        """This function is used to write the durations of the phases, and the
+        statistics of the enemy brain, in the log."""
+        if self.timer.enabled:
+            log.info(
+                "Turn phases of the game on %s :\n%s",
+                self.map_chosen,
+                self.timer.format_stats(),
+            )
+        if self.enemy_brain is not None:
+            log.info(
+                "Enemy brain of the game on %s : %s",
+                self.map_chosen,
+                self.enemy_brain.format_stats(),
+            )
 
     def init_fog_cells(self):
         """
-        This function is used to initialize the fog cells.
+        This function is used to initialize the fog range. The clients draw the
+        fog: the server keeps no list of fog cells.
         """
-        self.list_fog_cases = [cell for row in self.board.cells for cell in row]
         self.fog_range = 3
 
     def get_nearby_cells(self, pawn: Pawn, distance: int):
@@ -222,6 +269,9 @@ class GameServer:
         if not mapchoose == "map_courte.tmx":
             self.list_enemies.append(self.enemy4)
 
+        for entity in self.list_pawns + self.list_enemies:
+            entity.event_log = self.event_log
+
         for i, pawn in enumerate(self.list_pawns):
             y, x = self.pawn_positions[mapchoose][i]
             self.board.cells[y][x].add_pawn(pawn)
@@ -365,25 +415,24 @@ class GameServer:
                     self.board.cells[new_y][new_x].game_object.card.get_name
                 )
                 # ex : Le joueur 1 a récupéré la carte croix
-                # self.tab.log_event.write_logfile(
-                #     "log_event.txt",
-                #     "Le joueur %d a récupéré la carte %s "
-                #     % (
-                #         self.queue.queue[0].number,
-                #         self.board.cells[new_y][new_x].game_object.card.name,
-                #     ),
-                # )
+                self.event_log.push(
+                    "Le joueur %d a récupéré la carte %s"
+                    % (
+                        self.queue.queue[0].number,
+                        self.board.cells[new_y][new_x].game_object.card.name,
+                    ),
+                    "card",
+                )
 
             else:
-                # self.tab.log_event.write_logfile(
-                #     "log_event.txt",
-                #     "Le joueur %d a déchiré la carte %s "
-                #     % (
-                #         self.queue.queue[0].number,
-                #         self.board.cells[new_y][new_x].game_object.card.name,
-                #     ),
-                # )
-                pass
+                self.event_log.push(
+                    "Le joueur %d a déchiré la carte %s"
+                    % (
+                        self.queue.queue[0].number,
+                        self.board.cells[new_y][new_x].game_object.card.name,
+                    ),
+                    "card",
+                )
 
         log.debug(isinstance(self.board.cells[new_y][new_x].game_object, MapKey or Key))
         if isinstance(self.board.cells[new_y][new_x].game_object, MapKey or Key):
@@ -391,14 +440,14 @@ class GameServer:
                 self.board.cells[new_y][new_x].game_object.key.name
             )
             # ex : Le joueur 1 a récupéré la clé rouge
-            # self.tab.log_event.write_logfile(
-            #     "log_event.txt",
-            #     "Le joueur %d a récupéré la clé %s "
-            #     % (
-            #         self.queue.queue[0].number,
-            #         self.board.cells[new_y][new_x].game_object.key.name,
-            #     ),
-            # )
+            self.event_log.push(
+                "Le joueur %d a récupéré la clé %s"
+                % (
+                    self.queue.queue[0].number,
+                    self.board.cells[new_y][new_x].game_object.key.name,
+                ),
+                "key",
+            )
         self.board.move_or_attack(pawn_selected, new_y, new_x, (pawn_y, pawn_x))
 
     def select_pawn(self, cell: object):
@@ -417,9 +466,7 @@ class GameServer:
 
     def unhilight(self):
         """This function is used to unhighlight the cells."""
-        for row in self.board.cells:
-            for cell in row:
-                cell.unhighlight()
+        self.board.highlights.clear()
 
     def get_coord_pawn(self, pawn: Pawn):
         """This function is used to get the coordinates of the pawn.
@@ -430,10 +477,7 @@ class GameServer:
         Returns:
             tuple[int, int]: tuple of coordinates
         """
-        for row in self.board.cells:
-            for cell in row:
-                if cell.game_object == pawn:
-                    return cell.y, cell.x
+        return self.board.get_coordinates_object(pawn)
 
     def handle_card_selection(self, index: int):
         """This function is used to handle the card selection.
@@ -461,51 +505,110 @@ class GameServer:
     def broadcast(self, blocking: bool = False) -> bool:
         """This method allow to broadcast data to every players in the read list
 
+        The state shared by every player is encoded once, only the part of each
+        player (its cards, number, selection...) is encoded per client.
+        A client that lags behind gets a snapshot of the current state instead of
+        the states queued for it, and a client that doesn't read anymore is
+        evicted without blocking the others.
+
         params:
             blocking (bool): set the blocking mode of the socket
 
-        Args:
-            data (dict): a dict of data to be sent
+        Returns:
+            bool: False if a client was lost
         """
-        for index, cli in enumerate(self.read_list[1:]):
-            data = {}
-            data.update(self.data)
-            data.update(self.players[index])
-            data.update(
-                {
-                    "player_number": index,
-                }
-            )
-            data.update({"elements": self.board.get_all_elements()})
-            data = json.dumps(data)
-            log.debug("Sending data to player %d : %s", index, data)
+        clients = self.read_list[1:]
+        for index, cli in enumerate(clients):
+            if cli.pending_bytes > SEND_COALESCE_SIZE:
+                # the queued states are superseded by the current one
+                log.warning("Client %d lags behind, sending a snapshot", index + 1)
+                cli.drop_superseded()
+                self.encoder.reset(index)
+            self.encoder.set_encoding(index, cli.encoding)
+
+        with self.timer.phase("encode"):
+            payloads = self.encoder.encode(*self.get_states())
+
+        for index, (cli, payload) in enumerate(zip(clients, payloads)):
+            if payload is None:
+                # nothing changed since the last message sent to this client
+                continue
+            log.debug("Sending data to player %d : %s", index, payload)
             cli.setblocking(blocking)
             try:
-                cli.send(data.encode())
-            except Exception as e:
-                # FIXME: change exception catching
-                log.error("Fixme: add the correct exception catching. %s", e)
-                log.error("Error ! Client %s : connection lost.", index + 1)
-                for other_cli in self.read_list[1:]:
-                    if other_cli is not cli:
-                        other_cli.send(str(-1).encode())
-                        other_cli.close()
-                        self.read_list.remove(other_cli)
-                self.read_list.remove(cli)
-                self.read_list[0].close()
-                quit()
+                with self.timer.phase("send"):
+                    cli.send_frame(frame_parts(*payload), supersedable=True)
+            except (OSError, SlowClientError) as e:
+                log.error("Client %d lost : %s", index + 1, e)
+                self.lose_player(cli)
+                return False
 
         return True
 
+    def get_states(self) -> tuple[dict, list[dict]]:
+        """This method is used to get the state sent to the clients.
+
+        Returns:
+            tuple[dict, list[dict]]: the state shared by every player, and the
+            part of each player (its fields replace the ones of the game)
+        """
+        players = [
+            {**self.players[index], "player_number": index}
+            for index in range(self.player_count)
+        ]
+        player_fields = set().union(*players)
+        data = {
+            name: value
+            for name, value in self.data.items()
+            if name not in player_fields
+        }
+        data["elements"] = self.board.get_all_elements()
+        data["events"] = self.event_log.last(EVENT_LOG_SENT)
+        return data, players
+
+    def lose_player(self, lost: Connection):
+        """This method is used to end the game when a client is lost: the other
+        clients are told (-1), the server closes the connections.
+
+        Args:
+            lost (Connection): connection of the client
+        """
+        count("disconnections")
+        lost.close()
+        for cli in self.read_list[1:]:
+            if cli is not lost:
+                try:
+                    cli.send_message(-1)
+                except (OSError, SlowClientError):
+                    pass
+
     def init_game_broadcast(self, blocking=False):
         """This function is used to send the initial game state to the clients."""
         self.data["map"] = self.map_chosen
         self.data["player_count"] = self.player_count
 
+        # clients that join get a full snapshot
+        for index in range(self.player_count):
+            self.encoder.reset(index)
         self.broadcast(blocking=blocking)
 
+    def handle_message(self, index: int, message: dict):
+        """This method store the data received from a client.
+
+        Args:
+            index (int): index of the client (0 for the first player)
+            message (dict): message received
+        """
+        if message.pop("resync", False):
+            # the client lost track of the state: send everything again
+            count("resyncs")
+            self.encoder.reset(index)
+        self.players[index].update(message)
+        log.debug("Received: %s", self.players[index])
+
     def recv_data(self) -> bool:
-        """This method receive data from the server and store it in the self.data_in attribute
+        """This method receive data from the clients and store the messages in
+        the inbox of their connection, until a message is received
 
         Returns:
             bool: False if the receive fail
@@ -513,17 +616,24 @@ class GameServer:
 
         received: bool = False
         while not received:
-            readable, _, _ = select.select(self.read_list, [], [])
+            # the clients that didn't read everything sent to them yet
+            waiting = [s for s in self.read_list[1:] if s.wants_write()]
+            readable, writable, _ = select.select(self.read_list, waiting, [])
+            for s in writable:
+                try:
+                    s.flush()
+                except OSError as e:
+                    log.error("Client lost : %s", e)
+                    self.lose_player(s)
+                    return False
             for s in readable:  # for each socket (server/client)
                 if s is not self.read_list[0]:
-                    data: bytes = s.recv(PAYLOAD_SIZE)
-                    if not data:
+                    if not s.recv_messages():
+                        log.warning("A player left the game")
+                        self.lose_player(s)
                         return False
-                    self.players[self.read_list.index(s) - 1].update(
-                        json.loads(data.decode())
-                    )
-                    log.debug("Received: %s", self.players[self.read_list.index(s) - 1])
-                    received = True
+                    # a single read can hold several messages (or only a part of one)
+                    received = received or bool(s.inbox)
         return True
 
         # cli_number:int = self.data["current_player"]+1
@@ -538,33 +648,66 @@ class GameServer:
         # current_cli(False)
         # return True
 
-    def run(self):
-        """This function is used to run the game."""
+    def play_message(self, index: int, message: dict) -> bool:
+        """This function is used to play the action of a player, then the game
+        until a player has to play.
 
-        # Initialize variables
-        # frame_id = 0
-        card_selected = None
-        pawn_selected = None
-        self.highlighted_cells = []
+        Args:
+            index (int): index of the player (0 for the first player)
+            message (dict): message received
 
+        Returns:
+            bool: False if the game ended
+        """
+        with self.timer.phase("turn"):
+            self.handle_message(index, message)
+            # only the current player can play
+            if index == self.data["current_player"]:
+                with self.timer.phase("player_action"):
+                    self.play_player_turn()
+            return self.advance()
+
+    def start(self):
+        """This function is used to start the game: the first player plays first."""
+        self.highlighted_cells = []
         self.data["current_player"] = 0
-
         self.init_game_broadcast(True)
 
-        # Main loop
+    def advance(self) -> bool:
+        """This function is used to play the enemies and the end of the turns
+        until a player has to play. The state is then broadcasted to the clients.
+
+        Returns:
+            bool: False if the game ended
+        """
         while True:
 
             # End game if all the key slots are full
             if len(self.data["keys"]) == 4:
                 self.end_game()
-                break
+                return False
 
             # Case where the current element of the queue is an enemy
             if isinstance(self.queue.queue[0], Enemy):
                 if self.queue.queue[0].health <= 0:
                     self.queue.get()
                     continue
-                self.board.move_enemy(self.queue.queue[0], self.player_count)
+                with self.timer.phase("enemy_ai"):
+                    if self.enemy_brain is not None:
+                        if not self.enemy_brain.enemies_left:
+                            # the enemies playing before the next player or end of turn
+                            enemies = itertools.takewhile(
+                                lambda element: isinstance(element, Enemy),
+                                self.queue.queue,
+                            )
+                            self.enemy_brain.start_turn(
+                                sum(enemy.health > 0 for enemy in enemies)
+                            )
+                        self.enemy_brain.move_enemy(
+                            self.board, self.queue.queue[0], self.player_count
+                        )
+                    else:
+                        self.board.move_enemy(self.queue.queue[0], self.player_count)
                 self.swap_player(self.queue)
                 continue
 
@@ -573,135 +716,141 @@ class GameServer:
                 # TODO: keep this for the server
                 self.swap_player(self.queue)
 
-                # heal all the pawns that are on healing tiles
-                # TODO: keep this for the server (and send a signal to the client to update the health of the pawns)
-                for row in self.board.cells:
-                    for cell in row:
-                        if cell.game_object and isinstance(cell.game_object, Pawn):
-                            if cell.is_heal_cell:
-                                old_health = cell.game_object.health
-                                cell.game_object.health = min(
-                                    cell.game_object.health + cell.heal_value, 100
-                                )  # maximum 100 HP
-                                if cell.game_object.health != old_health:
-                                    # self.tab.log_event.write_logfile(
-                                    #     "log_event.txt",
-                                    #     "%s a été soigné de %d HP"
-                                    #     % (
-                                    #         cell.game_object.name,
-                                    #         cell.heal_value,
-                                    #     ),
-                                    # )
-                                    pass
-                                # if SOUND:
-                                #     if cell.game_object.health != old_health:
-                                #         heal_sound = pygame.mixer.Sound(
-                                #             "sounds/heal.mp3"
-                                #         )
-                                #         if cell.heal_value >= 10:
-                                #             heal_sound.play()
-                                #         else:
-                                #             heal_sound.set_volume(0.3)
-                                #             heal_sound.play()
-                                #     # TODO - spawn heart particles
+                with self.timer.phase("end_turn"):
+                    self.heal_pawns()
                 continue
 
             if isinstance(self.queue.queue[0], Player):
-                self.broadcast()
+                if not self.broadcast():
+                    return False
                 self.data["possible_moves"] = []
                 log.info("It's player %d turn", self.data["current_player"] + 1)
-                # Wait for player data
-                self.recv_data()
-                # If the player press space, the turn is skipped
-                if self.players[self.data["current_player"]]["skip"]:
-                    # self.swap_player(self.queue)
-                    # self.tab.unselect_all_cards()
-                    self.unhilight()
-                    # card_selected = None
-                    # pawn_selected = None
-                    self.swap_player(self.queue)
-                    # elif event.key == pygame.K_ESCAPE:  # pylint: disable=no-member
-                    #     return
-
-                # If a card is selected
-                elif (
-                    self.players[self.data["current_player"]]["selected_card"]
-                    is not None
+                return True
+
+    def heal_pawns(self):
+        """This function is used to heal the pawns standing on healing tiles
+        (end of a turn)."""
+        # heal all the pawns that are on healing tiles
+        # TODO: keep this for the server (and send a signal to the client to update the health of the pawns)
+        for pawn, heal_value in self.board.pawns_on_effect("heal"):
+            old_health = pawn.health
+            pawn.health = min(pawn.health + heal_value, 100)  # maximum 100 HP
+            if pawn.health != old_health:
+                self.event_log.push(
+                    "%s a été soigné de %d HP" % (pawn.name, heal_value),
+                    "heal",
+                )
+            # if SOUND:
+            #     if pawn.health != old_health:
+            #         heal_sound = pygame.mixer.Sound("sounds/heal.mp3")
+            #         if heal_value >= 10:
+            #             heal_sound.play()
+            #         else:
+            #             heal_sound.set_volume(0.3)
+            #             heal_sound.play()
+            #     # TODO - spawn heart particles
+
+    def play_player_turn(self):
+        """This function is used to play the action received from the current player."""
+        card_selected = None
+
+        # If the player press space, the turn is skipped
+        if self.players[self.data["current_player"]]["skip"]:
+            # self.swap_player(self.queue)
+            # self.tab.unselect_all_cards()
+            self.unhilight()
+            # card_selected = None
+            # self.pawn_selected = None
+            self.swap_player(self.queue)
+            # elif event.key == pygame.K_ESCAPE:  # pylint: disable=no-member
+            #     return
+
+        # If a card is selected
+        elif self.players[self.data["current_player"]]["selected_card"] is not None:
+            # get the selected card object
+            for card in self.queue.queue[0].cards:
+                if (
+                    card.get_name
+                    == self.players[self.data["current_player"]]["selected_card"]
+                ):
+                    card_selected = card
+                    break
+
+            # Get what the player selected on the board
+            if (
+                self.players[self.data["current_player"]]["selected_cell"][0]
+                is not None
+                and self.players[self.data["current_player"]]["selected_cell"][1]
+                is not None
+            ):
+                clicked_cell = self.board.cells[
+                    self.players[self.data["current_player"]]["selected_cell"][0]
+                ][self.players[self.data["current_player"]]["selected_cell"][1]]
+                # TODO: get the selected card OBJECT
+                if clicked_cell.game_object and isinstance(
+                    clicked_cell.game_object, Pawn
                 ):
-                    # get the selected card object
-                    for card in self.queue.queue[0].cards:
-                        if (
-                            card.get_name
-                            == self.players[self.data["current_player"]][
-                                "selected_card"
-                            ]
-                        ):
-                            card_selected = card
-                            break
-
-                    # Get what the player selected on the board
+                    self.pawn_selected = clicked_cell.game_object
+                    self.highlighted_cells = []
+                    self.unhilight()
+                    possible_moves = self.board.highlight_possible_moves(
+                        self.pawn_selected, card_selected
+                    )
+                    self.highlighted_cells = possible_moves
+                    self.data["possible_moves"] = self.highlighted_cells
+                else:
+                    # Search if the clicked cell is in the highlighted cells
                     if (
-                        self.players[self.data["current_player"]]["selected_cell"][0]
-                        is not None
-                        and self.players[self.data["current_player"]]["selected_cell"][
-                            1
-                        ]
-                        is not None
-                    ):
-                        clicked_cell = self.board.cells[
+                        self.players[self.data["current_player"]]["selected_cell"][0],
+                        self.players[self.data["current_player"]]["selected_cell"][1],
+                    ) in self.highlighted_cells:
+                        pawn_y, pawn_x = self.get_coord_pawn(self.pawn_selected)
+                        new_y, new_x = (
                             self.players[self.data["current_player"]]["selected_cell"][
                                 0
-                            ]
-                        ][self.players[self.data["current_player"]]["selected_cell"][1]]
-                        # TODO: get the selected card OBJECT
-                        if clicked_cell.game_object and isinstance(
-                            clicked_cell.game_object, Pawn
-                        ):
-                            pawn_selected = clicked_cell.game_object
-                            self.highlighted_cells = []
-                            self.unhilight()
-                            possible_moves = self.board.highlight_possible_moves(
-                                pawn_selected, card_selected
-                            )
-                            self.highlighted_cells = possible_moves
-                            self.data["possible_moves"] = self.highlighted_cells
-                        else:
-                            # Search if the clicked cell is in the highlighted cells
-                            if (
-                                self.players[self.data["current_player"]][
-                                    "selected_cell"
-                                ][0],
-                                self.players[self.data["current_player"]][
-                                    "selected_cell"
-                                ][1],
-                            ) in self.highlighted_cells:
-                                pawn_y, pawn_x = self.get_coord_pawn(pawn_selected)
-                                new_y, new_x = (
-                                    self.players[self.data["current_player"]][
-                                        "selected_cell"
-                                    ][0],
-                                    self.players[self.data["current_player"]][
-                                        "selected_cell"
-                                    ][1],
-                                )
-
-                                # Move the pawn on the new cell
-                                self.move_check_key_and_card(
-                                    pawn_selected, new_y, new_x, pawn_y, pawn_x
-                                )
-                                self.players[self.data["current_player"]][
-                                    "selected_card"
-                                ] = None
-                                self.players[self.data["current_player"]][
-                                    "selected_cell"
-                                ] = None
-                                self.data["possible_moves"] = []
-
-                                # End of the turn
-                                self.swap_player(self.queue)
-                                # Reset All variables
-                                self.unhilight()
-                                clicked_cell = None
-                                card_selected = None
-                                pawn_selected = None
-                    card_selected = None
+                            ],
+                            self.players[self.data["current_player"]]["selected_cell"][
+                                1
+                            ],
+                        )
+
+                        # Move the pawn on the new cell
+                        self.move_check_key_and_card(
+                            self.pawn_selected, new_y, new_x, pawn_y, pawn_x
+                        )
+                        self.players[self.data["current_player"]][
+                            "selected_card"
+                        ] = None
+                        self.players[self.data["current_player"]][
+                            "selected_cell"
+                        ] = None
+                        self.data["possible_moves"] = []
+
+                        # End of the turn
+                        self.swap_player(self.queue)
+                        # Reset All variables
+                        self.unhilight()
+                        clicked_cell = None
+                        card_selected = None
+                        self.pawn_selected = None
+            card_selected = None
+
+    def run(self):
+        """This function is used to run the game."""
+        self.start()
+
+        # Main loop
+        try:
+            playing = self.advance()
+            while playing:
+                # Wait for player data
+                with self.timer.phase("recv"):
+                    if not self.recv_data():
+                        # the lost player is counted by lose_player
+                        break
+                # each message is an action, played before the next one
+                for index, cli in enumerate(self.read_list[1:]):
+                    while playing and cli.inbox:
+                        playing = self.play_message(index, cli.inbox.popleft())
+        finally:
+            self.log_timing_stats()
@@ -0,0 +1,61 @@
+"""This file contains the set of highlighted cells of a board.
+
+The boards of the server and of the client own a ``HighlightSet`` instead of a
+flag on every cell: clearing the highlights of a card selection or of the end
+of a turn only visits the highlighted cells, not the whole map, and the client
+draws the highlights as an overlay over the cells seen by the camera.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+
+class HighlightSet:
+    """Highlighted cells (y, x) of a board, split into moves and attacks."""
+
+    def __init__(self) -> None:
+        self.moves: set[tuple[int, int]] = set()
+        """Cells where the selected pawn can move"""
+        self.attacks: set[tuple[int, int]] = set()
+        """Cells where the selected pawn can attack"""
+
+    def highlight(self, cells: Iterable, attack: bool = False) -> None:
+        """Highlights cells, a cell is either a move or an attack.
+
+        Args:
+            cells (Iterable): the cells (y, x)
+            attack (bool, optional): True to highlight them as attacks.
+        """
+        added, other = (
+            (self.attacks, self.moves) if attack else (self.moves, self.attacks)
+        )
+        for y, x in cells:
+            other.discard((y, x))
+            added.add((y, x))
+
+    def unhighlight(self, cells: Iterable) -> None:
+        """Removes the highlight of cells.
+
+        Args:
+            cells (Iterable): the cells (y, x)
+        """
+        for y, x in cells:
+            self.moves.discard((y, x))
+            self.attacks.discard((y, x))
+
+    def clear(self) -> None:
+        """Removes every highlight."""
+        self.moves.clear()
+        self.attacks.clear()
+
+    def __contains__(self, cell: Iterable) -> bool:
+        y, x = cell
+        return (y, x) in self.moves or (y, x) in self.attacks
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        yield from self.moves
+        yield from self.attacks
+
+    def __len__(self) -> int:
+        return len(self.moves) + len(self.attacks)
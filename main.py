@@ -2,7 +2,6 @@
 
 import logging
 import socket
-import json
 
 import pygame
 from rich.logging import RichHandler
@@ -18,7 +17,8 @@ from classes import (
 )
 from game import Game
 from client import Client
-from game_constants.consts import PORT, PAYLOAD_SIZE
+from game_constants.consts import PORT
+from network import Connection
 
 # program-wide logging formatter
 root_logger = logging.getLogger()
@@ -67,6 +67,7 @@ class Main:
 
         self.host = ""
         self.sock: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connection: Connection | None = None
         self.players = []
 
     def draw_options(self, options, do_not_clear=False, manual_offset=0):
@@ -319,9 +320,13 @@ class Main:
                 WaitingPage(self.screen, self.host).draw()
                 pygame.display.flip()
 
+                # the socket of the last game was closed with its client
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 result = self.sock.connect_ex((self.host, PORT))
                 if result == 0:
                     log.debug("Server connection okay")
+                    self.connection = Connection(self.sock)
+                    self.connection.send_hello()
                     self.current_state = "OnlineLobby"
                     LobbyPage(self.screen).draw()
                 else:
@@ -330,19 +335,21 @@ class Main:
             # Connection etablished : waiting for other players
             elif self.current_state == "OnlineLobby":
                 # wait for the server to send the number of players
-                self.sock.setblocking(False)
+                self.connection.setblocking(False)
                 try:
-                    data = self.sock.recv(PAYLOAD_SIZE)
-                    data = json.loads(data.decode())
+                    self.connection.recv_messages()
+                except BlockingIOError:
+                    pass
+                # stop at the start message: the next ones belong to the game
+                while self.connection.inbox and self.current_state != "Start":
+                    data = self.connection.inbox.popleft()
                     log.debug(data)
                     self.players = []
                     for player in data["players"]:
                         self.players.append((player[0], player[1]))
                     if data["start"]:
                         self.current_state = "Start"
-                except BlockingIOError:
-                    pass
-                self.sock.setblocking(True)
+                self.connection.setblocking(True)
                 lobby_page.draw(self.players)
                 self.draw_options(
                     [lobby_page.button_text], True, 100 + 64 * len(self.players)
@@ -352,8 +359,9 @@ class Main:
             elif self.current_state == "Start":
                 log.info("Starting the game")
                 # TODO: start the game
-                game = Client(self.sock)
+                game = Client(self.connection)
                 game.run()
+                game.close()
                 exiting_main_game = True
 
             if exiting_main_game:
@@ -0,0 +1,381 @@
+"""This file contains the compiler and the cache of the .tmx maps.
+
+Parsing a map with pytmx reads the .tmx and its tilesets (the .tsx of the tiles
+is about 1MB of XML) every time a game starts or a client joins. The first load
+of a map compiles it into a binary file next to the map (``maps/.cache``),
+named after the hash of the .tmx and .tsx files, so a modified map is compiled
+again. The next loads only map this file in memory.
+
+Cache file:
+    ``MAGIC``, the length of the header (4 bytes, big endian), the JSON header,
+    then the packed arrays described in the header (offsets from the end of the
+    header): for each tile layer the gid of every cell (uint32, y * width + x)
+    and the walkability of every cell (uint8), then the image of every gid
+    (int32 x 6: tileset, x, y, width, height, flags).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Callable, NamedTuple
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+"""Version of the cache file, changing it invalidates every cached map"""
+MAGIC = b"PTMC"
+HEADER_SIZE = struct.Struct("!I")
+IMAGE_FIELDS = 6
+"""int32 per gid in the images array: tileset, x, y, width, height, flags"""
+
+TILESET_SOURCE = re.compile(rb'<tileset[^>]*\bsource="([^"]+)"')
+
+
+# Same as pytmx's: importing pytmx imports pygame when it is installed, so pytmx
+# is only imported to compile a map (the server runs without pygame)
+class AnimationFrame(NamedTuple):
+    """A frame of an animated tile."""
+
+    gid: int
+    duration: int
+
+
+class TileFlags(NamedTuple):
+    """Transformations of the image of a tile."""
+
+    flipped_horizontally: bool
+    flipped_vertically: bool
+    flipped_diagonally: bool
+
+
+def source_hash(tmx_file: str) -> str:
+    """Computes the hash of a map and of the external tilesets it uses.
+
+    Args:
+        tmx_file (str): path of the .tmx file
+
+    Returns:
+        str: hexadecimal digest, also depending on the cache format
+    """
+    digest = hashlib.sha256(f"{FORMAT_VERSION}-{sys.byteorder}".encode())
+    with open(tmx_file, "rb") as file:
+        content = file.read()
+    digest.update(content)
+    folder = os.path.dirname(tmx_file)
+    for source in TILESET_SOURCE.findall(content):
+        with open(os.path.join(folder, source.decode()), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_path(tmx_file: str) -> str:
+    """Returns the path of the compiled version of a map.
+
+    Args:
+        tmx_file (str): path of the .tmx file
+
+    Returns:
+        str: path of the cache file
+    """
+    folder, name = os.path.split(tmx_file)
+    name = os.path.splitext(name)[0]
+    return os.path.join(folder, ".cache", f"{name}-{source_hash(tmx_file)}.bin")
+
+
+def compile_map(tmx_file: str) -> bytes:
+    """Compiles a .tmx map.
+
+    Args:
+        tmx_file (str): path of the .tmx file
+
+    Returns:
+        bytes: content of the cache file
+    """
+    import pytmx  # pylint: disable=import-outside-toplevel
+
+    tilesets: list[list] = []
+    folder = os.path.dirname(tmx_file)
+
+    def record_image(path: str, colorkey: Any, **_) -> Callable:
+        # the images aren't loaded, only their position in the tilesets
+        tileset = len(tilesets)
+        tilesets.append([os.path.relpath(path, folder), colorkey])
+
+        def image(rect=None, flags=None):
+            return tileset, rect or (0, 0, 0, 0), flags
+
+        return image
+
+    tmx_data = pytmx.TiledMap(tmx_file, image_loader=record_image)
+    size = tmx_data.width * tmx_data.height
+
+    frames = {}
+    heal = {}
+    for gid, props in tmx_data.tile_properties.items():
+        if props.get("frames"):
+            frames[gid] = [[frame.gid, frame.duration] for frame in props["frames"]]
+        if "heal" in props:
+            heal[gid] = props["heal"]
+
+    arrays = []
+    layers = {}
+    offset = 0
+    for layer in tmx_data.layers:
+        if not isinstance(layer, pytmx.TiledTileLayer):
+            continue
+        gids = array("I", bytes(4 * size))
+        walkable = bytearray(b"\x01" * size)
+        for x, y, gid in layer:
+            index = y * tmx_data.width + x
+            gids[index] = gid
+            props = tmx_data.tile_properties.get(gid)
+            if props and not props.get("walkable", True):
+                walkable[index] = 0
+        layers[layer.name] = {"gids": offset, "walkable": offset + 4 * size}
+        arrays += [gids.tobytes(), bytes(walkable)]
+        offset += 5 * size
+
+    images = array("i", [-1] * (IMAGE_FIELDS * len(tmx_data.images)))
+    for gid, image in enumerate(tmx_data.images):
+        if image:
+            tileset, rect, flags = image
+            flag_bits = 0
+            if flags:
+                flag_bits = (
+                    flags.flipped_horizontally
+                    | flags.flipped_vertically << 1
+                    | flags.flipped_diagonally << 2
+                )
+            images[IMAGE_FIELDS * gid : IMAGE_FIELDS * (gid + 1)] = array(
+                "i", [tileset, *rect, flag_bits]
+            )
+    arrays.append(images.tobytes())
+
+    header = {
+        "width": tmx_data.width,
+        "height": tmx_data.height,
+        "tilewidth": tmx_data.tilewidth,
+        "tileheight": tmx_data.tileheight,
+        "layers": layers,
+        "images": {"offset": offset, "count": len(tmx_data.images)},
+        "tilesets": tilesets,
+        "tiledgidmap": list(tmx_data.tiledgidmap.items()),
+        "frames": list(frames.items()),
+        "heal": list(heal.items()),
+    }
+    encoded_header = json.dumps(header).encode()
+    # align the arrays on 4 bytes (JSON ignores the trailing spaces)
+    encoded_header += b" " * (
+        -(len(MAGIC) + HEADER_SIZE.size + len(encoded_header)) % 4
+    )
+    return b"".join(
+        [MAGIC, HEADER_SIZE.pack(len(encoded_header)), encoded_header, *arrays]
+    )
+
+
+class CompiledMap:
+    """A map loaded from its cache file.
+
+    It gives the same data as the ``pytmx.TiledMap`` the boards used
+    (``tiledgidmap``, ``get_tile_properties_by_gid``, ``get_tile_image_by_gid``),
+    plus the layers as packed arrays.
+    """
+
+    def __init__(
+        self,
+        data: bytes | mmap.mmap,
+        folder: str = "",
+        image_loader: Callable | None = None,
+    ) -> None:
+        """Initializes the map.
+
+        Args:
+            data (bytes | mmap.mmap): content of the cache file
+            folder (str, optional): folder of the .tmx file, the paths of the
+                tilesets are relative to it.
+            image_loader (Callable, optional): pytmx image loader, None to not
+                load the images (server).
+
+        Raises:
+            ValueError: if the data isn't a compiled map
+        """
+        if data[: len(MAGIC)] != MAGIC:
+            raise ValueError("Not a compiled map")
+        (length,) = HEADER_SIZE.unpack_from(data, len(MAGIC))
+        start = len(MAGIC) + HEADER_SIZE.size
+        header = json.loads(bytes(data[start : start + length]))
+        self._data = memoryview(data)[start + length :]
+
+        self.width: int = header["width"]
+        self.height: int = header["height"]
+        self.tilewidth: int = header["tilewidth"]
+        self.tileheight: int = header["tileheight"]
+        self.tiledgidmap: dict[int, int] = dict(header["tiledgidmap"])
+        self.layers: dict[str, dict[str, int]] = header["layers"]
+        self._frames = {
+            gid: [AnimationFrame(*frame) for frame in frames]
+            for gid, frames in header["frames"]
+        }
+        self._heal = dict(header["heal"])
+
+        size = self.width * self.height
+        self._gids = {
+            name: self._data[offsets["gids"] : offsets["gids"] + 4 * size].cast("I")
+            for name, offsets in self.layers.items()
+        }
+        self._walkable = {
+            name: self._data[offsets["walkable"] : offsets["walkable"] + size]
+            for name, offsets in self.layers.items()
+        }
+        images = header["images"]
+        self._images = self._data[
+            images["offset"] : images["offset"] + 4 * IMAGE_FIELDS * images["count"]
+        ].cast("i")
+
+        self.tilesets: list[list] = [
+            [os.path.join(folder, path), colorkey]
+            for path, colorkey in header["tilesets"]
+        ]
+        self.image_loader = image_loader
+        self._tileset_loaders: dict[int, Callable] = {}
+        self._loaded_images: dict[int, Any] = {}
+
+    def gids(self, layer: str) -> memoryview:
+        """Returns the gid of every cell of a tile layer.
+
+        Args:
+            layer (str): name of the layer
+
+        Returns:
+            memoryview: gids (uint32) indexed by y * width + x
+        """
+        return self._gids[layer]
+
+    def walkable(self, layer: str) -> memoryview:
+        """Returns the walkability of every cell of a tile layer.
+
+        Args:
+            layer (str): name of the layer
+
+        Returns:
+            memoryview: 1 if the cell is walkable, 0 otherwise (y * width + x)
+        """
+        return self._walkable[layer]
+
+    def walkable_grid(self, layers: list[str]) -> bytearray:
+        """Returns the cells that are walkable on every given layer.
+
+        Args:
+            layers (list[str]): names of the layers
+
+        Returns:
+            bytearray: 1 if the cell is walkable, 0 otherwise (y * width + x)
+        """
+        size = self.width * self.height
+        grid = int.from_bytes(b"\x01" * size, "little")
+        for layer in layers:
+            grid &= int.from_bytes(self._walkable[layer], "little")
+        return bytearray(grid.to_bytes(size, "little"))
+
+    def objects(self, layer: str) -> list[tuple[int, int, int]]:
+        """Returns the non empty cells of a tile layer (spawners, campfires).
+
+        Args:
+            layer (str): name of the layer
+
+        Returns:
+            list[tuple[int, int, int]]: (x, y, gid) of the cells, row by row
+        """
+        return [
+            (index % self.width, index // self.width, gid)
+            for index, gid in enumerate(self._gids[layer])
+            if gid
+        ]
+
+    def get_tile_properties_by_gid(self, gid: int) -> dict:
+        """Returns the properties of a tile used by the game.
+
+        Args:
+            gid (int): gid of the tile
+
+        Returns:
+            dict: the animation ("frames") and the "heal" value of the tile
+        """
+        properties = {"frames": self._frames.get(gid, [])}
+        if gid in self._heal:
+            properties["heal"] = self._heal[gid]
+        return properties
+
+    def get_tile_image_by_gid(self, gid: int) -> Any:
+        """Returns the image of a tile, loaded the first time it is asked.
+
+        Args:
+            gid (int): gid of the tile
+
+        Returns:
+            Any: the image given by the image loader, None without image loader
+        """
+        if self.image_loader is None or not gid:
+            return None
+        if gid not in self._loaded_images:
+            fields = self._images[IMAGE_FIELDS * gid : IMAGE_FIELDS * (gid + 1)]
+            tileset, x, y, width, height, flag_bits = fields
+            image = None
+            if tileset >= 0:
+                if tileset not in self._tileset_loaders:
+                    path, colorkey = self.tilesets[tileset]
+                    self._tileset_loaders[tileset] = self.image_loader(path, colorkey)
+                flags = TileFlags(
+                    bool(flag_bits & 1), bool(flag_bits & 2), bool(flag_bits & 4)
+                )
+                image = self._tileset_loaders[tileset](
+                    (x, y, width, height) if width else None, flags
+                )
+            self._loaded_images[gid] = image
+        return self._loaded_images[gid]
+
+
+def load_map(tmx_file: str, image_loader: Callable | None = None) -> CompiledMap:
+    """Loads a map from its cache file, compiling it first if needed.
+
+    Args:
+        tmx_file (str): path of the .tmx file
+        image_loader (Callable, optional): pytmx image loader, None to not load
+            the images (server).
+
+    Returns:
+        CompiledMap: the loaded map
+    """
+    path = cache_path(tmx_file)
+    if not os.path.exists(path):
+        log.info("Compiling %s", tmx_file)
+        data = compile_map(tmx_file)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # a temporary file of its own for each thread compiling the map
+            descriptor, temporary_path = tempfile.mkstemp(
+                ".tmp", dir=os.path.dirname(path)
+            )
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(data)
+                os.replace(temporary_path, path)
+            except OSError:
+                os.remove(temporary_path)
+                raise
+        except OSError as e:
+            log.warning("Can't write the map cache %s : %s", path, e)
+            return CompiledMap(data, os.path.dirname(tmx_file), image_loader)
+
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return CompiledMap(data, os.path.dirname(tmx_file), image_loader)
@@ -0,0 +1,223 @@
+"""This file contains the metrics endpoint of the game server.
+
+The server can serve its metrics in the Prometheus text format on a local HTTP
+port (``server.py --metrics-port``): the lobbies and games in progress, the
+connected clients with the bytes they sent and received, the counters of the
+process (connections, disconnections, resyncs) and the histograms of the
+phases of the turns of every map (see turn_timing.py), including the turn
+latency, the enemies' AI and the encoding of the broadcasts.
+
+The endpoint runs in an asyncio event loop: the one of the room server, or its
+own loop in a thread for the single game server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Iterable
+
+from turn_timing import Histogram, map_timers
+
+log = logging.getLogger(__name__)
+
+PREFIX = "game_"
+
+_counters: dict[str, int] = {}
+_counters_lock = threading.Lock()
+
+COUNTERS = {
+    "connections": "Clients that connected to the server",
+    "disconnections": "Clients that left the server",
+    "resyncs": "Full snapshots asked by clients that lost track of the state",
+    "enemy_brain_nodes": "States explored by the searches of the enemies",
+    "enemy_brain_timeouts": "Searches of the enemies that didn't answer in time",
+}
+"""Counters of the process, with their description"""
+
+
+def count(name: str, value: int = 1) -> None:
+    """Increments a counter of the process.
+
+    Args:
+        name (str): name of the counter, a key of ``COUNTERS``
+        value (int, optional): value to add. Defaults to 1.
+    """
+    with _counters_lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def _format_labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class MetricsWriter:
+    """Builds a page of metrics in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def header(self, name: str, kind: str, description: str) -> None:
+        """Starts a metric.
+
+        Args:
+            name (str): name of the metric, without the prefix
+            kind (str): "counter", "gauge" or "histogram"
+            description (str): help text of the metric
+        """
+        self.lines.append(f"# HELP {PREFIX}{name} {description}")
+        self.lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+    def sample(self, name: str, value: float, labels: dict | None = None) -> None:
+        """Adds a value of a metric.
+
+        Args:
+            name (str): name of the metric, without the prefix
+            value (float): the value
+            labels (dict, optional): labels of the value
+        """
+        self.lines.append(f"{PREFIX}{name}{_format_labels(labels or {})} {value}")
+
+    def histogram(self, name: str, histogram: Histogram, labels: dict) -> None:
+        """Adds the samples of a histogram (cumulated buckets, sum and count).
+
+        Args:
+            name (str): name of the metric, without the prefix
+            histogram (Histogram): the histogram
+            labels (dict): labels of the histogram
+        """
+        cumulated = 0
+        for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+            cumulated += bucket_count
+            self.sample(f"{name}_bucket", cumulated, {**labels, "le": bound})
+        self.sample(f"{name}_bucket", histogram.count, {**labels, "le": "+Inf"})
+        self.sample(f"{name}_sum", histogram.total, labels)
+        self.sample(f"{name}_count", histogram.count, labels)
+
+    def render(self) -> bytes:
+        """Returns the page.
+
+        Returns:
+            bytes: the metrics, one per line
+        """
+        return ("\n".join(self.lines) + "\n").encode()
+
+
+def render_metrics(
+    lobbies: int, games: int, clients: Iterable[tuple[dict, Any]]
+) -> bytes:
+    """Builds the metrics page of a server.
+
+    Args:
+        lobbies (int): lobbies waiting for players
+        games (int): games in progress
+        clients (Iterable[tuple[dict, Any]]): labels and connection (``Connection``
+            or ``AsyncConnection``) of each connected client
+
+    Returns:
+        bytes: the metrics in the Prometheus text format
+    """
+    clients = list(clients)
+    writer = MetricsWriter()
+    writer.header("lobbies", "gauge", "Lobbies waiting for players")
+    writer.sample("lobbies", lobbies)
+    writer.header("games", "gauge", "Games in progress")
+    writer.sample("games", games)
+    writer.header("clients", "gauge", "Connected clients")
+    writer.sample("clients", len(clients))
+
+    writer.header("client_received_bytes", "counter", "Bytes received from a client")
+    for labels, connection in clients:
+        writer.sample("client_received_bytes", connection.bytes_received, labels)
+    writer.header("client_sent_bytes", "counter", "Bytes sent to a client")
+    for labels, connection in clients:
+        writer.sample("client_sent_bytes", connection.bytes_sent, labels)
+
+    with _counters_lock:
+        counters = dict(_counters)
+    for name, description in COUNTERS.items():
+        writer.header(f"{name}_total", "counter", description)
+        writer.sample(f"{name}_total", counters.get(name, 0))
+
+    writer.header(
+        "phase_seconds",
+        "histogram",
+        "Duration of the phases of the turns (turn: a player's action until the "
+        "next broadcast, enemy_ai, encode, send, recv...)",
+    )
+    for map_file, timer in sorted(map_timers().items()):
+        for phase, histogram in sorted(timer.snapshot().items()):
+            writer.histogram(
+                "phase_seconds", histogram, {"map": map_file, "phase": phase}
+            )
+    return writer.render()
+
+
+async def serve_metrics(
+    collect: Callable[[], bytes], port: int, host: str = "127.0.0.1"
+) -> None:
+    """Serves the metrics over HTTP until cancelled.
+
+    Args:
+        collect (Callable[[], bytes]): builds the metrics page, called in the loop
+        port (int): port to listen on
+        host (str, optional): address to listen on. Defaults to localhost.
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            path = request.split(b" ", 2)[1] if b" " in request else b""
+            if path in (b"/", b"/metrics"):
+                status, body = "200 OK", collect()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            header = (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(header.encode() + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except ConnectionError as e:
+            log.debug("Metrics request failed : %s", e)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    log.info("Metrics on http://%s:%d/metrics", host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def start_metrics_thread(
+    collect: Callable[[], bytes], port: int, host: str = "127.0.0.1"
+) -> threading.Thread:
+    """Serves the metrics from a thread, for a server without event loop.
+
+    Args:
+        collect (Callable[[], bytes]): builds the metrics page, called in the thread
+        port (int): port to listen on
+        host (str, optional): address to listen on. Defaults to localhost.
+
+    Returns:
+        threading.Thread: the thread serving the metrics (daemon)
+    """
+    thread = threading.Thread(
+        target=asyncio.run,
+        args=(serve_metrics(collect, port, host),),
+        name="metrics",
+        daemon=True,
+    )
+    thread.start()
+    return thread
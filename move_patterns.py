@@ -0,0 +1,131 @@
+"""This file contains the compiled form of the move matrices of moves.py.
+
+A move matrix marks the pawn with a 2 and the reachable cells with a 1. The
+pawns only need the offsets (dy, dx) of the reachable cells from the pawn, so
+every matrix of moves.py is compiled once at import into a ``MovePattern``.
+The matrices whose cells are all reachable (like Supreme) are stored as a
+region, which is clipped to the board instead of being iterated whole.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import moves
+
+
+class MovePattern:
+    """The cells a card can reach, relative to the pawn.
+
+    The targets are given column by column (dx, then dy), the order in which the
+    pawns used to scan the matrices.
+    """
+
+    def __init__(
+        self,
+        offsets: tuple[tuple[int, int], ...] = (),
+        region: tuple[int, int, int, int] | None = None,
+    ) -> None:
+        """Initializes the pattern.
+
+        Args:
+            offsets (tuple, optional): offsets (dy, dx) of the reachable cells.
+            region (tuple, optional): (dy_min, dy_max, dx_min, dx_max), bounds
+                (included) of a rectangle of reachable cells, replaces the offsets.
+        """
+        self.offsets = offsets
+        self.region = region
+
+    def targets(self, y: int, x: int, height: int, width: int) -> Iterator[tuple]:
+        """Gives the cells of the board reached from a position.
+
+        Args:
+            y (int): y coordinate of the pawn
+            x (int): x coordinate of the pawn
+            height (int): height of the board
+            width (int): width of the board
+
+        Yields:
+            tuple[int, int]: coordinates (y, x) of a reached cell
+        """
+        if self.region is None:
+            for dy, dx in self.offsets:
+                new_y, new_x = y + dy, x + dx
+                if 0 <= new_y < height and 0 <= new_x < width:
+                    yield new_y, new_x
+            return
+
+        dy_min, dy_max, dx_min, dx_max = self.region
+        rows = range(max(0, y + dy_min), min(height, y + dy_max + 1))
+        for new_x in range(max(0, x + dx_min), min(width, x + dx_max + 1)):
+            for new_y in rows:
+                if new_y != y or new_x != x:
+                    yield new_y, new_x
+
+
+def compile_pattern(matrix: list[list[int]]) -> MovePattern:
+    """Compiles a move matrix.
+
+    Args:
+        matrix (list[list[int]]): the move matrix, the pawn is marked with a 2
+
+    Returns:
+        MovePattern: the pattern, empty if the matrix has no pawn
+    """
+    origin = next(
+        (
+            (r, c)
+            for c in range(len(matrix[0]))
+            for r in range(len(matrix))
+            if matrix[r][c] == 2
+        ),
+        None,
+    )
+    if origin is None:
+        return MovePattern()
+
+    origin_r, origin_c = origin
+    offsets = tuple(
+        (r - origin_r, c - origin_c)
+        for c in range(len(matrix[0]))
+        for r in range(len(matrix))
+        if matrix[r][c] > 0 and matrix[r][c] != 2
+    )
+    if len(offsets) == len(matrix) * len(matrix[0]) - 1:
+        # every cell is reachable
+        return MovePattern(
+            region=(
+                -origin_r,
+                len(matrix) - 1 - origin_r,
+                -origin_c,
+                len(matrix[0]) - 1 - origin_c,
+            )
+        )
+    return MovePattern(offsets)
+
+
+_patterns: dict[int, tuple[list, MovePattern]] = {
+    id(matrix): (matrix, compile_pattern(matrix))
+    for name, matrix in vars(moves).items()
+    if name.startswith("move_")
+}
+"""Compiled matrices of moves.py, by id of the matrix (the matrix is kept to
+make sure the id isn't reused)"""
+
+
+def get_pattern(matrix: list[list[int]] | MovePattern) -> MovePattern:
+    """Returns the compiled pattern of a move matrix.
+
+    Args:
+        matrix (list[list[int]] | MovePattern): the move matrix
+
+    Returns:
+        MovePattern: the compiled pattern
+    """
+    if isinstance(matrix, MovePattern):
+        return matrix
+    cached = _patterns.get(id(matrix))
+    if cached is None or cached[0] is not matrix:
+        cached = (matrix, compile_pattern(matrix))
+        _patterns[id(matrix)] = cached
+    return cached[1]
@@ -0,0 +1,17 @@
+"""Module that contains the network layer shared by the server and the client.
+
+Please refer to the modules' specific documentations for more information."""
+
+from .protocol import (
+    AsyncConnection,
+    Connection,
+    MessageDecoder,
+    ProtocolError,
+    SendQueue,
+    SlowClientError,
+    encode_message,
+    frame_parts,
+)
+from .delta import BroadcastEncoder, DeltaDecoder, DeltaEncoder
+from .binary import BINARY, HELLO, JSON, StateDecoder
+from .reader import NetworkReader
@@ -0,0 +1,290 @@
+"""Compact binary encoding of the game state messages.
+
+The lists repeated in every snapshot and delta (the elements, the cards and
+keys on the map, the highlighted cells) are packed as fixed size records, and
+the names they hold are replaced by their index in a table of interned names.
+A snapshot carries the whole table, a delta only the names added since the
+last delta (the table of a game is almost always complete after the first
+snapshot). The rest of the message (fields, events) and the part of the player
+stay JSON, at the end of the payload, and are left out when empty: a delta
+where only elements moved has no JSON to parse.
+
+A client asks for this encoding in its hello message (``send_hello``). Binary
+payloads start with a zero byte, which can't start a JSON document, so a
+client reads both: a client can keep JSON to read the game states in the logs.
+
+Payload:
+    The header (``_HEADER``: the kind of message, the version, the names
+    added and the size of every list), the names (UTF-8, separated by zeros),
+    for each packed section the records of the entries set and of the keys
+    deleted, the cells added and deleted, the JSON of the other fields, then
+    the JSON of the part of the player until the end of the payload.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any
+
+MAGIC = b"\x00"
+BINARY = "binary"
+JSON = "json"
+ENCODINGS = (BINARY, JSON)
+"""Encodings of the game states the server can send, by preference"""
+
+HELLO = "hello"
+"""Message of a client giving the encodings it reads:
+``{"hello": {"encodings": [...]}}``"""
+
+HIGHLIGHTS = "possible_moves"
+"""Highlighted cells (same as delta.HIGHLIGHTS), sent as packed cells"""
+PLAYER = "player"
+"""Part of the state specific to the client (same as delta.PLAYER)"""
+
+_CELL = struct.Struct("!HH")
+
+
+class _Section:
+    """Packing of the entries of a section, whose first column is a name."""
+
+    def __init__(self, record_format: str, key_format: str, named_key: bool) -> None:
+        self.record = struct.Struct("!" + record_format)
+        self.key = struct.Struct("!" + key_format)
+        self.named_key = named_key
+        """True if the key of an entry is its name, else the other columns"""
+
+    def pack(self, entries: list, keys: list, names: NameTable) -> bytes:
+        intern = names.intern
+        pack = self.record.pack
+        packed = [pack(intern(entry[0]), *entry[1:]) for entry in entries]
+        if self.named_key:
+            packed += [self.key.pack(intern(key)) for key in keys]
+        else:
+            packed += [self.key.pack(*key) for key in keys]
+        return b"".join(packed)
+
+    def unpack(
+        self, payload: memoryview, offset: int, entries: int, keys: int, names: list
+    ) -> tuple[list, list, int]:
+        end = offset + entries * self.record.size
+        rows = [list(row) for row in self.record.iter_unpack(payload[offset:end])]
+        for row in rows:
+            row[0] = names[row[0]]
+        if not keys:
+            return rows, [], end
+        offset, end = end, end + keys * self.key.size
+        if self.named_key:
+            deleted = [
+                names[key] for (key,) in self.key.iter_unpack(payload[offset:end])
+            ]
+        else:
+            deleted = list(self.key.iter_unpack(payload[offset:end]))
+        return rows, deleted, end
+
+
+PACKED: dict[str, _Section] = {
+    "elements": _Section("HiHH", "H", True),  # [name, health, y, x]
+    "card_map_list": _Section("HHHI", "HH", False),  # [name, y, x, gid]
+    "key_map_list": _Section("HHHI", "HH", False),  # [name, y, x, gid]
+}
+"""Sections sent as packed records, in the order of the payload"""
+_SECTIONS = tuple(PACKED.items())
+
+
+_HEADER = struct.Struct(f"!cBIHI{2 * len(PACKED) + 2}HI")
+"""MAGIC, kind, version, index of the first name and size of the names, the
+number of entries and keys of each packed section, the number of cells added
+and deleted, then the size of the JSON of the other fields"""
+
+_NAME_SEPARATOR = "\0"
+
+_SNAPSHOT, _DELTA = 1, 2
+"""Kinds of messages"""
+
+
+class NameTable:
+    """Server side: the interned names of a game, shared by all its clients."""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.delivered: int = 0
+        """Number of names every client reading the binary encoding knows"""
+
+    def intern(self, name: str) -> int:
+        """Returns the index of a name, adding it to the table if needed.
+
+        Args:
+            name (str): the name
+
+        Returns:
+            int: index of the name
+        """
+        index = self.ids.get(name)
+        if index is None:
+            index = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+
+def choose_encoding(offered: list[str]) -> str:
+    """Chooses the encoding of the game states sent to a client.
+
+    Args:
+        offered (list[str]): encodings the client reads
+
+    Returns:
+        str: the preferred encoding of the server among them, JSON by default
+    """
+    for encoding in ENCODINGS:
+        if encoding in offered:
+            return encoding
+    return JSON
+
+
+def encode_state(message: dict, names: NameTable) -> bytes:
+    """Encodes a snapshot or a delta (see delta.py) in the binary encoding.
+
+    Args:
+        message (dict): the message, as it would be sent in JSON
+        names (NameTable): names of the game, new names are added to it
+
+    Raises:
+        struct.error: if a value doesn't fit its record (the message has to
+            be sent in JSON)
+
+    Returns:
+        bytes: the payload, the part of the player (JSON) can be appended to it
+    """
+    counts = []
+    records = []
+    if message["type"] == "snapshot":
+        kind = _SNAPSHOT
+        rest = {
+            name: value
+            for name, value in message.items()
+            if name not in PACKED and name not in (HIGHLIGHTS, "type", "version")
+        }
+        for name, section in PACKED.items():
+            entries = message.get(name) or []
+            counts += (len(entries), 0)
+            records.append(section.pack(entries, [], names))
+        cells = (message.get(HIGHLIGHTS) or [], [])
+        first_name = 0
+    else:
+        kind = _DELTA
+        rest = {}
+        if message["fields"]:
+            rest["fields"] = message["fields"]
+        for name, changes in message["sections"].items():
+            if name in PACKED:
+                continue
+            rest.setdefault("sections", {})[name] = changes
+        for name, section in PACKED.items():
+            changes = message["sections"].get(name)
+            if changes:
+                counts += (len(changes["set"]), len(changes["del"]))
+                records.append(section.pack(changes["set"], changes["del"], names))
+            else:
+                counts += (0, 0)
+        cells = (
+            message["highlights"].get("add", []),
+            message["highlights"].get("del", []),
+        )
+        first_name = names.delivered
+    for cell_list in cells:
+        counts.append(len(cell_list))
+        records += [_CELL.pack(y, x) for y, x in cell_list]
+
+    # the common delta only moves elements: no JSON to parse
+    rest = json.dumps(rest).encode() if rest else b""
+    new_names = _NAME_SEPARATOR.join(names.names[first_name:]).encode()
+    parts = [
+        _HEADER.pack(
+            MAGIC,
+            kind,
+            message["version"],
+            first_name,
+            len(new_names),
+            *counts,
+            len(rest),
+        ),
+        new_names,
+    ]
+    parts += records
+    parts.append(rest)
+    return b"".join(parts)
+
+
+class StateDecoder:
+    """Client side: decodes the binary game states into the JSON messages."""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        """Names of the game, indexed like the server's table"""
+
+    def decode(self, payload: bytes | bytearray | memoryview) -> dict:
+        """Decodes a binary payload. The records are read with the precompiled
+        structs from a memoryview of the payload, without copying it.
+
+        Args:
+            payload (bytes | bytearray | memoryview): the payload, starting with
+                ``MAGIC``
+
+        Returns:
+            dict: the snapshot or the delta, as it would be decoded from JSON
+        """
+        payload = memoryview(payload)
+        _, kind, version, first_name, names_size, *counts, rest_size = (
+            _HEADER.unpack_from(payload)
+        )
+        offset = _HEADER.size
+        names = self.names
+        if names_size:
+            del names[first_name:]
+            end = offset + names_size
+            names += str(payload[offset:end], "utf-8").split(_NAME_SEPARATOR)
+            offset = end
+
+        packed = {}
+        for (name, section), entries, keys in zip(
+            _SECTIONS, counts[0:-2:2], counts[1:-2:2]
+        ):
+            if entries or keys:
+                packed[name] = section.unpack(payload, offset, entries, keys, names)
+                offset = packed[name][2]
+        cells = [[], []]
+        for index, count in enumerate(counts[-2:]):
+            if count:
+                end = offset + count * _CELL.size
+                cells[index] = [
+                    list(cell) for cell in _CELL.iter_unpack(payload[offset:end])
+                ]
+                offset = end
+        end = offset + rest_size
+        message: dict[str, Any] = (
+            json.loads(bytes(payload[offset:end])) if rest_size else {}
+        )
+        if end < len(payload):
+            message[PLAYER] = json.loads(bytes(payload[end:]))
+
+        message["version"] = version
+        if kind == _SNAPSHOT:
+            message["type"] = "snapshot"
+            for name in PACKED:
+                message[name] = packed[name][0] if name in packed else []
+            message[HIGHLIGHTS] = cells[0]
+            return message
+
+        message["type"] = "delta"
+        message["base"] = version - 1
+        message.setdefault("fields", {})
+        sections = message.setdefault("sections", {})
+        for name, (entries, keys, _) in packed.items():
+            sections[name] = {"set": entries, "del": keys}
+        added, removed = cells
+        message["highlights"] = (
+            {"add": added, "del": removed} if added or removed else {}
+        )
+        return message
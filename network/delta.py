@@ -0,0 +1,338 @@
+"""Versioned delta synchronization of the game state.
+
+The server keeps, for every client, the last state it sent and only sends what
+changed since then. The stream is TCP, so the messages are received in order:
+the client applies each delta on top of the previous version. If a delta doesn't
+start from the version the client holds, the client asks for a resync and the
+server answers with a full snapshot (also sent when a client joins).
+
+Most of the state is the same for every player: ``BroadcastEncoder`` encodes
+this shared part once per broadcast, and only the small part of each player
+(its cards, its number, its selection...) is encoded per client, in the
+``player`` field that the client merges into the state.
+
+Messages:
+    snapshot: ``{"type": "snapshot", "version": v, **state, "player": {...}}``
+    delta: ``{"type": "delta", "base": v - 1, "version": v, "fields": {...},
+    "sections": {name: {"set": [entries], "del": [keys]}},
+    "highlights": {"add": [[y, x]], "del": [[y, x]]}, "player": {...}}``
+    (``player`` is left out when it didn't change)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import struct
+from typing import Any, Callable
+
+from .binary import BINARY, JSON, MAGIC, NameTable, encode_state
+
+log = logging.getLogger(__name__)
+
+SECTIONS: dict[str, Callable[[list], Any]] = {
+    "elements": lambda entry: entry[0],  # [name, health, y, x]
+    "card_map_list": lambda entry: (entry[1], entry[2]),  # [name, y, x, gid]
+    "key_map_list": lambda entry: (entry[1], entry[2]),  # [name, y, x, gid]
+    "events": lambda entry: entry[0],  # [id, kind, text]
+}
+"""Lists of entries sent entry by entry, with the function giving the key of an entry"""
+
+HIGHLIGHTS = "possible_moves"
+"""List of cells ([y, x]) sent as added and removed cells"""
+
+PLAYER = "player"
+"""Field of the messages holding the part of the state specific to the client"""
+
+_PLAYER_KEY = f', "{PLAYER}": '.encode()
+
+
+def _index_state(state: dict) -> dict:
+    """Converts a state into a comparable form (sections indexed by key).
+
+    Args:
+        state (dict): game state as sent to a client
+
+    Returns:
+        dict: indexed state
+    """
+    indexed = {}
+    for name, value in state.items():
+        if name in SECTIONS:
+            get_key = SECTIONS[name]
+            indexed[name] = {get_key(entry): list(entry) for entry in value}
+        elif name == HIGHLIGHTS:
+            indexed[name] = {tuple(cell) for cell in value or []}
+        else:
+            indexed[name] = value
+    return indexed
+
+
+def _diff(last: dict, indexed: dict, state: dict) -> dict | None:
+    """Compares a state with the last one sent.
+
+    Args:
+        last (dict): indexed state sent last
+        indexed (dict): indexed new state
+        state (dict): new state
+
+    Returns:
+        dict | None: the fields, sections and highlights of a delta, None if
+        nothing changed
+    """
+    fields = {}
+    sections = {}
+    highlights = {}
+    for name, value in indexed.items():
+        old_value = last.get(name)
+        if name in SECTIONS:
+            old_value = old_value or {}
+            changed = [
+                entry for key, entry in value.items() if old_value.get(key) != entry
+            ]
+            removed = [key for key in old_value if key not in value]
+            if changed or removed:
+                sections[name] = {"set": changed, "del": removed}
+        elif name == HIGHLIGHTS:
+            old_value = old_value or set()
+            if value != old_value:
+                highlights = {
+                    "add": [list(cell) for cell in value - old_value],
+                    "del": [list(cell) for cell in old_value - value],
+                }
+        elif name not in last or value != old_value:
+            fields[name] = state[name]
+
+    if not (fields or sections or highlights):
+        return None
+    return {"fields": fields, "sections": sections, "highlights": highlights}
+
+
+class DeltaEncoder:
+    """Server side: turns the successive states of one client into messages."""
+
+    def __init__(self) -> None:
+        self.version: int = 0
+        """Version of the last message sent"""
+        self._last: dict | None = None
+
+    def reset(self) -> None:
+        """Forces the next message to be a full snapshot (join or resync)."""
+        self._last = None
+
+    def encode(self, state: dict) -> dict | None:
+        """Builds the message to send for the given state.
+
+        Args:
+            state (dict): complete state of the client
+
+        Returns:
+            dict | None: snapshot or delta message, None if nothing changed
+        """
+        indexed = _index_state(state)
+        if self._last is None:
+            self._last = indexed
+            self.version += 1
+            message = {"type": "snapshot", "version": self.version}
+            message.update(state)
+            return message
+
+        changes = _diff(self._last, indexed, state)
+        if changes is None:
+            return None
+
+        self._last = indexed
+        self.version += 1
+        return {
+            "type": "delta",
+            "base": self.version - 1,
+            "version": self.version,
+            **changes,
+        }
+
+
+class BroadcastEncoder:
+    """Server side: encodes the state of all the clients of a game at once.
+
+    The shared state is diffed and serialized once per broadcast, whatever the
+    number of clients, and every client gets the same version: a delta for
+    the clients up to date, a snapshot for the ones that joined or asked for a
+    resync. The part of each player is serialized on its own and only sent
+    when it changed.
+
+    The shared part is serialized in the encoding of each client (JSON or
+    binary, see binary.py), once per encoding used.
+    """
+
+    def __init__(self, clients: int) -> None:
+        """Initializes the encoder.
+
+        Args:
+            clients (int): number of clients
+        """
+        self.version: int = 0
+        """Version of the last messages sent"""
+        self._last: dict | None = None
+        self._needs_snapshot: list[bool] = [True] * clients
+        self._players: list[bytes | None] = [None] * clients
+        """Part of each player sent last, serialized"""
+        self._encodings: list[str] = [JSON] * clients
+        self.names = NameTable()
+        """Names interned by the binary encoding"""
+
+    def reset(self, index: int) -> None:
+        """Forces the next message of a client to be a full snapshot.
+
+        Args:
+            index (int): index of the client
+        """
+        self._needs_snapshot[index] = True
+
+    def set_encoding(self, index: int, encoding: str) -> None:
+        """Sets the encoding of the messages of a client.
+
+        Args:
+            index (int): index of the client
+            encoding (str): JSON or BINARY
+        """
+        if encoding != self._encodings[index]:
+            # the binary deltas need the names of the binary snapshot
+            self._encodings[index] = encoding
+            self._needs_snapshot[index] = True
+
+    def encode(
+        self, state: dict, players: list[dict]
+    ) -> list[tuple[bytes, bytes] | None]:
+        """Builds the messages to send for the given states.
+
+        Args:
+            state (dict): state shared by every client
+            players (list[dict]): part of the state specific to each client, its
+                fields must not be in ``state``
+
+        Returns:
+            list[tuple[bytes, bytes] | None]: for each client, the payload of
+            its message in two parts (the shared part, the same bytes object for
+            the clients getting the same kind of message, then the part of the
+            player, empty if it didn't change), None if nothing changed for
+            this client
+        """
+        indexed = _index_state(state)
+        changes = None if self._last is None else _diff(self._last, indexed, state)
+        encoded_players = [json.dumps(player).encode() for player in players]
+        if changes is None:
+            if not any(self._needs_snapshot) and encoded_players == self._players:
+                return [None] * len(players)
+            # only the part of some players changed: every client still needs
+            # the new version to apply the next deltas
+            changes = {"fields": {}, "sections": {}, "highlights": {}}
+
+        self._last = indexed
+        self.version += 1
+        kinds = [
+            ("snapshot" if needs_snapshot else "delta", encoding)
+            for needs_snapshot, encoding in zip(self._needs_snapshot, self._encodings)
+        ]
+        shared: dict[tuple[str, str], bytes] = {}
+        # the snapshots first: a binary delta carries the names they added
+        for kind, encoding in sorted(set(kinds), reverse=True):
+            if kind == "snapshot":
+                message = {"type": "snapshot", "version": self.version, **state}
+            else:
+                message = {
+                    "type": "delta",
+                    "base": self.version - 1,
+                    "version": self.version,
+                    **changes,
+                }
+            shared[kind, encoding] = self._serialize(message, encoding)
+        self.names.delivered = len(self.names.names)
+
+        payloads = []
+        for index, player in enumerate(encoded_players):
+            kind, encoding = kinds[index]
+            payload = shared[kind, encoding]
+            changed = kind == "snapshot" or player != self._players[index]
+            if payload.startswith(MAGIC):
+                payloads.append((payload, player if changed else b""))
+            else:
+                # left open, the part of the player closes the object
+                payloads.append(
+                    (payload, _PLAYER_KEY + player + b"}" if changed else b"}")
+                )
+            # a client reading the binary encoding that got JSON misses names
+            self._needs_snapshot[index] = encoding == BINARY and not (
+                payload.startswith(MAGIC)
+            )
+            self._players[index] = player
+        return payloads
+
+    def _serialize(self, message: dict, encoding: str) -> bytes:
+        if encoding == BINARY:
+            try:
+                return encode_state(message, self.names)
+            except (struct.error, TypeError) as e:
+                log.warning("Game state sent in JSON, not fitting the binary : %s", e)
+        return json.dumps(message).encode()[:-1]
+
+
+class DeltaDecoder:
+    """Client side: rebuilds the state from the snapshots and the deltas.
+
+    ``state`` always has the same shape as a full snapshot, so the code reading
+    the received data doesn't need to know about deltas.
+    """
+
+    def __init__(self) -> None:
+        self.version: int = 0
+        """Version of the last message applied, 0 before the first snapshot"""
+        self.state: dict = {}
+        self._sections: dict[str, dict] = {}
+
+    def apply(self, message: dict) -> dict | None:
+        """Applies a snapshot or a delta.
+
+        Args:
+            message (dict): message received from the server
+
+        Returns:
+            dict | None: the applied message, None if it can't be applied and
+            a resync is needed
+        """
+        if message.get("type") == "snapshot":
+            self.version = message["version"]
+            self.state = message
+            self.state.update(message.pop(PLAYER, None) or {})
+            self._sections = {
+                name: {get_key(entry): entry for entry in message.get(name, [])}
+                for name, get_key in SECTIONS.items()
+            }
+            return message
+
+        if self.version == 0 or message["base"] != self.version:
+            log.warning(
+                "Delta %s can't be applied on version %s",
+                message.get("version"),
+                self.version,
+            )
+            return None
+
+        self.state.update(message["fields"])
+        for name, changes in message["sections"].items():
+            section = self._sections.setdefault(name, {})
+            get_key = SECTIONS[name]
+            for key in changes["del"]:
+                section.pop(tuple(key) if isinstance(key, list) else key, None)
+            for entry in changes["set"]:
+                section[get_key(entry)] = entry
+            self.state[name] = list(section.values())
+        if message["highlights"]:
+            highlights = {tuple(cell) for cell in self.state.get(HIGHLIGHTS) or []}
+            highlights.difference_update(
+                tuple(cell) for cell in message["highlights"]["del"]
+            )
+            highlights.update(tuple(cell) for cell in message["highlights"]["add"])
+            self.state[HIGHLIGHTS] = [list(cell) for cell in highlights]
+        self.state.update(message.get(PLAYER) or {})
+        self.version = message["version"]
+        return message
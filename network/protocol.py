@@ -0,0 +1,600 @@
+"""Framed wire protocol shared by the server and the client.
+
+Every message is a JSON document prefixed by its length (4 bytes, big endian).
+TCP is a stream: one ``recv`` can hold several messages or only a part of one,
+so the receiving side feeds what it reads to a ``MessageDecoder`` that returns
+every complete message and keeps the remaining bytes for the next read.
+
+The sending side never blocks on a slow client: the frames wait in the
+``SendQueue`` of the connection until the socket accepts them. The game states
+waiting there can be dropped (``drop_superseded``) when a newer snapshot
+replaces them, and a client whose queue grows too big or doesn't move for too
+long is evicted.
+
+A frame can be made of several parts (``frame_parts``): the game state shared
+by every player is encoded once and sent to each client next to its own part,
+with a scatter-gather write (``sendmsg``) instead of joining the bytes.
+
+The first message of a client is its hello (``send_hello``), giving the
+encodings of the game states it reads (see binary.py). The connections of the
+server handle it themselves: the game only reads ``encoding``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import socket
+import struct
+import time
+from collections import deque
+from typing import Any, Callable, Sequence
+
+from game_constants.consts import (
+    MAX_MESSAGE_SIZE,
+    RECV_BUFFER_SIZE,
+    SEND_MAX_BUFFERS,
+    SEND_QUEUE_LIMIT,
+    SLOW_CLIENT_TIMEOUT,
+    STATE_ENCODINGS,
+)
+
+from .binary import HELLO, JSON, MAGIC, StateDecoder, choose_encoding
+
+log = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!I")
+"""Length prefix of a message: unsigned 32 bits integer, network byte order"""
+
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+"""Scatter-gather sends are not available on Windows"""
+
+
+class ProtocolError(Exception):
+    """Raised when the received bytes can't be a valid message."""
+
+
+class SlowClientError(Exception):
+    """Raised when a client doesn't read what is sent to it fast enough."""
+
+
+def encode_message(message: Any) -> bytes:
+    """Encodes a message into a length-prefixed frame.
+
+    Args:
+        message (Any): JSON serializable message
+
+    Returns:
+        bytes: the frame to send on the socket
+    """
+    payload = json.dumps(message).encode()
+    return HEADER.pack(len(payload)) + payload
+
+
+def frame_parts(*payload: bytes) -> tuple[bytes, ...]:
+    """Frames a message whose payload is split into several parts, without
+    copying them.
+
+    Args:
+        *payload (bytes): the parts of the JSON payload, in order
+
+    Returns:
+        tuple[bytes, ...]: the parts of the frame, header first
+    """
+    return (HEADER.pack(sum(len(part) for part in payload)), *payload)
+
+
+def _as_parts(frame: bytes | Sequence[bytes]) -> Sequence[bytes]:
+    return (frame,) if isinstance(frame, (bytes, bytearray)) else frame
+
+
+def _is_hello(message: Any) -> bool:
+    return isinstance(message, dict) and HELLO in message
+
+
+class MessageDecoder:
+    """Incremental decoder of length-prefixed frames.
+
+    The decoder owns a receive buffer that is reused for every read
+    (``recv_into``), so no new buffer is allocated each frame.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = RECV_BUFFER_SIZE,
+        max_message_size: int = MAX_MESSAGE_SIZE,
+    ) -> None:
+        """Initializes the decoder.
+
+        Args:
+            buffer_size (int, optional): size of the reusable receive buffer.
+            max_message_size (int, optional): frames bigger than this are rejected.
+        """
+        self._chunk = bytearray(buffer_size)
+        self._chunk_view = memoryview(self._chunk)
+        self._pending = bytearray()
+        self.max_message_size = max_message_size
+        self.states = StateDecoder()
+        """Decoder of the game states received in the binary encoding"""
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[Any]:
+        """Adds received bytes to the decoder.
+
+        Args:
+            data (bytes): bytes read from the socket
+
+        Returns:
+            list[Any]: every message completed by these bytes, in order
+        """
+        self._pending += data
+        messages = []
+        offset = 0
+        while len(self._pending) - offset >= HEADER.size:
+            (length,) = HEADER.unpack_from(self._pending, offset)
+            if length > self.max_message_size:
+                raise ProtocolError(f"Message too big ({length} bytes)")
+            end = offset + HEADER.size + length
+            if len(self._pending) < end:
+                break
+            payload = self._pending[offset + HEADER.size : end]
+            if payload[:1] == MAGIC:
+                try:
+                    messages.append(self.states.decode(payload))
+                except (struct.error, IndexError, ValueError) as e:
+                    raise ProtocolError(f"Invalid binary message : {e}") from e
+            else:
+                messages.append(json.loads(payload))
+            offset = end
+        if offset:
+            del self._pending[:offset]
+        return messages
+
+    @property
+    def buffer(self) -> memoryview:
+        """Reusable receive buffer, to give to ``recv_into`` or to asyncio."""
+        return self._chunk_view
+
+    def feed_received(self, nbytes: int) -> list[Any]:
+        """Decodes the bytes written at the start of the receive buffer.
+
+        Args:
+            nbytes (int): number of bytes written in the buffer
+
+        Returns:
+            list[Any]: every message completed by these bytes, in order
+        """
+        return self.feed(self._chunk_view[:nbytes])
+
+    def recv_from(self, sock: socket.socket) -> list[Any] | None:
+        """Reads once from the socket and decodes what was received.
+
+        Args:
+            sock (socket.socket): socket to read from
+
+        Raises:
+            BlockingIOError: if the socket is non blocking and nothing is available
+
+        Returns:
+            list[Any] | None: the decoded messages, None if the peer closed the connection
+        """
+        nbytes = sock.recv_into(self._chunk)
+        if not nbytes:
+            return None
+        return self.feed_received(nbytes)
+
+
+class SendQueue:
+    """Frames waiting to be sent to a client."""
+
+    def __init__(
+        self,
+        limit: int = SEND_QUEUE_LIMIT,
+        timeout: float = SLOW_CLIENT_TIMEOUT,
+    ) -> None:
+        """Initializes an empty queue.
+
+        Args:
+            limit (int, optional): bytes waiting above which the client is too slow.
+            timeout (float, optional): seconds without progress after which the
+                client is too slow.
+        """
+        self.limit = limit
+        self.timeout = timeout
+        self.frames: deque[tuple[Sequence[bytes], int, bool]] = deque()
+        """(parts, size, supersedable) of the frames in the order they must be sent"""
+        self.offset: int = 0
+        """Bytes of the first frame already sent"""
+        self.pending_bytes: int = 0
+        self.blocked_since: float | None = None
+        """When the client stopped reading, None if it keeps up"""
+
+    def __bool__(self) -> bool:
+        return bool(self.frames)
+
+    def push(self, parts: Sequence[bytes], supersedable: bool) -> None:
+        """Adds a frame at the end of the queue.
+
+        Args:
+            parts (Sequence[bytes]): the parts of the encoded message
+            supersedable (bool): True if a later snapshot makes the frame useless
+                (game states)
+        """
+        size = sum(len(part) for part in parts)
+        self.frames.append((parts, size, supersedable))
+        self.pending_bytes += size
+
+    def pop(self) -> Sequence[bytes]:
+        """Removes the first frame (none of it must have been sent).
+
+        Returns:
+            Sequence[bytes]: the parts of the frame
+        """
+        parts, size, _ = self.frames.popleft()
+        self.pending_bytes -= size
+        return parts
+
+    def buffers(self, max_count: int = SEND_MAX_BUFFERS) -> list[memoryview]:
+        """Returns the next bytes to send, as buffers for a scatter-gather send.
+
+        Args:
+            max_count (int, optional): maximum number of buffers returned.
+
+        Returns:
+            list[memoryview]: what remains of the first frame, then the next frames
+        """
+        buffers = []
+        skip = self.offset
+        for parts, _, _ in self.frames:
+            for part in parts:
+                if skip >= len(part):
+                    skip -= len(part)
+                    continue
+                buffers.append(memoryview(part)[skip:])
+                skip = 0
+                if len(buffers) == max_count:
+                    return buffers
+        return buffers
+
+    def consume(self, nbytes: int) -> None:
+        """Removes the bytes sent from the start of the queue.
+
+        Args:
+            nbytes (int): number of bytes sent
+        """
+        self.pending_bytes -= nbytes
+        self.offset += nbytes
+        while self.frames and self.offset >= self.frames[0][1]:
+            self.offset -= self.frames.popleft()[1]
+
+    def drop_superseded(self) -> int:
+        """Removes the supersedable frames that weren't started.
+
+        Returns:
+            int: number of frames removed
+        """
+        kept = deque()
+        for index, (parts, size, supersedable) in enumerate(self.frames):
+            if supersedable and not (index == 0 and self.offset):
+                self.pending_bytes -= size
+            else:
+                kept.append((parts, size, supersedable))
+        dropped = len(self.frames) - len(kept)
+        self.frames = kept
+        return dropped
+
+    def blocked(self, progress: bool) -> None:
+        """Records whether the client read something after a send attempt.
+
+        Args:
+            progress (bool): True if some bytes were sent
+        """
+        if not self.frames:
+            self.blocked_since = None
+        elif progress or self.blocked_since is None:
+            self.blocked_since = time.monotonic()
+
+    def too_slow(self) -> str | None:
+        """Checks whether the client is too slow to be kept.
+
+        Returns:
+            str | None: the reason, None if the client keeps up
+        """
+        if self.pending_bytes > self.limit:
+            return f"{self.pending_bytes} bytes waiting to be sent"
+        if (
+            self.blocked_since is not None
+            and time.monotonic() - self.blocked_since > self.timeout
+        ):
+            return f"nothing read for {self.timeout:.0f}s"
+        return None
+
+
+class Connection:
+    """A socket with its own decoder, inbox of decoded messages and send queue.
+
+    It exposes ``fileno`` so it can be given directly to ``select``. In non
+    blocking mode, what the socket can't take yet stays in ``outbox`` until
+    ``flush`` is called again (when ``select`` says the socket is writable).
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.decoder = MessageDecoder()
+        self.inbox: deque = deque()
+        """Messages decoded but not consumed yet"""
+        self.outbox = SendQueue()
+        """Frames not sent yet"""
+        self.encoding: str = JSON
+        """Encoding of the game states sent to the peer, chosen from its hello"""
+        self.bytes_received: int = 0
+        self.bytes_sent: int = 0
+
+    def fileno(self) -> int:
+        """Returns the file descriptor of the socket (used by select)."""
+        return self.sock.fileno()
+
+    def getpeername(self) -> tuple:
+        """Returns the address of the remote end of the socket."""
+        return self.sock.getpeername()
+
+    def setblocking(self, blocking: bool) -> None:
+        """Sets the blocking mode of the socket."""
+        self.sock.setblocking(blocking)
+
+    def close(self) -> None:
+        """Closes the socket."""
+        self.sock.close()
+
+    def shutdown(self) -> None:
+        """Ends both directions of the connection, waking up a thread blocked on
+        a receive (``close`` alone doesn't)."""
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            # already closed by the peer
+            pass
+
+    def send_message(self, message: Any) -> None:
+        """Sends a whole message.
+
+        Args:
+            message (Any): JSON serializable message
+        """
+        self.send_frame(encode_message(message))
+
+    def send_hello(self, encodings: tuple[str, ...] = STATE_ENCODINGS) -> None:
+        """Tells the server the encodings of the game states the client reads.
+
+        Args:
+            encodings (tuple[str, ...], optional): the encodings, by preference.
+        """
+        self.send_message({HELLO: {"encodings": list(encodings)}})
+
+    def send_frame(
+        self, frame: bytes | Sequence[bytes], supersedable: bool = False
+    ) -> None:
+        """Sends a message already encoded by ``encode_message`` or ``frame_parts``.
+
+        Args:
+            frame (bytes | Sequence[bytes]): the encoded message, or its parts
+            supersedable (bool, optional): True if a later snapshot makes the
+                message useless (game states).
+
+        Raises:
+            SlowClientError: if the client doesn't read fast enough
+        """
+        self.outbox.push(_as_parts(frame), supersedable)
+        self.flush()
+        reason = self.outbox.too_slow()
+        if reason:
+            raise SlowClientError(reason)
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes waiting to be sent."""
+        return self.outbox.pending_bytes
+
+    def wants_write(self) -> bool:
+        """Returns whether some data waits for the socket to be writable."""
+        return bool(self.outbox)
+
+    def flush(self) -> None:
+        """Sends as much of the queued frames as the socket accepts (everything
+        in blocking mode)."""
+        sent = 0
+        while self.outbox:
+            try:
+                if _HAS_SENDMSG:
+                    nbytes = self.sock.sendmsg(self.outbox.buffers())
+                else:
+                    nbytes = self.sock.send(self.outbox.buffers(1)[0])
+            except (BlockingIOError, InterruptedError):
+                break
+            self.outbox.consume(nbytes)
+            sent += nbytes
+        self.bytes_sent += sent
+        self.outbox.blocked(sent > 0)
+
+    def drop_superseded(self) -> None:
+        """Drops the queued game states, a snapshot will replace them."""
+        self.outbox.drop_superseded()
+
+    def recv_messages(self) -> bool:
+        """Reads once from the socket and stores the decoded messages in the inbox.
+
+        Raises:
+            BlockingIOError: if the socket is non blocking and nothing is available
+
+        Returns:
+            bool: False if the peer closed the connection
+        """
+        nbytes = self.sock.recv_into(self.decoder.buffer)
+        if not nbytes:
+            return False
+        self.bytes_received += nbytes
+        for message in self.decoder.feed_received(nbytes):
+            if _is_hello(message):
+                self.encoding = choose_encoding(message[HELLO].get("encodings", []))
+            else:
+                self.inbox.append(message)
+        return True
+
+    def wait_message(self) -> Any | None:
+        """Blocks until a whole message is received.
+
+        Returns:
+            Any | None: the oldest message of the inbox, None if the connection closed
+        """
+        self.sock.setblocking(True)
+        while not self.inbox:
+            if not self.recv_messages():
+                return None
+        return self.inbox.popleft()
+
+
+class AsyncConnection(asyncio.BufferedProtocol):
+    """asyncio version of ``Connection``, used by the room server.
+
+    The received bytes are written by asyncio directly in the decoder's buffer.
+    ``send_message`` can be called from any thread: the game logic of a room
+    runs in a worker thread while the sockets belong to the event loop.
+    When the transport's buffer is full (``pause_writing``), the frames wait in
+    ``outbox`` and the client is evicted if it doesn't catch up.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        on_connect: Callable[[AsyncConnection], None],
+        on_message: Callable[[AsyncConnection, Any], None],
+        on_close: Callable[[AsyncConnection], None],
+    ) -> None:
+        """Initializes the connection.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): event loop owning the socket
+            on_connect (Callable): called when the connection is made
+            on_message (Callable): called for each message received
+            on_close (Callable): called when the connection is lost
+        """
+        self.loop = loop
+        self.decoder = MessageDecoder()
+        self.transport: asyncio.Transport | None = None
+        self.closed = False
+        self.outbox = SendQueue()
+        """Frames waiting for the transport to accept more data (event loop only)"""
+        self._paused = False
+        self._buffered: int = 0
+        """Bytes in the transport's buffer after the last write"""
+        self.encoding: str = JSON
+        """Encoding of the game states sent to the peer, chosen from its hello"""
+        self.bytes_received: int = 0
+        self.bytes_sent: int = 0
+        self._on_connect = on_connect
+        self._on_message = on_message
+        self._on_close = on_close
+
+    # asyncio.BufferedProtocol interface
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self._on_connect(self)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self.decoder.buffer
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self.bytes_received += nbytes
+        try:
+            messages = self.decoder.feed_received(nbytes)
+        except (ProtocolError, ValueError) as e:
+            log.error("Invalid data from %s : %s", self.getpeername(), e)
+            self.close()
+            return
+        for message in messages:
+            if _is_hello(message):
+                self.encoding = choose_encoding(message[HELLO].get("encodings", []))
+            else:
+                self._on_message(self, message)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.closed = True
+        self._on_close(self)
+
+    def pause_writing(self) -> None:
+        self._paused = True
+        self.outbox.blocked_since = time.monotonic()
+
+    def resume_writing(self) -> None:
+        self._paused = False
+        self.outbox.blocked_since = None
+        self._drain()
+
+    def _drain(self) -> None:
+        while self.outbox and not self._paused and not self.closed:
+            parts = self.outbox.pop()
+            self.bytes_sent += sum(len(part) for part in parts)
+            self.transport.writelines(parts)
+        if not self.closed:
+            self._buffered = self.transport.get_write_buffer_size()
+
+    def _queue_frame(self, parts: Sequence[bytes], supersedable: bool) -> None:
+        if self.closed:
+            return
+        self.outbox.push(parts, supersedable)
+        if self._paused:
+            reason = self.outbox.too_slow()
+            if reason:
+                log.warning("Evicting %s : %s", self.getpeername(), reason)
+                self.transport.abort()
+                return
+        self._drain()
+
+    # Connection interface (used by GameServer)
+
+    def getpeername(self) -> tuple:
+        """Returns the address of the remote end of the socket."""
+        return self.transport.get_extra_info("peername")
+
+    def setblocking(self, blocking: bool) -> None:
+        """Sending never blocks: the data is buffered by the event loop."""
+
+    def close(self) -> None:
+        """Closes the connection (thread safe)."""
+        self.loop.call_soon_threadsafe(self.transport.close)
+
+    def send_message(self, message: Any) -> None:
+        """Sends a whole message (thread safe).
+
+        Args:
+            message (Any): JSON serializable message
+        """
+        self.send_frame(encode_message(message))
+
+    def send_frame(
+        self, frame: bytes | Sequence[bytes], supersedable: bool = False
+    ) -> None:
+        """Sends a message already encoded by ``encode_message`` or ``frame_parts``
+        (thread safe).
+
+        A client that doesn't read fast enough is disconnected by the event loop.
+
+        Args:
+            frame (bytes | Sequence[bytes]): the encoded message, or its parts
+            supersedable (bool, optional): True if a later snapshot makes the
+                message useless (game states).
+        """
+        if not self.closed:
+            self.loop.call_soon_threadsafe(
+                self._queue_frame, _as_parts(frame), supersedable
+            )
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes waiting to be sent (approximate from another thread)."""
+        return self.outbox.pending_bytes + self._buffered
+
+    def drop_superseded(self) -> None:
+        """Drops the queued game states, a snapshot will replace them (thread safe)."""
+        self.loop.call_soon_threadsafe(self.outbox.drop_superseded)
@@ -0,0 +1,100 @@
+"""Background reader of the messages sent by the server to a client.
+
+The render loop of the client must not wait for the network: a thread blocks
+on the socket, decodes the messages (JSON or binary game states) and puts them
+in a thread-safe inbox. Every frame, the render loop takes what arrived since
+the last frame without blocking, and has nothing to do when the inbox is empty.
+
+Only the reader thread reads from the connection: the render loop keeps
+sending on it (the actions of the player, the resyncs).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Any
+
+from .protocol import Connection, ProtocolError
+
+log = logging.getLogger(__name__)
+
+_CLOSED = object()
+"""Put in the inbox when the connection ends"""
+
+
+class NetworkReader:
+    """Reads the messages of a connection in a daemon thread."""
+
+    def __init__(self, connection: Connection) -> None:
+        """Initializes the reader, ``start`` starts the thread.
+
+        Args:
+            connection (Connection): the connection to the server. The messages
+                already in its inbox are given first.
+        """
+        self.connection = connection
+        self.inbox: queue.SimpleQueue = queue.SimpleQueue()
+        """Decoded messages, filled by the thread"""
+        self.closed: bool = False
+        """True once the render loop saw the end of the connection"""
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="network-reader", daemon=True
+        )
+
+    def start(self) -> None:
+        """Starts reading the connection (in blocking mode) in the thread."""
+        self.connection.setblocking(True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        connection = self.connection
+        try:
+            while True:
+                while connection.inbox:
+                    self.inbox.put(connection.inbox.popleft())
+                if not connection.recv_messages():
+                    log.info("The server closed the connection")
+                    break
+        # a message that isn't valid JSON raises a ValueError (JSONDecodeError)
+        except (OSError, ProtocolError, ValueError) as e:
+            if not self._stopping:
+                log.warning("Connection to the server lost : %s", e)
+        finally:
+            self.inbox.put(_CLOSED)
+
+    def get_messages(self, block: bool = False, timeout: float | None = None) -> list:
+        """Returns the messages received since the last call.
+
+        Args:
+            block (bool, optional): True to wait for at least one message.
+            timeout (float, optional): seconds to wait when blocking, None to wait
+                until a message arrives or the connection ends.
+
+        Returns:
+            list: the messages, in the order of reception (empty if nothing
+            arrived or the connection ended)
+        """
+        messages: list[Any] = []
+        try:
+            message = self.inbox.get(block and not self.closed, timeout)
+            while True:
+                if message is _CLOSED:
+                    self.closed = True
+                    break
+                messages.append(message)
+                message = self.inbox.get_nowait()
+        except queue.Empty:
+            pass
+        return messages
+
+    def close(self) -> None:
+        """Stops the thread and closes the connection."""
+        self._stopping = True
+        # wakes up the blocking receive of the thread
+        self.connection.shutdown()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.connection.close()
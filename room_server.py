@@ -0,0 +1,315 @@
+"""This module contains the asyncio server that hosts several games (rooms) at the same time.
+
+Each room has its own lobby and its own GameServer. The sockets are handled by
+the event loop, and the game logic of each room runs in a worker thread, so a
+room computing its enemies' turn doesn't stop the other rooms."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from game_constants.consts import ENEMY_BRAIN_BUDGET_MS, HOST, PORT, TURN_TIMING
+from game_server import GameServer
+from metrics import count, render_metrics, serve_metrics
+from network import AsyncConnection
+
+log = logging.getLogger(__name__)
+
+
+class Room:
+    """A lobby that becomes a game when enough players joined."""
+
+    def __init__(
+        self,
+        number: int,
+        max_players: int,
+        map_file: str,
+        run_in_worker: Callable,
+        timing: bool = TURN_TIMING,
+        brain_budget_ms: int | None = ENEMY_BRAIN_BUDGET_MS,
+    ) -> None:
+        """Initializes the room.
+
+        Args:
+            number (int): number of the room, used in the logs
+            max_players (int): number of players to wait for before starting the game
+            map_file (str): map to load, without the extension
+            run_in_worker (Callable): coroutine function running a function in a worker thread
+            timing (bool, optional): time the phases of the turns of the game.
+            brain_budget_ms (int, optional): milliseconds the enemies search their
+                moves for in each turn, None for the random AI.
+        """
+        self.number = number
+        self.max_players = max_players
+        self.map_file = map_file
+        self.run_in_worker = run_in_worker
+        self.timing = timing
+        self.brain_budget_ms = brain_budget_ms
+
+        self.connections: list[AsyncConnection] = []
+        """Clients of the room -> the index is the player number"""
+        self.pre_game_data: dict = {"players": [], "start": False}
+        self.started: bool = False
+        self.ready = asyncio.Event()
+        """Set when the room is full"""
+        self.messages: asyncio.Queue = asyncio.Queue()
+        """Messages received during the game: (player index, message), message is
+        None if the player left"""
+        self.game: GameServer | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Returns whether a new player can join the room."""
+        return not self.started and len(self.connections) < self.max_players
+
+    def broadcast(self, message: dict) -> None:
+        """This method allow to broadcast data to every players of the room
+
+        Args:
+            message (dict): a dict of data to be sent
+        """
+        log.debug("Room %d broadcasting : %s", self.number, message)
+        for connection in self.connections:
+            connection.send_message(message)
+
+    def update_players_list(self) -> None:
+        """Update the players list with active connections"""
+        self.pre_game_data["players"] = [
+            connection.getpeername() for connection in self.connections
+        ]
+
+    def join(self, connection: AsyncConnection) -> None:
+        """Adds a player to the lobby.
+
+        Args:
+            connection (AsyncConnection): connection of the player
+        """
+        self.connections.append(connection)
+        log.info("Connection from %s in room %d", connection.getpeername(), self.number)
+        self.update_players_list()
+        if len(self.connections) == self.max_players:
+            self.started = True
+            self.ready.set()
+        else:
+            self.broadcast(self.pre_game_data)
+
+    def leave(self, connection: AsyncConnection) -> None:
+        """Removes a player from the room.
+
+        Args:
+            connection (AsyncConnection): connection of the player
+        """
+        log.warning("Disconnected from room %d", self.number)
+        if self.started:
+            # the game can't continue without this player
+            self.messages.put_nowait((self.connections.index(connection), None))
+            return
+        self.connections.remove(connection)
+        self.update_players_list()
+        self.broadcast(self.pre_game_data)
+
+    def receive(self, connection: AsyncConnection, message: Any) -> None:
+        """Handles a message received from a player of the room.
+
+        Args:
+            connection (AsyncConnection): connection of the player
+            message (Any): message received
+        """
+        if not self.started:
+            log.debug("Received from %s : %s", connection.getpeername(), message)
+            return
+        self.messages.put_nowait((self.connections.index(connection), message))
+
+    def play_message(self, index: int, message: dict) -> bool:
+        """Plays the action of a player, then the game until a player has to
+        play (called in a worker thread).
+
+        Args:
+            index (int): index of the player
+            message (dict): message received
+
+        Returns:
+            bool: False if the game ended
+        """
+        return self.game.play_message(index, message)
+
+    async def run(self) -> None:
+        """Waits for the players, then runs the game until its end."""
+        await self.ready.wait()
+        self.pre_game_data["start"] = True
+        self.broadcast(self.pre_game_data)
+        log.info(
+            "Starting the game of room %d with %d players",
+            self.number,
+            len(self.connections),
+        )
+
+        try:
+            self.game = await self.run_in_worker(
+                GameServer,
+                [None, *self.connections],
+                f"{self.map_file}.tmx",
+                False,
+                self.timing,
+                self.brain_budget_ms,
+            )
+            await self.run_in_worker(self.game.start)
+            playing = await self.run_in_worker(self.game.advance)
+            while playing:
+                with self.game.timer.phase("recv"):
+                    index, message = await self.messages.get()
+                if message is None:
+                    log.warning("Player %d left room %d", index + 1, self.number)
+                    break
+                playing = await self.run_in_worker(self.play_message, index, message)
+        finally:
+            for connection in self.connections:
+                connection.close()
+            if self.game is not None:
+                self.game.log_timing_stats()
+            log.info("Room %d closed", self.number)
+
+
+class RoomServer:
+    """asyncio server dispatching the clients in rooms."""
+
+    def __init__(
+        self,
+        max_players: int = 2,
+        map_file: str = "map_courte",
+        host: str = HOST,
+        port: int = PORT,
+        workers: int = 32,
+        timing: bool = TURN_TIMING,
+        metrics_port: int | None = None,
+        brain_budget_ms: int | None = ENEMY_BRAIN_BUDGET_MS,
+    ) -> None:
+        """Initializes the server.
+
+        Args:
+            max_players (int, optional): number of players of each room. Defaults to 2.
+            map_file (str, optional): map of the games. Defaults to "map_courte".
+            host (str, optional): address to listen on.
+            port (int, optional): port to listen on.
+            workers (int, optional): number of threads running the games' logic.
+            timing (bool, optional): time the phases of the turns of the games.
+            metrics_port (int, optional): local port serving the metrics, None to
+                not serve them.
+            brain_budget_ms (int, optional): milliseconds the enemies search their
+                moves for in each turn, None for the random AI.
+        """
+        self.max_players = max_players
+        self.map_file = map_file
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="room")
+        self.timing = timing
+        self.metrics_port = metrics_port
+        self.brain_budget_ms = brain_budget_ms
+        self._metrics_task: asyncio.Task | None = None
+        self.rooms: list[Room] = []
+        self.room_count: int = 0
+        self._room_of: dict[AsyncConnection, Room] = {}
+
+    async def run_in_worker(self, function: Callable, *args) -> Any:
+        """Runs a function of the game logic in a worker thread.
+
+        Args:
+            function (Callable): function to run
+
+        Returns:
+            Any: the value returned by the function
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    def lobby(self) -> Room:
+        """Returns the room new players join, creating it if needed.
+
+        Returns:
+            Room: a room waiting for players
+        """
+        for room in self.rooms:
+            if room.is_open:
+                return room
+        self.room_count += 1
+        room = Room(
+            self.room_count,
+            self.max_players,
+            self.map_file,
+            self.run_in_worker,
+            self.timing,
+            self.brain_budget_ms,
+        )
+        self.rooms.append(room)
+        task = asyncio.create_task(room.run())
+        task.add_done_callback(lambda task: self.close_room(room, task))
+        return room
+
+    def close_room(self, room: Room, task: asyncio.Task) -> None:
+        """Forgets a room whose game ended.
+
+        Args:
+            room (Room): the room
+            task (asyncio.Task): task that ran the room
+        """
+        if not task.cancelled() and task.exception():
+            log.error("Error in room %d : %s", room.number, task.exception())
+        self.rooms.remove(room)
+        for connection in room.connections:
+            self._room_of.pop(connection, None)
+
+    def collect_metrics(self) -> bytes:
+        """Builds the metrics page of the server (called in the event loop).
+
+        Returns:
+            bytes: the metrics in the Prometheus text format
+        """
+        clients = []
+        for room in self.rooms:
+            for connection in room.connections:
+                if not connection.closed:
+                    host, port = connection.getpeername()[:2]
+                    labels = {"room": room.number, "client": f"{host}:{port}"}
+                    clients.append((labels, connection))
+        lobbies = sum(1 for room in self.rooms if not room.started)
+        return render_metrics(lobbies, len(self.rooms) - lobbies, clients)
+
+    def on_connect(self, connection: AsyncConnection) -> None:
+        count("connections")
+        room = self.lobby()
+        self._room_of[connection] = room
+        room.join(connection)
+
+    def on_message(self, connection: AsyncConnection, message: Any) -> None:
+        if connection in self._room_of:
+            self._room_of[connection].receive(connection, message)
+
+    def on_close(self, connection: AsyncConnection) -> None:
+        count("disconnections")
+        room = self._room_of.pop(connection, None)
+        if room:
+            room.leave(connection)
+
+    async def serve(self) -> None:
+        """Accepts clients until the server is stopped."""
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(
+            lambda: AsyncConnection(
+                loop, self.on_connect, self.on_message, self.on_close
+            ),
+            self.host,
+            self.port,
+            reuse_address=True,
+        )
+        log.info("Listening on %s with rooms", server.sockets[0].getsockname())
+        if self.metrics_port is not None:
+            # the loop only keeps a weak reference to the tasks
+            self._metrics_task = asyncio.create_task(
+                serve_metrics(self.collect_metrics, self.metrics_port)
+            )
+        async with server:
+            await server.serve_forever()
@@ -1,17 +1,19 @@
 """This module is the main server module. It is used to start the server and wait for client 
 connection in order to start the game."""
 
+import asyncio
 import logging
 import socket
 import select
-import json
 import argparse
 
 from rich.logging import RichHandler
 
-from discord_handler import DiscordHandler
 from game_server import GameServer
-from game_constants.consts import HOST, PORT, PAYLOAD_SIZE
+from metrics import count, render_metrics, start_metrics_thread
+from room_server import RoomServer
+from game_constants.consts import ENEMY_BRAIN_BUDGET_MS, HOST, PORT, TURN_TIMING
+from network import Connection
 
 # server root formatter
 root_logger = logging.getLogger()
@@ -32,6 +34,8 @@ root_logger.setLevel(logging.DEBUG)
 root_logger.propagate = False
 log = logging.getLogger(__name__)
 
+# discord.py is only needed to send the logs to discord
+# from discord_handler import DiscordHandler
 # discord_handler = DiscordHandler()
 # log.addHandler(discord_handler)
 
@@ -52,18 +56,63 @@ parser.add_argument(
     default="map_courte",
     required=False,
 )
+parser.add_argument(
+    "-p",
+    "--port",
+    type=int,
+    help=f"Port to listen on. Default is {PORT}",
+    default=PORT,
+)
+parser.add_argument(
+    "-r",
+    "--rooms",
+    action="store_true",
+    help="Host several games at the same time, each in its own room (asyncio server)",
+)
+parser.add_argument(
+    "-l",
+    "--log-level",
+    type=str.upper,
+    choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+    help="Minimum level of the logged messages. Default is 'DEBUG'",
+    default="DEBUG",
+    required=False,
+)
+parser.add_argument(
+    "-t",
+    "--timing",
+    action="store_true",
+    help="Time the phases of the turns, the durations are logged at the end of each game",
+    default=TURN_TIMING,
+)
+parser.add_argument(
+    "--metrics-port",
+    type=int,
+    help="Serve the metrics (Prometheus text format) on this local port, also "
+    "enables --timing",
+    default=None,
+)
+parser.add_argument(
+    "-b",
+    "--brain-budget",
+    type=int,
+    help="Milliseconds the enemies search their moves for in each turn (shared "
+    "by the enemies), instead of the random AI",
+    default=ENEMY_BRAIN_BUDGET_MS,
+)
 args = parser.parse_args()
+root_logger.setLevel(args.log_level)
 
 
 class Server:
     """This class handles the connections from the client. It doesn't handle the game logic."""
 
-    def __init__(self, max_players: int = 2) -> None:
+    def __init__(self, max_players: int = 2, port: int = PORT) -> None:
         # server data
         self.hostname = HOST
-        self.port = PORT
+        self.port = port
         self.read_list: list = []
-        """Sockets list -> first socket is the server socket, the others are client sockets"""
+        """Sockets list -> first socket is the server socket, the others are client connections"""
         self.max_players: int = max_players
 
         # game data
@@ -77,9 +126,8 @@ class Server:
             data (dict): a dict of data to be sent
         """
         log.debug("Broadcasting : %s", message)
-        data = json.dumps(message)
         for cli in self.read_list[1:]:
-            cli.send(data.encode())
+            cli.send_message(message)
         return True
 
     def update_players_list(self) -> None:
@@ -89,6 +137,25 @@ class Server:
         for cli in self.read_list[1:]:
             self.pre_game_data["players"].append(cli.getpeername())
 
+    def collect_metrics(self) -> bytes:
+        """Builds the metrics page of the server.
+
+        Returns:
+            bytes: the metrics in the Prometheus text format
+        """
+        clients = []
+        # called by the metrics thread while the main loop adds and removes
+        # clients: the slice is a copy, and a client can be closed meanwhile
+        for cli in self.read_list[1:]:
+            try:
+                host, port = cli.getpeername()[:2]
+            except OSError:
+                continue
+            clients.append(({"client": f"{host}:{port}"}, cli))
+        return render_metrics(
+            0 if self.start_status else 1, 1 if self.start_status else 0, clients
+        )
+
     def update_start_status(self) -> None:
         """Update the start status of the game"""
         if len(self.read_list[1:]) == self.max_players:
@@ -97,12 +164,12 @@ class Server:
             self.broadcast(self.pre_game_data)
             log.info("Starting the game with %s players", len(self.read_list) - 1)
 
-    def start(self) -> list[socket.socket]:
+    def start(self) -> list[socket.socket | Connection]:
         """This method is used to start the game server and wait for client connection
         in order to start the game"""
         server_socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_socket.bind((HOST, PORT))
+        server_socket.bind((self.hostname, self.port))
         server_socket.listen(self.max_players)
         log.info("Listening on %s", server_socket.getsockname())
 
@@ -115,18 +182,21 @@ class Server:
             for s in readable:  # for each socket (server/client)
                 if s is server_socket:  # manage server socket
                     client_socket, address = server_socket.accept()
-                    self.read_list.append(client_socket)
+                    self.read_list.append(Connection(client_socket))
+                    count("connections")
                     log.info("Connection from %s", address)
                     self.update_players_list()
                     if len(self.read_list[1:]) != self.max_players:
                         self.broadcast(self.pre_game_data)
                 else:  # manage client socket
-                    data = s.recv(PAYLOAD_SIZE)
-                    if data:  # received data
-                        data = data.decode()
-                        log.debug("Received from %s : %s", s.getpeername(), data)
+                    if s.recv_messages():  # received data
+                        while s.inbox:
+                            log.debug(
+                                "Received from %s : %s", s.getpeername(), s.inbox.popleft()
+                            )
                     else:  # client closed connection
                         log.warning("Disconnected : %s", s.getpeername())
+                        count("disconnections")
                         s.close()
                         self.read_list.remove(s)
                         self.update_players_list()
@@ -140,12 +210,36 @@ class Server:
 
 
 if __name__ == "__main__":
+    timing = args.timing or args.metrics_port is not None
+    if args.rooms:
+        asyncio.run(
+            RoomServer(
+                args.max_players,
+                args.map,
+                port=args.port,
+                timing=timing,
+                metrics_port=args.metrics_port,
+                brain_budget_ms=args.brain_budget,
+            ).serve()
+        )
+    metrics_thread = None
     while True:
         try:
-            server = Server(args.max_players)
+            server = Server(args.max_players, args.port)
+            if args.metrics_port is not None and metrics_thread is None:
+                # server is always the server of the current game
+                metrics_thread = start_metrics_thread(
+                    lambda: server.collect_metrics(), args.metrics_port
+                )
             map_file = args.map 
-            game = GameServer(server.start(), f"{map_file}.tmx")
+            game = GameServer(
+                server.start(),
+                f"{map_file}.tmx",
+                timing=timing,
+                brain_budget_ms=args.brain_budget,
+            )
             game.run()
+            server.close()
         except Exception as e:
             server.close()
             log.error(f"Error : {e}")
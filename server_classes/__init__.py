@@ -3,6 +3,7 @@
 Please refer to the classes' specific documentations for more information."""
 
 from .board import Board
+from .snapshot import BoardSnapshot
 from .card import Card
 from .key import Key
 from .player import Player
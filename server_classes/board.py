@@ -1,14 +1,18 @@
 """ This file contains the board class that will be used to create the board and the cells."""
 
 from __future__ import annotations
+from array import array
 from collections import defaultdict
 
 import random
 import logging
-import math
-import pytmx
-from .cell import Cell
-from .map_object import Tile, MapKey, Pawn, Enemy, MapCard
+from game_constants.consts import DEBUG_POSITIONS
+from highlights import HighlightSet
+from map_cache import load_map
+from .cell import Cell, CellGrid
+from .map_object import MapKey, Pawn, Enemy, MapCard
+from .pathfinding import DIRECTIONS, PathFinder
+from .snapshot import BoardSnapshot
 from server_classes.goal.playerGoal import playerGoal
 from server_classes.goal.cardGoal import cardGoal
 
@@ -48,14 +52,73 @@ class Board:
         self.height = height
         self.tilewidth = tile_width
         self.tileheight = tile_height
-        self.cells = [[None for _ in range(width)] for _ in range(height)]
+        self._init_cells(width, height)
         # self.camera = camera
         self.rect = rect
         self.healing_tiles = []
+        self.effect_tiles: dict[str, dict[tuple[int, int], int]] = {}
+        """Tiles with an effect at the end of the turns ("heal"): value of the
+        effect by cell (y, x), in the order of the cells"""
+        self.highlights = HighlightSet()
+        """Highlighted cells of the selected pawn and card"""
+        self.debug_positions: bool = DEBUG_POSITIONS
+        self.pathfinder = PathFinder(width, height, self.walkable)
+        self.pawn_distances: list[int] = []
+        """Walking distance from every cell to the closest pawn, shared by the
+        enemies and recomputed only when a pawn, a card or a key moved"""
+        self._pawn_distances_key: tuple | None = None
         self.item_spawn: dict[
             str : list[list[str, int, int, int]], str : list[list[str, int, int, int]]
         ] = {}
 
+    def _init_cells(self, width: int, height: int) -> None:
+        """This function is used to create the empty cells of the board.
+
+        The cells are stored as packed arrays indexed by y * width + x, the
+        ``Cell`` objects are only views on them (``self.cells[y][x]``).
+
+        Args:
+            width (int): represents the width of the board
+            height (int): represents the height of the board
+        """
+        size = width * height
+        self.walkable = bytearray(size)
+        """1 if the cell is walkable, 0 otherwise"""
+        self.heal_values = array("H", bytes(2 * size))
+        """Heal value of each cell, 0 if it isn't a healing cell"""
+        self.occupants = array("H", bytes(2 * size))
+        """Id of the game object of each cell, 0 if it is empty"""
+        self.objects: list = [None]
+        """Game objects placed on the board, by id"""
+        self.object_ids: dict[object, int] = {}
+        self.positions: dict[object, tuple[int, int]] = {}
+        """Position (y, x) of every game object, updated with the occupants"""
+        self.cells = CellGrid(self)
+
+    def set_occupant(self, y: int, x: int, game_object) -> None:
+        """This function is used to put a game object in a cell (or to empty it
+        with None) and to keep the position index up to date.
+
+        Args:
+            y (int): represents the row of the cell
+            x (int): represents the column of the cell
+            game_object (object): the pawn, enemy, card, key... or None
+        """
+        index = y * self.width + x
+        old_object = self.objects[self.occupants[index]]
+        # the object may already have been added to another cell
+        if old_object is not None and self.positions.get(old_object) == (y, x):
+            del self.positions[old_object]
+        if game_object is None:
+            self.occupants[index] = 0
+            return
+        object_id = self.object_ids.get(game_object)
+        if object_id is None:
+            object_id = self.object_ids[game_object] = len(self.objects)
+            self.objects.append(game_object)
+        self.occupants[index] = object_id
+        self.positions[game_object] = (y, x)
+
     def get_coordinates_object(self, game_object: object) -> tuple[int, int] | None:
         """This function is used to get the coordinates of an object on the board.
 
@@ -65,10 +128,40 @@ class Board:
         Returns:
             tuple[int, int]: represents the coordinates of the object
         """
+        if self.debug_positions:
+            self.check_positions()
+        return self.positions.get(game_object)
+
+    def check_positions(self) -> None:
+        """This function is used to check the position index against the cells (debug).
+
+        Raises:
+            AssertionError: if the index doesn't match the cells
+        """
+        grid_positions = {}
         for row in self.cells:
             for cell in row:
-                if cell.game_object == game_object:
-                    return cell.y, cell.x
+                if cell.game_object is not None:
+                    if cell.game_object in grid_positions:
+                        raise AssertionError(
+                            f"{cell.game_object} is on two cells: "
+                            f"{grid_positions[cell.game_object]}, {(cell.y, cell.x)}"
+                        )
+                    grid_positions[cell.game_object] = (cell.y, cell.x)
+        if grid_positions != self.positions:
+            raise AssertionError(
+                f"Position index {self.positions} doesn't match the cells "
+                f"{grid_positions}"
+            )
+
+    def snapshot(self) -> BoardSnapshot:
+        """This function is used to take a snapshot of the occupants and of the
+        health of the entities, to simulate actions without changing the board.
+
+        Returns:
+            BoardSnapshot: the snapshot, sharing the terrain of the board
+        """
+        return BoardSnapshot.from_board(self)
 
     def get_cell(self, row: int, col: int) -> Cell | None:
         """This function is used to get the cell at the given coordinates.
@@ -102,12 +195,8 @@ class Board:
             move for move in all_possible_actions if move not in possible_attacks
         ]
 
-        for move_y, move_x in possible_moves:
-            cell = self.cells[move_y][move_x]
-            cell.highlight()
-        for move_y, move_x in possible_attacks:
-            cell = self.cells[move_y][move_x]
-            cell.highlight((255, 0, 0))
+        self.highlights.highlight(possible_moves)
+        self.highlights.highlight(possible_attacks, attack=True)
 
         return all_possible_actions
 
@@ -181,6 +270,8 @@ class Board:
     ) -> list[tuple[int, int]]:
         """This function is used to find the shortest path between two points.
 
+        The path can go through the empty cells and the cells of the pawns.
+
         Args:
             start (tuple): represents the start point (y, x)
             end (tuple): represents the end point (y, x)
@@ -188,63 +279,93 @@ class Board:
         Returns:
             list[tuple]: represents the shortest path between the two points
         """
-        rows, cols = len(self.cells), len(self.cells[0])
-        open_list = [start]
-        closed_list = set()
-
-        g = {}
-        f = {}
-
-        g[start] = 0
-        f[start] = self.heuristic(start, end)
-
-        prev = {}
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-
-        while open_list:
-            # Sort nodes in open list by lowest f score
-            current = min(open_list, key=lambda node: f[node])
-            open_list.remove(current)
-            closed_list.add(current)
-
-            if current == end:
-                # Path found, reconstructing
-                path = []
-                while current in prev:
-                    path.append(current)
-                    current = prev[current]
-                path.append(start)
-                # Remove the last node, which is the player's position
-                path.pop()
-                # Remove the first node, which is the enemy's current position
-                path.pop(0)
-                return path[::-1]
-
-            for dy, dx in directions:
-                ny, nx = current[0] + dy, current[1] + dx
-                neighbor = (ny, nx)
-
-                if (
-                    0 <= ny < rows
-                    and 0 <= nx < cols
-                    and self.cells[ny][nx].walkable
-                    and not self.is_empty_or_pawn(ny, nx)
-                    and neighbor not in closed_list
-                ):
-                    tentative_g_score = g[current] + 1
-
-                    if neighbor not in open_list:
-                        open_list.append(neighbor)
-                    elif tentative_g_score >= g[neighbor]:
-                        continue
+        return self.pathfinder.a_star(start, end, self.blocked_cells())
+
+    def blocked_cells(self) -> set[int]:
+        """This function is used to get the cells occupied by an object that
+        isn't a pawn (enemies, cards, keys), as path finder indexes.
+
+        Returns:
+            set[int]: indexes (y * width + x) of the occupied cells
+        """
+        return {
+            y * self.width + x
+            for game_object, (y, x) in self.positions.items()
+            if not isinstance(game_object, Pawn)
+        }
 
-                    # Best path until now, record it
-                    prev[neighbor] = current
-                    g[neighbor] = tentative_g_score
-                    f[neighbor] = g[neighbor] + self.heuristic(neighbor, end)
+    def get_pawn_distances(self) -> list[int]:
+        """This function is used to get the distance field toward the pawns.
 
-        # If we reached here, no path was found
-        return []
+        The field is computed from all the pawns at once, the enemies don't
+        block it (they move during the turn) but the cards and the keys do.
+
+        Returns:
+            list[int]: distance of each cell (y * width + x) to the closest pawn
+        """
+        pawns = []
+        blocked = set()
+        for game_object, (y, x) in self.positions.items():
+            if isinstance(game_object, Pawn):
+                pawns.append(y * self.width + x)
+            elif not isinstance(game_object, Enemy):
+                blocked.add(y * self.width + x)
+        pawns.sort()
+        key = (pawns, blocked)
+        if key != self._pawn_distances_key:
+            self.pawn_distances = self.pathfinder.distance_field(pawns, blocked)
+            self._pawn_distances_key = key
+        return self.pawn_distances
+
+    def step_toward_pawns(self, y: int, x: int) -> tuple[int, int] | None:
+        """This function is used to get the next cell on the way to the closest
+        pawn (by walking distance).
+
+        Args:
+            y (int): y coordinate of the start cell
+            x (int): x coordinate of the start cell
+
+        Returns:
+            tuple[int, int] | None: the next empty cell (y, x), None if no pawn
+            can be reached, if a pawn is adjacent or if the way is taken
+        """
+        distances = self.get_pawn_distances()
+        distance = distances[y * self.width + x]
+        if distance <= 1:
+            return None
+        for dy, dx in DIRECTIONS:
+            ny, nx = y + dy, x + dx
+            if (
+                0 <= ny < self.height
+                and 0 <= nx < self.width
+                and distances[ny * self.width + nx] == distance - 1
+                and self.cells[ny][nx].is_empty
+            ):
+                return ny, nx
+        return None
+
+    def get_adjacent_cell(self, y: int, x: int, object_type: type) -> Cell | None:
+        """This function is used to find an object next to a cell.
+
+        Args:
+            y (int): y coordinate of the cell
+            x (int): x coordinate of the cell
+            object_type (type): type of the object to find
+
+        Returns:
+            Cell | None: the first cell (top to bottom, left to right) next to
+            the given one holding an object of this type, None if there is none
+        """
+        adjacent = [
+            coordinates
+            for game_object, coordinates in self.positions.items()
+            if isinstance(game_object, object_type)
+            and abs(coordinates[0] - y) + abs(coordinates[1] - x) == 1
+        ]
+        if not adjacent:
+            return None
+        adjacent_y, adjacent_x = min(adjacent)
+        return self.cells[adjacent_y][adjacent_x]
 
     def heuristic(self, current, goal):
         """Provides a heuristic for the A* algorithm. Uses Manhattan distance.
@@ -288,11 +409,13 @@ class Board:
         enemy_y, enemy_x = self.get_coordinates_object(enemy)
 
         self.check_enemy_attack(enemy_x, enemy_y)
-        self.check_enemy_card(
+        if self.check_enemy_card(
             enemy_x,
             enemy_y,
             enemy,
-        )
+        ):
+            # the enemy moved on a card, keep moving from there
+            enemy_y, enemy_x = self.get_coordinates_object(enemy)
 
         if ia:
             # get the current ememy's goal
@@ -316,38 +439,28 @@ class Board:
 
             ##############################
             if isinstance(enemy.goal, playerGoal):
-                # Find the closest player
-                closest_player = None
-                closest_distance = float("inf")
-                for row in self.cells:
-                    for cell in row:
-                        if cell.game_object and isinstance(cell.game_object, Pawn):
-                            distance = (enemy_y - cell.y) ** 2 + (enemy_x - cell.x) ** 2
-                            if distance < closest_distance:
-                                end_cell = cell
-                                closest_distance = distance
+                # Follow the distance field toward the closest player
+                next_node = self.step_toward_pawns(enemy_y, enemy_x)
 
             elif isinstance(enemy.goal, cardGoal):
                 # Find the longest path to a card
-                longuest_card = None
-                longuest_distance = float("-inf")
-                for row in self.cells:
-                    for cell in row:
-                        if cell.game_object and isinstance(cell.game_object, MapCard):
-                            distance = (enemy_y - cell.y) ** 2 + (enemy_x - cell.x) ** 2
-                            if distance > longuest_distance:
-                                end_cell = cell
-                                longuest_distance = distance
-
-            # Find the shortest path to the closest player using Dijkstra
-            start_node = (enemy_y, enemy_x)
-            end_node = (end_cell.y, end_cell.x)
-            path = self.a_star(start_node, end_node)
+                cards = sorted(
+                    coordinates
+                    for game_object, coordinates in self.positions.items()
+                    if isinstance(game_object, MapCard)
+                )
+                if not cards:
+                    return False
+                end_node = max(
+                    cards,
+                    key=lambda card: (enemy_y - card[0]) ** 2
+                    + (enemy_x - card[1]) ** 2,
+                )
+                path = self.a_star((enemy_y, enemy_x), end_node)
+                next_node = path[0] if path else None
 
             # Move the enemy along the path
-            if path:
-                next_node = path.pop(0)
-
+            if next_node:
                 old_y, old_x = enemy_y, enemy_x
                 new_y, new_x = next_node[0], next_node[1]
                 self.cells[new_y][new_x].add_enemy(enemy)
@@ -368,45 +481,60 @@ class Board:
                 random.shuffle(list_directions)
                 for direction in list_directions:
                     new_y, new_x = directions[direction](enemy_y, enemy_x)
+                    if not (0 <= new_y < self.height and 0 <= new_x < self.width):
+                        continue
                     if self.cells[new_y][new_x].walkable:
                         if self.cells[new_y][new_x].game_object is None:
                             self.move_or_attack(enemy, new_y, new_x, (enemy_y, enemy_x))
                             return True
 
+    def move_enemy_step(self, enemy: Enemy, step: tuple[int, int] | None) -> bool:
+        """This function is used to play the turn of an enemy with a chosen step
+        instead of its goals, like ``BoardSnapshot.move_enemy``: it attacks an
+        adjacent pawn, takes an adjacent card, then takes the step.
+
+        Args:
+            enemy (Enemy): represents the enemy
+            step (tuple[int, int] | None): offset (dy, dx) of the step, None to stay
+
+        Returns:
+            bool: True if the enemy took its step, False otherwise
+        """
+        enemy_y, enemy_x = self.get_coordinates_object(enemy)
+        self.check_enemy_attack(enemy_x, enemy_y)
+        if self.check_enemy_card(enemy_x, enemy_y, enemy):
+            enemy_y, enemy_x = self.get_coordinates_object(enemy)
+        if step is None:
+            return False
+        new_y, new_x = enemy_y + step[0], enemy_x + step[1]
+        if not (0 <= new_y < self.height and 0 <= new_x < self.width):
+            return False
+        cell = self.cells[new_y][new_x]
+        if not (cell.walkable and cell.is_empty):
+            return False
+        self.move_or_attack(enemy, new_y, new_x, (enemy_y, enemy_x))
+        return True
+
     def check_enemy_attack(self, enemy_x: int, enemy_y: int) -> None:
         """This function is used to check if an enemy can attack a pawn."""
 
         # Get the nearest player
-        # TODO - make this a separate function
-        closest_player = None
-        closest_distance = float("inf")
-        for row in self.cells:
-            for cell in row:
-                if cell.game_object and isinstance(cell.game_object, Pawn):
-                    distance = math.sqrt(
-                        (enemy_y - cell.y) ** 2 + (enemy_x - cell.x) ** 2
-                    )
-                    if distance < closest_distance:
-                        closest_player = cell
-                        closest_distance = distance
+        closest_player = self.get_adjacent_cell(enemy_y, enemy_x, Pawn)
 
         # Check if the enemy can attack the player
-        if closest_distance <= 1:
+        if closest_player:
             enemy = self.cells[enemy_y][enemy_x].game_object
             if not enemy.attack_target(closest_player.game_object):
                 # The player is dead, remove it from the board
                 closest_player.remove_object()
 
-    def check_enemy_card(self, enemy_x: int, enemy_y: int, enemy: Enemy) -> None:
+    def check_enemy_card(self, enemy_x: int, enemy_y: int, enemy: Enemy) -> bool:
         # Vérifie si un ennemi peut ramasser une carte et si oui alors déplace l'ennemi sur la carte
-        for row in self.cells:
-            for cell in row:
-                if cell.game_object and isinstance(cell.game_object, MapCard):
-                    distance = math.sqrt(
-                        (enemy_y - cell.y) ** 2 + (enemy_x - cell.x) ** 2
-                    )
-                    if distance <= 1:
-                        self.move_or_attack(enemy, cell.y, cell.x, (enemy_y, enemy_x))
+        cell = self.get_adjacent_cell(enemy_y, enemy_x, MapCard)
+        if cell:
+            self.move_or_attack(enemy, cell.y, cell.x, (enemy_y, enemy_x))
+            return True
+        return False
 
     # def draw(
     #     self, surface: pygame.surface.Surface  # pylint: disable=c-extension-no-member
@@ -453,9 +581,7 @@ class Board:
             str : list[list[str, int, int, int]], str : list[list[str, int, int, int]]
         ] = {"card_map_list": [], "key_map_list": []}
 
-        tmx_data = pytmx.TiledMap(tmx_file)
-        tmx_gids_to_og = tmx_data.tiledgidmap
-        og_gids_to_tmx = {v: k for k, v in tmx_data.tiledgidmap.items()}
+        tmx_data = load_map(tmx_file)
 
         self.width = tmx_data.width
         self.height = tmx_data.height
@@ -463,67 +589,18 @@ class Board:
         self.tileheight = tmx_data.tileheight
         self.rect = rect
 
-        # catalogue animated tiles
-        props_catalogue = {}
-        for gid, props in tmx_data.tile_properties.items():
-            props_catalogue[gid] = props
-
-        # log.debug(sorted(props_catalogue.items()))
-
         # Create cells
-        self.cells = [
-            [
-                Cell(x, y, self.tilewidth, self.tileheight, self.rect)
-                for x in range(self.width)
-            ]
-            for y in range(self.height)
-        ]
+        self._init_cells(self.width, self.height)
 
-        # layers to draw under the game objects
-        layers = []
-        layers.append(tmx_data.get_layer_by_name("terrain"))
-        layers.append(tmx_data.get_layer_by_name("environment"))
-        layers.append(tmx_data.get_layer_by_name("Fake loot"))
-
-        # tmx_data.visible_layers
-
-        for layer in layers:
-            if not isinstance(layer, pytmx.TiledTileLayer):
-                log.error("Layer %s is not a tile layer", layer.name)
-                continue
-            for x, y, gid in layer:
-                # if gid in props_catalogue and props_catalogue[gid]["frames"]:
-                #     # animated tile
-                #     frames = []
-                #     frame_durations = []
-                #     for frame in props_catalogue[gid]["frames"]:
-                #         frames.append(tmx_data.get_tile_image_by_gid(frame.gid))
-                #         frame_durations.append(frame.duration)
-
-                #     # self.cells[y][x].add_layer(
-                #     #     AnimatedTile(
-                #     #         props_catalogue[gid].get("walkable", True),
-                #     #         frames,
-                #     #         frame_durations,
-                #     #     )
-                #     # )
-                # else:
-                # normal tile
-                self.cells[y][x].add_layer(
-                    Tile(
-                        (
-                            props_catalogue[gid].get("walkable", True)
-                            if gid in props_catalogue
-                            else True
-                        ),
-                        # tmx_data.get_tile_image_by_gid(gid),
-                    )
-                )
+        # a cell is walkable if its tiles are walkable on every layer
+        # the tiles never change: compute the walkability once
+        layers = ["terrain", "environment", "Fake loot"]
+        self.walkable = tmx_data.walkable_grid(layers)
+        self.pathfinder = PathFinder(self.width, self.height, self.walkable)
 
         # Get all card spawners
         card_spawns: dict[int : list[tuple[int, int]]] = defaultdict(list)
-        layer = tmx_data.get_layer_by_name("loot")
-        for x, y, tmx_gid in layer:
+        for x, y, tmx_gid in tmx_data.objects("loot"):
             if tmx_gid != 0:
                 id_card_spawner = tmx_gid
                 card_spawns[tmx_gid].append((x, y))
@@ -540,20 +617,9 @@ class Board:
         unused_cards = list_of_cards.copy()
         for tmx_gid, coordinates in selected_card_spawns.items():
             for coordinate in coordinates:
-                # get card image based on the original gid
+                # the clients load the image of the card from tmx_gid
                 card_random = random.choice(unused_cards)
                 unused_cards.remove(card_random)
-                og_gid = tmx_gids_to_og[tmx_gid]
-                og_gid = og_gid - 10  # valeur en brut en mode balek
-                img_gid = og_gids_to_tmx[og_gid]
-
-                # load animation
-                frames = []
-                frame_durations = []
-                for frame in tmx_data.get_tile_properties_by_gid(img_gid)["frames"]:
-                    frames.append(tmx_data.get_tile_image_by_gid(frame.gid))
-                    frame_durations.append(frame.duration)
-
                 card = MapCard(
                     card_random,
                 )
@@ -566,8 +632,7 @@ class Board:
 
         # Get all key spawners
         key_spawns: dict[int : list[tuple[int, int]]] = defaultdict(list)
-        layer = tmx_data.get_layer_by_name("keys")
-        for x, y, tmx_gid in layer:
+        for x, y, tmx_gid in tmx_data.objects("keys"):
             if tmx_gid != 0:
                 key_spawns[tmx_gid].append((x, y))
 
@@ -580,18 +645,7 @@ class Board:
         list_of_keys_copy = list_of_keys.copy()
         value = 0
         for tmx_gid, coordinates in selected_key_spawns.items():
-            # get key image based on the original gid
-            og_gid = tmx_gids_to_og[tmx_gid]
-            og_gid = og_gid - 50  # offset of the sprite sheet (spawner -> key)
-            img_gid = og_gids_to_tmx[og_gid]
-
-            # load animation
-            frames = []
-            frame_durations = []
-            for frame in tmx_data.get_tile_properties_by_gid(img_gid)["frames"]:
-                frames.append(tmx_data.get_tile_image_by_gid(frame.gid))
-                frame_durations.append(frame.duration)
-
+            # the clients load the image of the key from tmx_gid
             key = MapKey(list_of_keys_copy[value])
             value += 1
 
@@ -602,19 +656,42 @@ class Board:
             )
 
         # get the tile props ("heal") for the layer "campfire"
-        layer = tmx_data.get_layer_by_name("campfire")
-        for x, y, tmx_gid in layer:
-            if tmx_gid != 0:
-                self.cells[y][x].heal_value = tmx_data.get_tile_properties_by_gid(
-                    tmx_gid
-                )["heal"]
-                self.healing_tiles.append((x, y))
+        heal_tiles = {}
+        for x, y, tmx_gid in tmx_data.objects("campfire"):
+            properties = tmx_data.get_tile_properties_by_gid(tmx_gid)
+            self.cells[y][x].heal_value = properties["heal"]
+            self.healing_tiles.append((x, y))
+            heal_tiles[(y, x)] = properties["heal"]
+        self.effect_tiles["heal"] = dict(sorted(heal_tiles.items()))
 
         # resize cells
         # for row in self.cells:
         #     for cell in row:
         #         cell.resize(GRAPHICAL_TILE_SIZE, GRAPHICAL_TILE_SIZE)
 
+    def pawns_on_effect(self, effect: str) -> list[tuple[Pawn, int]]:
+        """This function is used to find the pawns standing on the tiles of an
+        effect, from the position index: it doesn't depend on the size of the map.
+
+        Args:
+            effect (str): name of the effect ("heal")
+
+        Returns:
+            list[tuple[Pawn, int]]: the pawns with the value of the effect of
+            their tile, in the order of the cells
+        """
+        tiles = self.effect_tiles.get(effect)
+        if not tiles:
+            return []
+        if self.debug_positions:
+            self.check_positions()
+        on_tiles = sorted(
+            (position, game_object)
+            for game_object, position in self.positions.items()
+            if position in tiles and isinstance(game_object, Pawn)
+        )
+        return [(pawn, tiles[position]) for position, pawn in on_tiles]
+
     def get_item_spawn(
         self,
     ) -> dict[str : list[list[str, int, int]], str : list[list[str, int, int]]]:
@@ -627,22 +704,17 @@ class Board:
         Returns:
             list: represents the elements on the board
         """
-        elements = []
-        for row in self.cells:
-            for cell in row:
-                if cell.game_object:
-                    if isinstance(cell.game_object, Pawn) or isinstance(
-                        cell.game_object, Enemy
-                    ):
-                        elements.append(
-                            [
-                                cell.game_object.name,
-                                cell.game_object.health,
-                                cell.y,
-                                cell.x,
-                            ]
-                        )
-        return elements
+        if self.debug_positions:
+            self.check_positions()
+        # in the order of the cells
+        return [
+            [game_object.name, game_object.health, y, x]
+            for (y, x), game_object in sorted(
+                (position, game_object)
+                for game_object, position in self.positions.items()
+                if isinstance(game_object, (Pawn, Enemy))
+            )
+        ]
 
     # Classmethods
 
@@ -1,73 +1,74 @@
 """ This file contains the case class that will represent the cases on the board. """
 
 from __future__ import annotations
-from .map_object import Tile, Pawn, Enemy
 
-# from .map_object import AnimatedTile
+from typing import TYPE_CHECKING, Iterator
 
+from .map_object import Pawn, Enemy
 
-class Cell:  # pylint: disable=too-many-instance-attributes
+if TYPE_CHECKING:
+    from .board import Board
+
+
+class Cell:
     """This class represents a higler level abstraction of a tilemap cell.
 
-    It contains all the tiles that are present in the cell
-    handles the resizing of those tiles and the drawing of the cell.
+    The board stores its cells as packed arrays (walkability, heal value,
+    occupant): a cell is only a view on one index of these arrays, created when
+    it is accessed. Two views of the same cell are equal.
     It can contain a game object, which can be used to represent a player, an enemy, an item, etc.
     """
 
-    cell_mapping: dict[tuple[int, int], Cell] = {}
+    __slots__ = ("board", "x", "y", "index")
 
-    def __init__(
-        self, x: int, y: int, width: int, height: int, rect: bool = False
-    ) -> None:
-        """Initializes the cell.
+    def __init__(self, board: Board, x: int, y: int) -> None:
+        """Initializes the view of a cell.
 
         Args:
+            board (Board): The board storing the cell.
             x (int): X coordinate of the cell.
             y (int): Y coordinate of the cell.
-            width (int): Width of the cell.
-            height (int): Height of the cell.
-            rect (bool, optional): Whether the cell is a rectangle or not. Defaults to False.
         """
-        self.cell_mapping[(x, y)] = self
-
+        self.board = board
         self.x = x
         self.y = y
-        self.rect = rect
-        self.highlighted = False
-        self.layers: list[Tile] = []
-        self.width = width
-        self.height = height
-        self.game_object = None
-        self.highlight_color = (0, 255, 0)
-        self._heal_value = 0
-        self.is_heal_cell = False
+        self.index = y * board.width + x
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Cell)
+            and other.board is self.board
+            and other.index == self.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.board), self.index))
+
+    def __repr__(self) -> str:
+        return f"Cell(y={self.y}, x={self.x})"
+
+    @property
+    def game_object(self):
+        """Returns the game object (pawn, enemy, card, key...) of the cell."""
+        return self.board.objects[self.board.occupants[self.index]]
+
+    @game_object.setter
+    def game_object(self, game_object) -> None:
+        self.board.set_occupant(self.y, self.x, game_object)
 
     @property
     def heal_value(self) -> int:
-        return self._heal_value
+        """Returns the heal value of the cell."""
+        return self.board.heal_values[self.index]
 
     @heal_value.setter
     def heal_value(self, value: int) -> None:
-        self._heal_value = value
-        self.is_heal_cell = True
-
-    def add_layer(self, layer: Tile) -> None:
-        """Adds a layer to the cell.
-
-        Args:
-            layer (Tile): The layer to add.
-        """
-        self.layers.append(layer)
+        self.board.heal_values[self.index] = value
 
-    def resize(self, width: int, height: int) -> None:
-        """Resizes the cell.
-
-        Args:
-            width (int): Width of the cell.
-            height (int): Height of the cell.
-        """
-        for tile in self.layers:
-            tile.resize(width, height)
+    @property
+    def is_heal_cell(self) -> bool:
+        """Returns whether the cell heals the pawn standing on it."""
+        return self.board.heal_values[self.index] > 0
 
     def remove_object(self) -> None:
         """Removes the object from the cell."""
@@ -123,18 +124,6 @@ class Cell:  # pylint: disable=too-many-instance-attributes
         """
         return self.game_object is None
 
-    def highlight(
-        self,
-        color: tuple[int, int, int] = (0, 255, 0),
-    ) -> None:
-        """Highlights the cell."""
-        self.highlight_color = color
-        self.highlighted = True
-
-    def unhighlight(self) -> None:
-        """Unhighlights the cell."""
-        self.highlighted = False
-
     @property
     def walkable(self) -> bool:
         """Returns whether the cell is walkable or not.
@@ -142,4 +131,49 @@ class Cell:  # pylint: disable=too-many-instance-attributes
         Returns:
             bool: Whether the cell is walkable or not.
         """
-        return all(tile.walkable for tile in self.layers)
+        return bool(self.board.walkable[self.index])
+
+
+class CellRow:
+    """A row of the board, giving the views of its cells (``board.cells[y][x]``)."""
+
+    __slots__ = ("board", "y")
+
+    def __init__(self, board: Board, y: int) -> None:
+        self.board = board
+        self.y = y
+
+    def __len__(self) -> int:
+        return self.board.width
+
+    def __getitem__(self, x: int | slice) -> Cell | list[Cell]:
+        width = self.board.width
+        if isinstance(x, slice):
+            return [Cell(self.board, i, self.y) for i in range(*x.indices(width))]
+        if x < 0:
+            x += width
+        if not 0 <= x < width:
+            raise IndexError("cell index out of range")
+        return Cell(self.board, x, self.y)
+
+    def __iter__(self) -> Iterator[Cell]:
+        for x in range(self.board.width):
+            yield Cell(self.board, x, self.y)
+
+
+class CellGrid:
+    """The rows of the board, indexed like a list of lists of cells."""
+
+    __slots__ = ("rows",)
+
+    def __init__(self, board: Board) -> None:
+        self.rows = [CellRow(board, y) for y in range(board.height)]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, y: int | slice) -> CellRow | list[CellRow]:
+        return self.rows[y]
+
+    def __iter__(self) -> Iterator[CellRow]:
+        return iter(self.rows)
@@ -0,0 +1,393 @@
+"""This file contains the enemy brain: a search of the best move of an enemy.
+
+Instead of the coin flip of ``Board.move_enemy`` between a step toward its goal
+and a random walk, an enemy can search its move: a depth-limited minimax (with
+alpha-beta pruning) over a snapshot of the board, where the enemy and the pawns
+play in turn. The search deepens two moves at a time (it always ends with a
+move of the enemy, which would otherwise never come close to a pawn able to
+strike first) until its time runs out, and plays the best step of the deepest
+completed search.
+
+The budget of milliseconds is for a whole turn of the enemies: it is split
+between the enemies still to play, each one searching from the board the
+previous one left. The searches run in a thread pool shared by the games. The
+server waits for them at most until the end of the budget of the turn (plus a
+small grace), then plays the random AI: the snapshot is a copy, so a late search
+can't change the board.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import NamedTuple
+
+from game_constants.consts import ENEMY_BRAIN_MAX_DEPTH, ENEMY_BRAIN_WORKERS
+from metrics import count
+from .map_object import Enemy, Pawn
+from .snapshot import NEIGHBOURS, BoardSnapshot
+
+log = logging.getLogger(__name__)
+
+GRACE_MS = 5
+"""Milliseconds the server waits for the searches after the budget of the turn"""
+PAWN_VALUE = 100
+"""Value of a pawn for the enemies, added to its health"""
+AGGRESSION = 3
+"""Weight of the health of the pawns against the health of the enemies: the
+pawns deal more damage than the enemies, a cautious enemy never comes close"""
+CHECK_EVERY = 64
+"""Nodes explored between two checks of the deadline (power of 2)"""
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool running the searches, created at the first search.
+
+    Returns:
+        ThreadPoolExecutor: the pool shared by the games of the process
+    """
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                ENEMY_BRAIN_WORKERS, thread_name_prefix="brain"
+            )
+        return _executor
+
+
+class SearchResult(NamedTuple):
+    """The answer of a search."""
+
+    step: tuple[int, int] | None
+    """Offset (dy, dx) of the best step, None to stay"""
+    depth: int
+    """Depth of the deepest completed search, 0 if none completed"""
+    nodes: int
+    """States explored"""
+    seconds: float
+    """Duration of the search"""
+
+
+class _OutOfTime(Exception):
+    """Raised in the search when the deadline is reached."""
+
+
+class _Search:
+    """A minimax search of the move of an enemy over a snapshot."""
+
+    def __init__(
+        self,
+        snapshot: BoardSnapshot,
+        enemy: Enemy,
+        distances: list[int],
+        deadline: float,
+    ) -> None:
+        """Initializes the search.
+
+        Args:
+            snapshot (BoardSnapshot): the snapshot, owned by the search
+            enemy (Enemy): the enemy to move
+            distances (list[int]): walking distance from every cell to the
+                closest pawn, at the start of the search
+            deadline (float): ``time.perf_counter()`` at which the search stops
+        """
+        self.snapshot = snapshot
+        self.enemy = enemy
+        self.distances = distances
+        self.deadline = deadline
+        self.nodes = 0
+        self.unreachable = snapshot.width + snapshot.height
+        """Distance given to the cells the pawns can't be reached from"""
+
+    def evaluate(self) -> float:
+        """Scores the snapshot for the enemies: their health against the
+        (weighted) health and the number of the pawns, minus the distance of the
+        enemy to the pawns.
+
+        Returns:
+            float: the score, higher is better for the enemies
+        """
+        snapshot = self.snapshot
+        score = 0.0
+        for game_object in snapshot.positions:
+            if isinstance(game_object, Pawn):
+                score -= AGGRESSION * snapshot.health[game_object] + PAWN_VALUE
+            elif isinstance(game_object, Enemy):
+                score += snapshot.health[game_object]
+        position = snapshot.positions.get(self.enemy)
+        if position is not None:
+            distance = self.distances[position[0] * snapshot.width + position[1]]
+            score -= distance if distance >= 0 else self.unreachable
+        return score
+
+    def _visit(self) -> None:
+        self.nodes += 1
+        if not self.nodes % CHECK_EVERY and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+
+    def enemy_steps(self) -> list[tuple[int, int] | None]:
+        """Returns the steps of the enemy, staying last."""
+        return self.snapshot.enemy_steps(self.enemy) + [None]
+
+    def enemy_ply(self, depth: int, alpha: float, beta: float) -> float:
+        """Plays every step of the enemy (max).
+
+        Args:
+            depth (int): remaining moves
+            alpha (float): score the enemies are sure to get
+            beta (float): score the pawns are sure to get
+
+        Returns:
+            float: score of the best step
+        """
+        self._visit()
+        if depth == 0 or self.enemy not in self.snapshot.positions:
+            return self.evaluate()
+        best = float("-inf")
+        for step in self.enemy_steps():
+            self.snapshot.move_enemy(self.enemy, step)
+            try:
+                score = self.pawn_ply(depth - 1, alpha, beta)
+            finally:
+                self.snapshot.undo()
+            best = max(best, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best
+
+    def pawn_ply(self, depth: int, alpha: float, beta: float) -> float:
+        """Plays every move of one pawn to an adjacent cell (min), then the end
+        of the turn (heal). The cards of the players aren't known: the pawns
+        are supposed to move one cell.
+
+        Args:
+            depth (int): remaining moves
+            alpha (float): score the enemies are sure to get
+            beta (float): score the pawns are sure to get
+
+        Returns:
+            float: score of the best move of the pawns
+        """
+        self._visit()
+        if depth == 0:
+            return self.evaluate()
+        snapshot = self.snapshot
+        moves = [
+            (pawn, y + dy, x + dx)
+            for pawn, (y, x) in snapshot.positions.items()
+            if isinstance(pawn, Pawn)
+            for dy, dx in NEIGHBOURS
+            if snapshot.is_walkable(y + dy, x + dx)
+            and not isinstance(snapshot.get_object(y + dy, x + dx), Pawn)
+        ]
+        if not moves:
+            return self.enemy_ply(depth - 1, alpha, beta)
+        best = float("inf")
+        for pawn, new_y, new_x in moves:
+            snapshot.move_or_attack(pawn, new_y, new_x)
+            snapshot.heal()
+            try:
+                score = self.enemy_ply(depth - 1, alpha, beta)
+            finally:
+                snapshot.undo()
+                snapshot.undo()
+            best = min(best, score)
+            beta = min(beta, score)
+            if alpha >= beta:
+                break
+        return best
+
+    def best_step(self, depth: int, first: tuple | None) -> tuple[int, int] | None:
+        """Searches the best step of the enemy at a depth.
+
+        Args:
+            depth (int): moves of the enemy and of the pawns
+            first (tuple | None): step to try first (best of the previous depth)
+
+        Returns:
+            tuple[int, int] | None: the best step, None to stay
+        """
+        steps = self.enemy_steps()
+        if first in steps:
+            steps.remove(first)
+            steps.insert(0, first)
+        best_step, alpha = None, float("-inf")
+        for step in steps:
+            self.snapshot.move_enemy(self.enemy, step)
+            try:
+                score = self.pawn_ply(depth - 1, alpha, float("inf"))
+            finally:
+                self.snapshot.undo()
+            if score > alpha:
+                best_step, alpha = step, score
+        return best_step
+
+
+def search(
+    snapshot: BoardSnapshot,
+    enemy: Enemy,
+    distances: list[int],
+    deadline: float,
+    max_depth: int = ENEMY_BRAIN_MAX_DEPTH,
+) -> SearchResult:
+    """Searches the best step of an enemy, two moves deeper at a time (depths 1,
+    3, 5...), until the deadline or the maximum depth.
+
+    Args:
+        snapshot (BoardSnapshot): snapshot of the board, owned by the search
+        enemy (Enemy): the enemy
+        distances (list[int]): walking distance from every cell to the closest pawn
+        deadline (float): ``time.perf_counter()`` at which the search stops
+        max_depth (int, optional): maximum depth of the search
+
+    Returns:
+        SearchResult: the best step of the deepest completed search
+    """
+    start = time.perf_counter()
+    searcher = _Search(snapshot, enemy, distances, deadline)
+    step, completed = None, 0
+    try:
+        for depth in range(1, max_depth + 1, 2):
+            step = searcher.best_step(depth, step)
+            completed = depth
+    except _OutOfTime:
+        pass
+    return SearchResult(step, completed, searcher.nodes, time.perf_counter() - start)
+
+
+class EnemyBrain:
+    """Plays the enemies of a game with a search under a budget per turn."""
+
+    def __init__(
+        self,
+        budget_ms: int,
+        max_depth: int = ENEMY_BRAIN_MAX_DEPTH,
+        executor: ThreadPoolExecutor | None = None,
+    ) -> None:
+        """Initializes the brain.
+
+        Args:
+            budget_ms (int): milliseconds of search of a turn of the enemies
+            max_depth (int, optional): maximum depth of the search
+            executor (ThreadPoolExecutor, optional): pool running the searches,
+                the pool shared by the games if None.
+        """
+        self.budget_ms = budget_ms
+        self.max_depth = max_depth
+        self.executor = executor
+        self.searches = 0
+        self.nodes = 0
+        self.seconds = 0.0
+        """Duration of the searches, in the workers"""
+        self.depths = 0
+        """Sum of the depths of the completed searches"""
+        self.timeouts = 0
+        """Searches without an answer in time, replaced by the random AI"""
+        self.turn_end: float = 0.0
+        """``time.perf_counter()`` at which the budget of the turn ends"""
+        self.enemies_left: int = 0
+        """Enemies still to play in the turn"""
+
+    def start_turn(self, enemies: int) -> None:
+        """Starts the budget of a turn of the enemies.
+
+        Args:
+            enemies (int): number of enemies playing in the turn
+        """
+        self.turn_end = time.perf_counter() + self.budget_ms / 1000
+        self.enemies_left = enemies
+
+    def choose_step(self, board, enemy: Enemy) -> SearchResult | None:
+        """Searches the step of an enemy in the pool, with its share of what is
+        left of the budget of the turn (a turn of this enemy alone if no turn
+        was started).
+
+        Args:
+            board (Board): the board of the game
+            enemy (Enemy): the enemy
+
+        Returns:
+            SearchResult | None: the answer, None if the search didn't complete
+            any depth in time
+        """
+        if self.enemies_left <= 0:
+            self.start_turn(1)
+        now = time.perf_counter()
+        deadline = now + (self.turn_end - now) / self.enemies_left
+        self.enemies_left -= 1
+        if deadline <= now:
+            # the budget of the turn is spent
+            self.timeouts += 1
+            count("enemy_brain_timeouts")
+            return None
+        executor = self.executor or get_executor()
+        future = executor.submit(
+            search,
+            board.snapshot(),
+            enemy,
+            board.get_pawn_distances(),
+            deadline,
+            self.max_depth,
+        )
+        try:
+            result = future.result(
+                timeout=max(self.turn_end + GRACE_MS / 1000 - time.perf_counter(), 0.0)
+            )
+        except FutureTimeoutError:
+            result = None
+        if result is not None:
+            self.searches += 1
+            self.nodes += result.nodes
+            self.seconds += result.seconds
+            self.depths += result.depth
+            count("enemy_brain_nodes", result.nodes)
+        if result is None or result.depth == 0:
+            self.timeouts += 1
+            count("enemy_brain_timeouts")
+            return None
+        return result
+
+    def move_enemy(self, board, enemy: Enemy, count_player: int) -> bool:
+        """Plays the turn of an enemy: the step of the search, or the random AI
+        of the board if the search didn't answer in time.
+
+        Args:
+            board (Board): the board of the game
+            enemy (Enemy): the enemy
+            count_player (int): number of players, for the random AI
+
+        Returns:
+            bool: True if the enemy moved
+        """
+        result = self.choose_step(board, enemy)
+        if result is None:
+            return board.move_enemy(enemy, count_player)
+        log.debug(
+            "Name: %s step: %s depth: %d nodes: %d",
+            enemy.name,
+            result.step,
+            result.depth,
+            result.nodes,
+        )
+        return board.move_enemy_step(enemy, result.step)
+
+    @property
+    def nodes_per_second(self) -> float:
+        """Returns the states explored per second of search."""
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    def format_stats(self) -> str:
+        """Returns the statistics of the searches, to tune the budget and the depth."""
+        depth = self.depths / self.searches if self.searches else 0.0
+        return (
+            f"{self.searches} searches of {self.budget_ms} ms, "
+            f"{self.nodes_per_second:.0f} nodes/s, mean depth {depth:.1f}, "
+            f"{self.timeouts} timeouts"
+        )
@@ -1,5 +1,7 @@
 """ This module is used to create the log_event."""
 
+from event_log import EventLog
+
 
 class LogEvent:
     """This class is used to create the game info."""
@@ -19,60 +21,21 @@ class LogEvent:
             height (int): represents the height of the game info
         """
         super().__init__()
-        self.list_log = [""]
         # self.base_text_rect = (screen.get_width() - width - 40, space_from_top)
         # self.base_y = screen.get_height()
         self.space_from_top = space_from_top
         self.width = width
         self.height = height
-        self.count_reset = 1
-        self.reset = False
-        self.reset_logfile("log_event.txt")
-
-    def read_logfile(self, log_file: str):
-        with open(log_file, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-
-            if lines:
-                try:
-                    self.count_reset = int(lines[0].rstrip("\n"))
-                except ValueError:
-                    self.count_reset = 0
-
-            self.list_log = [line.rstrip("\n") for line in lines[1:]]
-
-    def write_logfile(self, log_file: str, text: str):
-        with open(log_file, "r+", encoding="utf-8") as file:
-            lines = file.readlines()
-
-            if lines:
-                try:
-                    first_line_number = int(lines[0].strip()) + 1
-                    lines[0] = f"{first_line_number}\n"
-                except ValueError:
-                    pass
+        self.events = EventLog()
 
-            text_written = False
-            for i in range(1, len(lines)):
-                if not lines[i].strip():
-                    lines[i] = text + "\n"
-                    text_written = True
-                    break
-
-            if not text_written:
-                lines.append(text + "\n")
-
-            file.seek(0)
-            file.writelines(lines)
-
-    def reset_logfile(self, log_file: str):
-        """This function is used to reset the log file.
+    def add_event(self, text: str, kind: str = "info") -> None:
+        """This function is used to add an event to the log.
 
         Args:
-            log_file (str): represents the path of the log file
+            text (str): represents the text of the event
+            kind (str, optional): represents the type of the event
         """
-        with open(log_file, "w", encoding="utf-8") as file:
-            file.write("0")
+        self.events.push(text, kind)
 
     # def draw_text(self, screen: pygame.surface):
     #     """This function is used to draw the game info.
@@ -80,15 +43,8 @@ class LogEvent:
     #     Args:
     #         screen (pygame.surface): represents the screen
     #     """
-    #     self.list_log = [""]
-    #     self.read_logfile("log_event.txt")
-
-    #     while len(self.list_log) > 5:
-    #         self.list_log.pop(0)
-
-    #     # print(f"Liste a afficher : {self.list_log}")
-    #     for i, log in enumerate(self.list_log):
-    #         text = self.font.render(log, True, (self.color))
+    #     for i, event in enumerate(self.events.last(EVENT_LOG_SENT)):
+    #         text = self.font.render(event[2], True, (self.color))
     #         text_rect = text.get_rect()
     #         text_rect.topleft = (
     #             self.base_text_rect[0],
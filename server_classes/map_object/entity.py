@@ -3,9 +3,7 @@
 from __future__ import annotations
 import logging
 
-import pygame
-
-from game_constants.consts import GRAPHICAL_TILE_SIZE, SOUND
+from event_log import EventLog
 from .object_bases import ObjectBase
 
 log = logging.getLogger(__name__)
@@ -20,6 +18,8 @@ class Entity(ObjectBase):
         "Grass": {"Fire": -1, "Water": 1, "Grass": 0, "Neutral": 0},
         "Neutral": {"Fire": 0, "Water": 0, "Grass": 0, "Neutral": 0},
     }
+    event_log: EventLog | None = None
+    """Event log of the game the entity belongs to"""
 
     def __init__(
         self,
@@ -40,7 +40,6 @@ class Entity(ObjectBase):
 
         self.draw_healthbar = draw_healthbar
         self.max_health = health
-        self.healthbar = pygame.Surface((GRAPHICAL_TILE_SIZE, 5))
 
     def take_damage(self, damage: int) -> bool:
         """This method is used to take damage.
@@ -51,15 +50,9 @@ class Entity(ObjectBase):
             bool: True if the entity is still alive, False otherwise.
         """
         self.health -= damage
-        if SOUND:
-            damage_sound = pygame.mixer.Sound("sounds/damage.mp3")
-            damage_sound.play()
         if self.health <= 0:
             log.info("%s has been defeated!", self.name)
-            self.write_logfile("log_event.txt", f"{self.name} nous a quitté :(")
-            if SOUND:
-                death_sound = pygame.mixer.Sound("sounds/Death.mp3")
-                death_sound.play()
+            self.log_event(f"{self.name} nous a quitté :(", "death")
             return False
         return True
 
@@ -73,33 +66,30 @@ class Entity(ObjectBase):
         """
         log.info(f"{self.name} attacks {target.name}!")
 
-        total_damage = max(
+        total_damage = self.damage_to(target)
+        self.log_event(f"{self.name} a attaqué {target.name} !", "attack")
+
+        return target.take_damage(total_damage)
+
+    def damage_to(self, target: Entity) -> int:
+        """This method is used to compute the damage of an attack, without
+        applying it.
+
+        Args:
+            target (Entity): The target of the attack.
+        Returns:
+            int: The damage, with the advantage of the element.
+        """
+        return max(
             self.ELEMENT_ADVANTAGES[self.element][target.element] + self.attack, 0
         )
-        self.write_logfile("log_event.txt", f"{self.name} a attaqué {target.name} !")
 
-        return target.take_damage(total_damage)
+    def log_event(self, text: str, kind: str) -> None:
+        """Adds an event to the event log of the game, if the entity has one.
 
-    def write_logfile(self, log_file: str, text: str):
-        with open(log_file, "r+") as file:
-            lines = file.readlines()
-
-            if lines:
-                try:
-                    first_line_number = int(lines[0].strip()) + 1
-                    lines[0] = f"{first_line_number}\n"
-                except ValueError:
-                    pass
-
-            text_written = False
-            for i in range(1, len(lines)):
-                if not lines[i].strip():
-                    lines[i] = text + "\n"
-                    text_written = True
-                    break
-
-            if not text_written:
-                lines.append(text + "\n")
-
-            file.seek(0)
-            file.writelines(lines)
+        Args:
+            text (str): text of the event
+            kind (str): type of the event
+        """
+        if self.event_log is not None:
+            self.event_log.push(text, kind)
@@ -4,8 +4,6 @@
 import logging
 from abc import ABC, abstractmethod
 
-import pygame
-
 from game_constants.consts import TICK_DURATION_MS
 
 # pylint: disable=c-extension-no-member
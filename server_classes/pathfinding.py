@@ -0,0 +1,144 @@
+"""This file contains the path finding engine used by the enemies."""
+
+from __future__ import annotations
+
+from collections import deque
+from heapq import heappop, heappush
+
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+UNREACHABLE = -1
+"""Distance of the cells that can't be reached in a distance field"""
+
+
+class PathFinder:
+    """A* on a flat walkability grid.
+
+    The walkability of the tiles never changes during a game, so it is computed
+    once when the map is loaded. The cells occupied by objects are given to each
+    search as a set of blocked cells (occupancy overlay).
+    A cell (y, x) is stored at the index y * width + x.
+    """
+
+    def __init__(self, width: int, height: int, walkable: bytearray) -> None:
+        """Initializes the path finder.
+
+        Args:
+            width (int): width of the board
+            height (int): height of the board
+            walkable (bytearray): 1 if the cell is walkable, 0 otherwise
+        """
+        self.width = width
+        self.height = height
+        self.walkable = walkable
+
+    def a_star(
+        self, start: tuple[int, int], end: tuple[int, int], blocked: set[int]
+    ) -> list[tuple[int, int]]:
+        """This function is used to find the shortest path between two points.
+
+        The nodes with the same score are explored in the order they were found,
+        so the path is the same as the one of the previous list based version.
+
+        Args:
+            start (tuple): represents the start point (y, x)
+            end (tuple): represents the end point (y, x)
+            blocked (set[int]): indexes of the cells that can't be crossed
+
+        Returns:
+            list[tuple]: the cells between the two points (both excluded),
+            empty if there is no path
+        """
+        width, height, walkable = self.width, self.height, self.walkable
+        end_y, end_x = end
+        start_index = start[0] * width + start[1]
+        end_index = end_y * width + end_x
+
+        g = {start_index: 0}
+        prev = {}
+        found_order = {start_index: 0}
+        closed = set()
+        open_heap = [(abs(start[0] - end_y) + abs(start[1] - end_x), 0, start_index)]
+
+        while open_heap:
+            _, _, current = heappop(open_heap)
+            if current in closed:
+                # outdated entry, the node was reached again with a better score
+                continue
+            closed.add(current)
+
+            if current == end_index:
+                # Path found, reconstructing without the start and the end
+                path = []
+                current = prev.get(current)
+                while current in prev:
+                    path.append(divmod(current, width))
+                    current = prev[current]
+                return path[::-1]
+
+            current_y, current_x = divmod(current, width)
+            for dy, dx in DIRECTIONS:
+                ny, nx = current_y + dy, current_x + dx
+                if not (0 <= ny < height and 0 <= nx < width):
+                    continue
+                neighbor = ny * width + nx
+                if not walkable[neighbor] or neighbor in blocked or neighbor in closed:
+                    continue
+
+                tentative_g_score = g[current] + 1
+                if neighbor not in g:
+                    found_order[neighbor] = len(found_order)
+                elif tentative_g_score >= g[neighbor]:
+                    continue
+
+                # Best path until now, record it
+                prev[neighbor] = current
+                g[neighbor] = tentative_g_score
+                heappush(
+                    open_heap,
+                    (
+                        tentative_g_score + abs(ny - end_y) + abs(nx - end_x),
+                        found_order[neighbor],
+                        neighbor,
+                    ),
+                )
+
+        # If we reached here, no path was found
+        return []
+
+    def distance_field(self, sources: list[int], blocked: set[int]) -> list[int]:
+        """Computes the walking distance from every cell to the closest source
+        (breadth first search started from all the sources at once).
+
+        Args:
+            sources (list[int]): indexes of the cells to reach
+            blocked (set[int]): indexes of the cells that can't be crossed
+
+        Returns:
+            list[int]: distance of each cell (by index), ``UNREACHABLE`` if no
+            source can be reached from it
+        """
+        width, height, walkable = self.width, self.height, self.walkable
+        distances = [UNREACHABLE] * (width * height)
+        queue = deque()
+        for source in sources:
+            distances[source] = 0
+            queue.append(source)
+
+        while queue:
+            current = queue.popleft()
+            next_distance = distances[current] + 1
+            current_y, current_x = divmod(current, width)
+            for dy, dx in DIRECTIONS:
+                ny, nx = current_y + dy, current_x + dx
+                if not (0 <= ny < height and 0 <= nx < width):
+                    continue
+                neighbor = ny * width + nx
+                if (
+                    distances[neighbor] == UNREACHABLE
+                    and walkable[neighbor]
+                    and neighbor not in blocked
+                ):
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+        return distances
@@ -0,0 +1,338 @@
+"""This file contains the snapshots of a board, used to simulate turns without
+changing the game (lookahead of the enemies, hints).
+
+The terrain of a board (walkability, heal values, effect tiles) never changes
+during a game: a snapshot shares it with the board and only keeps its own
+occupants and health, a few dozens entries instead of a cell per tile. The
+actions applied to a snapshot are recorded in a journal, so a search can undo
+them instead of copying the snapshot at every state.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .map_object import Enemy, MapCard, Pawn
+from .map_object.entity import Entity
+from .pathfinding import DIRECTIONS
+
+if TYPE_CHECKING:
+    from .board import Board
+
+MAX_HEALTH = 100
+"""Health of a pawn healed by a tile, like ``GameServer.heal_pawns``"""
+
+NEIGHBOURS = sorted(DIRECTIONS)
+"""Offsets (dy, dx) of the adjacent cells, in the order of the cells"""
+
+
+class SnapshotCell:
+    """A cell of a snapshot, giving what ``Pawn.get_possible_moves`` reads."""
+
+    __slots__ = ("walkable", "game_object")
+
+    def __init__(self, walkable: bool, game_object) -> None:
+        self.walkable = walkable
+        self.game_object = game_object
+
+
+class BoardSnapshot:
+    """The occupants and the health of the entities of a board, over its terrain.
+
+    The actions (``move_or_attack``, ``move_enemy``, ``heal``) follow the rules
+    of the board, without the randomness of the enemies (the step is chosen by
+    the caller), and without the events, the sounds and the cards or keys
+    given to the players, which belong to the game. Every action can be undone.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        positions: dict[object, tuple[int, int]],
+        health: dict[Entity, int],
+    ) -> None:
+        """Initializes the snapshot.
+
+        Args:
+            board (Board): board giving the terrain, never changed
+            positions (dict): position (y, x) of every game object, copied
+            health (dict): health of every entity on the board, copied
+        """
+        self.board = board
+        self.width = board.width
+        self.height = board.height
+        self.positions = dict(positions)
+        """Position (y, x) of every game object"""
+        self.objects_at = {position: obj for obj, position in positions.items()}
+        """Game object of every occupied cell (y, x)"""
+        self.health = dict(health)
+        """Health of the entities (pawns, enemies), the entities aren't changed"""
+        self._journal: list[tuple] = []
+        """Changes (kind, game object, old value) since the snapshot was taken"""
+        self._actions: list[int] = []
+        """Length of the journal before each action, to undo them one by one"""
+
+    @classmethod
+    def from_board(cls, board: Board) -> BoardSnapshot:
+        """This function is used to take a snapshot of the current state of a board.
+
+        Args:
+            board (Board): the board
+
+        Returns:
+            BoardSnapshot: the snapshot, independent of the board
+        """
+        if board.debug_positions:
+            board.check_positions()
+        health = {
+            game_object: game_object.health
+            for game_object in board.positions
+            if isinstance(game_object, Entity)
+        }
+        return cls(board, board.positions, health)
+
+    def copy(self) -> BoardSnapshot:
+        """This function is used to branch a snapshot: the copy shares the
+        terrain, and starts without actions to undo.
+
+        Returns:
+            BoardSnapshot: the copy
+        """
+        return BoardSnapshot(self.board, self.positions, self.health)
+
+    # Queries, like the board
+
+    def get_coordinates_object(self, game_object: object) -> tuple[int, int] | None:
+        """This function is used to get the coordinates of an object.
+
+        Args:
+            game_object (object): represents the object
+
+        Returns:
+            tuple[int, int] | None: the coordinates (y, x), None if it isn't on
+            the board
+        """
+        return self.positions.get(game_object)
+
+    def get_object(self, y: int, x: int):
+        """This function is used to get the game object of a cell.
+
+        Args:
+            y (int): y coordinate of the cell
+            x (int): x coordinate of the cell
+
+        Returns:
+            object: the game object, None if the cell is empty
+        """
+        return self.objects_at.get((y, x))
+
+    def is_walkable(self, y: int, x: int) -> bool:
+        """This function is used to know if a cell is walkable.
+
+        Args:
+            y (int): y coordinate of the cell
+            x (int): x coordinate of the cell
+
+        Returns:
+            bool: True if the cell is on the board and walkable
+        """
+        return (
+            0 <= y < self.height
+            and 0 <= x < self.width
+            and bool(self.board.walkable[y * self.width + x])
+        )
+
+    def get_cell(self, row: int, col: int) -> SnapshotCell:
+        """This function is used to get the cell at the given coordinates, so
+        that the pawns can compute their moves on a snapshot.
+
+        Args:
+            row (int): represents the row of the cell
+            col (int): represents the column of the cell
+
+        Returns:
+            SnapshotCell: the walkability and the game object of the cell
+        """
+        return SnapshotCell(
+            bool(self.board.walkable[row * self.width + col]),
+            self.objects_at.get((row, col)),
+        )
+
+    def get_all_elements(self) -> list[list[str, int, int, int]]:
+        """This function is used to get the pawns and the enemies, in the format
+        of ``Board.get_all_elements``.
+
+        Returns:
+            list: [name, health, y, x] of the entities, in the order of the cells
+        """
+        return [
+            [game_object.name, self.health[game_object], y, x]
+            for (y, x), game_object in sorted(self.objects_at.items())
+            if isinstance(game_object, (Pawn, Enemy))
+        ]
+
+    def enemy_steps(self, enemy: Enemy) -> list[tuple[int, int]]:
+        """This function is used to get the steps an enemy can take from its cell.
+
+        Args:
+            enemy (Enemy): the enemy
+
+        Returns:
+            list[tuple[int, int]]: offsets (dy, dx) toward the adjacent empty
+            walkable cells, before the enemy attacks or takes a card
+        """
+        position = self.positions.get(enemy)
+        if position is None:
+            return []
+        y, x = position
+        return [
+            (dy, dx)
+            for dy, dx in NEIGHBOURS
+            if self.is_walkable(y + dy, x + dx)
+            and (y + dy, x + dx) not in self.objects_at
+        ]
+
+    # Changes, recorded in the journal
+
+    def _remove(self, position: tuple[int, int]) -> None:
+        game_object = self.objects_at.pop(position)
+        del self.positions[game_object]
+        self._journal.append(("remove", game_object, position))
+
+    def _place(self, game_object, position: tuple[int, int]) -> None:
+        # like the board, the object in the cell is replaced
+        if position in self.objects_at:
+            self._remove(position)
+        old_position = self.positions.get(game_object)
+        if old_position is not None:
+            del self.objects_at[old_position]
+        self.positions[game_object] = position
+        self.objects_at[position] = game_object
+        self._journal.append(("place", game_object, old_position))
+
+    def _set_health(self, entity: Entity, health: int) -> None:
+        self._journal.append(("health", entity, self.health[entity]))
+        self.health[entity] = health
+
+    def _adjacent(self, y: int, x: int, object_type: type) -> tuple[int, int] | None:
+        # the first one in the order of the cells, like Board.get_adjacent_cell
+        for dy, dx in NEIGHBOURS:
+            if isinstance(self.objects_at.get((y + dy, x + dx)), object_type):
+                return y + dy, x + dx
+        return None
+
+    # Actions
+
+    def move_or_attack(self, pawn: Pawn, new_y: int, new_x: int) -> bool:
+        """This function is used to move a pawn or to attack the enemy of the
+        cell, like ``Board.move_or_attack``.
+
+        Args:
+            pawn (Pawn): pawn to move
+            new_y (int): y coordinate of the cell
+            new_x (int): x coordinate of the cell
+
+        Returns:
+            bool: False if an enemy was attacked and survived, True otherwise
+        """
+        self._actions.append(len(self._journal))
+        enemy = self.objects_at.get((new_y, new_x))
+        if isinstance(enemy, Enemy):
+            # the attack, then the raw damage of the pawn, like the board
+            damage = pawn.damage_to(enemy) + pawn.attack
+            self._set_health(enemy, self.health[enemy] - damage)
+            if self.health[enemy] <= 0:
+                self._remove((new_y, new_x))
+                return True
+            return False
+        self._place(pawn, (new_y, new_x))
+        return True
+
+    def move_enemy(self, enemy: Enemy, step: tuple[int, int] | None = None) -> bool:
+        """This function is used to play the turn of an enemy, like
+        ``Board.move_enemy``: it attacks an adjacent pawn, takes an adjacent
+        card, then takes a step.
+
+        Args:
+            enemy (Enemy): the enemy
+            step (tuple[int, int], optional): offset (dy, dx) of the step, chosen
+                by the caller instead of the goals of the enemy. None to stay.
+
+        Returns:
+            bool: True if the enemy took its step, False if it stayed (no step,
+            cell taken or not walkable, enemy dead)
+        """
+        self._actions.append(len(self._journal))
+        position = self.positions.get(enemy)
+        if position is None or self.health[enemy] <= 0:
+            return False
+        y, x = position
+
+        pawn_position = self._adjacent(y, x, Pawn)
+        if pawn_position is not None:
+            pawn = self.objects_at[pawn_position]
+            self._set_health(pawn, self.health[pawn] - enemy.damage_to(pawn))
+            if self.health[pawn] <= 0:
+                self._remove(pawn_position)
+
+        card_position = self._adjacent(y, x, MapCard)
+        if card_position is not None:
+            self._place(enemy, card_position)
+            y, x = card_position
+
+        if step is None:
+            return False
+        new_y, new_x = y + step[0], x + step[1]
+        if not self.is_walkable(new_y, new_x) or (new_y, new_x) in self.objects_at:
+            return False
+        self._place(enemy, (new_y, new_x))
+        return True
+
+    def heal(self) -> list[tuple[Pawn, int]]:
+        """This function is used to heal the pawns standing on healing tiles, like
+        the end of a turn.
+
+        Returns:
+            list[tuple[Pawn, int]]: the pawns with the value of their tile, in
+            the order of the cells
+        """
+        self._actions.append(len(self._journal))
+        tiles = self.board.effect_tiles.get("heal", {})
+        healed = [
+            (self.objects_at[position], value)
+            for position, value in tiles.items()
+            if isinstance(self.objects_at.get(position), Pawn)
+        ]
+        for pawn, value in healed:
+            health = min(self.health[pawn] + value, MAX_HEALTH)
+            if health != self.health[pawn]:
+                self._set_health(pawn, health)
+        return healed
+
+    def undo(self) -> None:
+        """This function is used to undo the last action.
+
+        Raises:
+            IndexError: if there is no action to undo
+        """
+        if not self._actions:
+            raise IndexError("no action to undo")
+        start = self._actions.pop()
+        journal = self._journal
+        while len(journal) > start:
+            kind, game_object, old = journal.pop()
+            if kind == "health":
+                self.health[game_object] = old
+            elif kind == "remove":
+                self.positions[game_object] = old
+                self.objects_at[old] = game_object
+            else:
+                del self.objects_at[self.positions.pop(game_object)]
+                if old is not None:
+                    self.positions[game_object] = old
+                    self.objects_at[old] = game_object
+
+    @property
+    def depth(self) -> int:
+        """Returns the number of actions that can be undone."""
+        return len(self._actions)
@@ -0,0 +1,235 @@
+"""This file contains the timers of the phases of a game turn on the server.
+
+A turn of the server mixes the enemies' AI, the end of turn (heal), the encoding
+of the state sent to the clients, the socket sends and the wait for the current
+player. Each phase is timed into a histogram, per game and per map (all the
+games played on a map in this process).
+
+When the timing is disabled, ``PhaseTimer.phase`` returns a shared no-op
+context manager, so the instrumented code only pays a method call.
+"""
+
+from __future__ import annotations
+
+import bisect
+import copy
+import logging
+import threading
+import time
+from contextlib import nullcontext
+
+from game_constants.consts import TIMING_BUCKETS
+
+log = logging.getLogger(__name__)
+
+_NO_TIMING = nullcontext()
+
+
+class Histogram:
+    """Durations counted in buckets (cumulated like Prometheus histograms)."""
+
+    def __init__(self, buckets: tuple[float, ...] = TIMING_BUCKETS) -> None:
+        """Initializes an empty histogram.
+
+        Args:
+            buckets (tuple[float, ...], optional): upper bounds of the buckets, in
+                seconds, sorted. A last bucket holds the bigger durations.
+        """
+        self.buckets = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        """Number of durations of each bucket (not cumulated)"""
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, duration: float) -> None:
+        """Adds a duration.
+
+        Args:
+            duration (float): duration in seconds
+        """
+        self.counts[bisect.bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def percentile(self, percent: float) -> float:
+        """Estimates a percentile from the buckets.
+
+        Args:
+            percent (float): the percentile, between 0 and 100
+
+        Returns:
+            float: the percentile, interpolated in the bucket holding it (the
+            durations are supposed spread evenly in a bucket), 0 if the
+            histogram is empty
+        """
+        if not self.count:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        """Returns the main values of the histogram.
+
+        Returns:
+            dict[str, float]: count, then total, mean, p50, p99 and max in milliseconds
+        """
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class _Phase:
+    """Context manager timing one phase."""
+
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer: PhaseTimer, name: str) -> None:
+        self.timer = timer
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> _Phase:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.timer.observe(self.name, time.perf_counter() - self.start)
+
+
+class PhaseTimer:
+    """Histograms of the durations of the phases of the turns."""
+
+    def __init__(self, enabled: bool = True, parent: PhaseTimer | None = None) -> None:
+        """Initializes the timer.
+
+        Args:
+            enabled (bool, optional): False to not time anything.
+            parent (PhaseTimer, optional): timer also receiving every duration
+                (the timer of the map).
+        """
+        self.enabled = enabled
+        self.parent = parent
+        self.histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str) -> _Phase | nullcontext:
+        """Returns a context manager timing a phase.
+
+        Args:
+            name (str): name of the phase
+
+        Returns:
+            _Phase | nullcontext: the context manager, doing nothing if the timer
+            is disabled
+        """
+        if not self.enabled:
+            return _NO_TIMING
+        return _Phase(self, name)
+
+    def observe(self, name: str, duration: float) -> None:
+        """Adds the duration of a phase.
+
+        Args:
+            name (str): name of the phase
+            duration (float): duration in seconds
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(duration)
+        if self.parent is not None:
+            self.parent.observe(name, duration)
+
+    def snapshot(self) -> dict[str, Histogram]:
+        """Returns a copy of the histograms, that the game can't change anymore.
+
+        Returns:
+            dict[str, Histogram]: histogram of each phase
+        """
+        with self._lock:
+            return copy.deepcopy(self.histograms)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Returns the summary of every phase.
+
+        Returns:
+            dict[str, dict[str, float]]: summary of the histogram of each phase
+        """
+        with self._lock:
+            return {
+                name: histogram.summary()
+                for name, histogram in sorted(self.histograms.items())
+            }
+
+    def format_stats(self) -> str:
+        """Formats the summary of every phase as a table.
+
+        Returns:
+            str: one line per phase
+        """
+        lines = [
+            f"{'phase':<14}{'count':>8}{'total ms':>11}{'mean ms':>10}"
+            f"{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        ]
+        for name, summary in self.stats().items():
+            lines.append(
+                f"{name:<14}{summary['count']:>8}{summary['total_ms']:>11.1f}"
+                f"{summary['mean_ms']:>10.2f}{summary['p50_ms']:>9.2f}"
+                f"{summary['p99_ms']:>9.2f}{summary['max_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+
+_map_timers: dict[str, PhaseTimer] = {}
+_map_timers_lock = threading.Lock()
+
+
+def get_map_timer(map_file: str) -> PhaseTimer:
+    """Returns the timer gathering the phases of all the games played on a map.
+
+    Args:
+        map_file (str): the map
+
+    Returns:
+        PhaseTimer: the timer of this map
+    """
+    with _map_timers_lock:
+        if map_file not in _map_timers:
+            _map_timers[map_file] = PhaseTimer()
+        return _map_timers[map_file]
+
+
+def map_timers() -> dict[str, PhaseTimer]:
+    """Returns the timers of every map played in this process.
+
+    Returns:
+        dict[str, PhaseTimer]: timer of each map
+    """
+    with _map_timers_lock:
+        return dict(_map_timers)
+
+
+def map_stats() -> dict[str, dict[str, dict[str, float]]]:
+    """Returns the summary of the phases of every map played in this process.
+
+    Returns:
+        dict: summary of the phases (see ``PhaseTimer.stats``) by map
+    """
+    return {map_file: timer.stats() for map_file, timer in map_timers().items()}